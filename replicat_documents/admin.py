@@ -1,6 +1,7 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
 
-from .models import DocumentIssuerChoice, ReplicatDocument
+from .models import DocumentContextVersion, DocumentIssuerChoice, DocumentRendition, ReplicatDocument
 
 
 @admin.register(DocumentIssuerChoice)
@@ -12,12 +13,14 @@ class DocumentIssuerChoiceAdmin(admin.ModelAdmin):
         "label",
         "read_only",
         "enabled",
+        "render_policy",
     )
 
     list_filter = (
         "app_name",
         "read_only",
         "enabled",
+        "render_policy",
     )
     readonly_fields = (
         "id",
@@ -32,7 +35,7 @@ class DocumentIssuerChoiceAdmin(admin.ModelAdmin):
         (
             "Status",
             {
-                "fields": ("read_only", "enabled"),
+                "fields": ("read_only", "enabled", "render_policy"),
             },
         ),
     )
@@ -44,8 +47,46 @@ class DocumentIssuerChoiceAdmin(admin.ModelAdmin):
         return False
 
 
+class DocumentRenditionInline(admin.TabularInline):
+    model = DocumentRendition
+    fields = ("format", "rendered_at")
+    readonly_fields = ("format", "rendered_at")
+    extra = 0
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+class DocumentContextVersionInline(admin.TabularInline):
+    model = DocumentContextVersion
+    fields = ("number", "created_at", "snapshot", "delta")
+    readonly_fields = ("number", "created_at", "snapshot", "delta")
+    ordering = ("-number",)
+    extra = 0
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class ReplicatDocumentChangeList(ChangeList):
+    def get_queryset(self, request):
+        # Listed documents do not need their large JSON fields
+        return super().get_queryset(request).defer("context", "context_query", "metadata")
+
+    def get_ordering(self, request, queryset):
+        # Search results are ranked by relevance, unless a column is sorted
+        if self.query.strip() and ORDER_VAR not in self.params:
+            return ["-search_rank", "-pk"]
+        return super().get_ordering(request, queryset)
+
+
 @admin.register(ReplicatDocument)
 class ReplicatDocumentAdmin(admin.ModelAdmin):
+    inlines = (DocumentRenditionInline, DocumentContextVersionInline)
+
     list_display = (
         "id",
         "created_at",
@@ -54,6 +95,8 @@ class ReplicatDocumentAdmin(admin.ModelAdmin):
     )
 
     list_filter = ("issuer",)
+    # Searches run on the full-text index, see get_search_results
+    search_fields = ("search_text__text",)
     readonly_fields = (
         "id",
         "context",
@@ -72,6 +115,14 @@ class ReplicatDocumentAdmin(admin.ModelAdmin):
         ),
     )
 
+    def get_changelist(self, request, **kwargs):
+        return ReplicatDocumentChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return queryset.search(search_term), False
+
     def formfield_for_dbfield(self, db_field, request, **kwargs):
         # Prevent creating new `issuer` within admin
         formfield = super().formfield_for_dbfield(db_field, request, **kwargs)
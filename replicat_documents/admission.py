@@ -0,0 +1,81 @@
+"""Admission control of on-demand renders
+
+Renders triggered by requests go through a bounded queue, limited in each process by the
+number of renders in progress or waiting, overall and per issuer. Renders which do not fit
+are refused with RenderQueueFull, so that views can shed load with a 503 or 429 response
+instead of piling up work. At most RENDER_CONCURRENCY renders run at once, the others wait
+in the queue. Queue depths are exposed with the other metrics.
+"""
+
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from replicat_documents import defaults
+from replicat_documents.exceptions import IssuerRenderQueueFull, RenderQueueFull
+
+
+class RenderQueue:
+    """Thread-safe counts of the renders in progress or waiting, per issuer label"""
+
+    def __init__(self):
+        self._depths = Counter()
+        self._rejected = Counter()
+        self._lock = threading.Lock()
+        self._semaphore = None
+        self._concurrency = None
+
+    def _get_semaphore(self):
+        """Returns the semaphore limiting concurrent renders, or None if they are not limited"""
+        if defaults.RENDER_CONCURRENCY != self._concurrency:
+            self._concurrency = defaults.RENDER_CONCURRENCY
+            self._semaphore = threading.BoundedSemaphore(self._concurrency) if self._concurrency else None
+        return self._semaphore
+
+    def _reject(self, issuer, reason, error):
+        self._rejected[issuer, reason] += 1
+        raise error
+
+    @contextmanager
+    def admit(self, issuer):
+        """Runs the wrapped render once a slot is free, raising RenderQueueFull if the queue is full"""
+        with self._lock:
+            if defaults.RENDER_QUEUE_SIZE is not None and sum(self._depths.values()) >= defaults.RENDER_QUEUE_SIZE:
+                self._reject(
+                    issuer, "queue", RenderQueueFull(f"The render queue is full ({defaults.RENDER_QUEUE_SIZE})")
+                )
+            issuer_size = defaults.RENDER_QUEUE_ISSUER_SIZES.get(issuer, defaults.RENDER_QUEUE_ISSUER_SIZE)
+            if issuer_size is not None and self._depths[issuer] >= issuer_size:
+                self._reject(
+                    issuer, "issuer", IssuerRenderQueueFull(f"The render queue of {issuer} is full ({issuer_size})")
+                )
+            self._depths[issuer] += 1
+            semaphore = self._get_semaphore()
+
+        try:
+            if semaphore is None:
+                yield
+            else:
+                with semaphore:
+                    yield
+        finally:
+            with self._lock:
+                self._depths[issuer] -= 1
+
+    def depths(self):
+        """Returns a sorted list of (issuer, depth) tuples, including issuers with an empty queue"""
+        with self._lock:
+            return sorted(self._depths.items())
+
+    def rejected(self):
+        """Returns a sorted list of ((issuer, reason), count) tuples of refused renders"""
+        with self._lock:
+            return sorted(self._rejected.items())
+
+    def reset(self):
+        with self._lock:
+            self._depths = Counter()
+            self._rejected = Counter()
+
+
+render_queue = RenderQueue()
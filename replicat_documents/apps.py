@@ -10,7 +10,7 @@ from importlib import import_module
 import django
 from django.apps import AppConfig, apps
 from django.conf import settings
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_migrate, post_save
 
 logger = logging.getLogger("replicat_documents")
 
@@ -28,14 +28,14 @@ def find_document_issuers(issuers_dir):
     ]
 
 
-def load_document_issuer_class(document_issuer_name, app_name):
+def load_document_issuer_class(document_issuer_name, app_name, **kwargs):
     """
     Given a document issuer name and an application name, return the DocumentIssuer
-    class instance. Allow all errors raised by the import process
-    (ImportError, AttributeError) to propagate.
+    class instance, initialized with the given keyword arguments. Allow all errors
+    raised by the import process (ImportError, AttributeError) to propagate.
     """
     module = import_module("%s.issuers.documents.%s" % (app_name, document_issuer_name))
-    return module.DocumentIssuer()
+    return module.DocumentIssuer(**kwargs)
 
 
 @functools.lru_cache(maxsize=None)
@@ -79,19 +79,26 @@ def register_issuer_objects(sender, **kwargs):
 
     Registration includes creating a new DocumentIssuerChoice instance if it does not exist,
     enabling it if it does already exist, and disabling any non-existent issuers.
+
+    A `document_issuers` mapping (in the format returned by get_document_issuers) may be
+    provided to register a specific set of issuers instead of the discovered ones.
     """
     from replicat_documents.models import DocumentIssuerChoice
 
-    for key, value in get_document_issuers().items():
+    document_issuers = kwargs.get("document_issuers")
+    if document_issuers is None:
+        document_issuers = get_document_issuers()
+
+    for key, value in document_issuers.items():
         obj, created = DocumentIssuerChoice.objects.update_or_create(
-            issuer_module_name=key, app_name=value["app_name"], label=value["label"]
+            issuer_module_name=key, app_name=value["app_name"], defaults={"label": value["label"]}
         )
 
         if not created:
             obj.enable()
 
     # Set `enabled=False` for DocumentIssuerChoice instances which no longer have an associated issuer module
-    DocumentIssuerChoice.objects.exclude(issuer_module_name__in=get_document_issuers().keys()).update(enabled=False)
+    DocumentIssuerChoice.objects.exclude(issuer_module_name__in=document_issuers.keys()).update(enabled=False)
 
 
 class ReplicatDocumentsConfig(AppConfig):
@@ -102,5 +109,20 @@ class ReplicatDocumentsConfig(AppConfig):
     verbose_name = "Replicat Documents"
 
     def ready(self):
+        from replicat_documents import defaults
+        from replicat_documents.metrics import record_render_stage
+        from replicat_documents.models import ReplicatDocument
+        from replicat_documents.policies import queue_eager_render
+        from replicat_documents.reload import start_watching_issuers
+        from replicat_documents.signals import render_stage_finished
+        from replicat_documents.warmup import start_warm_up
+
         logger.debug("ReplicatDocumentsConfig ready method")
         post_migrate.connect(register_issuer_objects, sender=self)
+        render_stage_finished.connect(record_render_stage)
+        post_save.connect(queue_eager_render, sender=ReplicatDocument)
+
+        if defaults.WARM_UP:
+            start_warm_up()
+        if defaults.WATCH_ISSUERS:
+            start_watching_issuers()
@@ -0,0 +1,399 @@
+"""Benchmark suite for the replicat-documents pipeline
+
+Benchmarks are run against the configured database (SQLite is recommended) inside a
+transaction which is rolled back after each round, so no synthetic data is left behind.
+
+Results are plain dictionaries which can be saved as JSON and compared against a
+previously saved baseline to catch performance regressions.
+"""
+
+import datetime
+import json
+import platform
+import statistics
+import sys
+import time
+import types
+import uuid
+from pathlib import Path
+
+import django
+from django.db import connection, transaction
+from django.template import Template
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from pydantic import BaseModel
+
+from replicat_documents import __version__, defaults
+from replicat_documents.apps import register_issuer_objects
+from replicat_documents.issuer import AbstractDocumentIssuer
+from replicat_documents.models import DocumentIssuerChoice, ReplicatDocument, flatten_json
+
+SYNTHETIC_APP_NAME = "replicat_documents_synthetic"
+
+SYNTHETIC_HTML_TEMPLATE = """<html>
+  <body>
+    <h1>{{ course.name }}</h1>
+    <p>{{ student.name }}, {{ creation_date|date:"DATE_FORMAT" }}</p>
+    <p>{{ course.organization.name }} - {{ course.organization.representative }}</p>
+  </body>
+</html>
+"""
+
+SYNTHETIC_CSS_TEMPLATE = """@page { size: A4 landscape; margin: 1cm; }
+h1 { font-size: 24pt; }
+"""
+
+BENCHMARKS = {}
+
+
+class Organization(BaseModel):
+    """Organization pydantic model"""
+
+    name: str
+    representative: str
+    signature: Path
+    logo: Path
+
+
+class Student(BaseModel):
+    """Student pydantic model"""
+
+    name: str
+
+
+class Course(BaseModel):
+    """Course pydantic model"""
+
+    name: str
+    organization: Organization
+
+
+class ContextModel(BaseModel):
+    """Context pydantic model"""
+
+    identifier: uuid.UUID
+    student: Student
+    course: Course
+    creation_date: datetime.datetime
+    delivery_stamp: datetime.datetime
+
+
+class ContextQueryModel(BaseModel):
+    """Context query pydantic model"""
+
+    student: Student
+    course: Course
+
+
+class SyntheticDocumentIssuer(AbstractDocumentIssuer):
+    """Synthetic issuer modelled after the test_app report issuer"""
+
+    label = "Synthetic"
+
+    context_model = ContextModel
+    context_query_model = ContextQueryModel
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.html = Template(SYNTHETIC_HTML_TEMPLATE)
+        self.css = Template(SYNTHETIC_CSS_TEMPLATE)
+
+    def fetch_context(self) -> dict:
+        """Synthetic context"""
+        return {
+            "identifier": self.identifier,
+            "creation_date": self.created,
+            "delivery_stamp": self.created,
+            **self.context_query.dict(),
+        }
+
+
+def get_synthetic_issuer_module_name(index):
+    """Returns the issuer module name of the synthetic issuer with the given index"""
+    return f"synthetic_{index}"
+
+
+def install_synthetic_issuers(count):
+    """Makes `count` synthetic issuer modules importable and returns them as a dictionary
+
+    The returned dictionary is in the format used by `get_document_issuers`, so it can be
+    passed to `register_issuer_objects`.
+    """
+    document_issuers = {}
+
+    for index in range(count):
+        name = get_synthetic_issuer_module_name(index)
+        label = f"Synthetic {index}"
+
+        module = types.ModuleType(f"{SYNTHETIC_APP_NAME}.issuers.documents.{name}")
+        module.DocumentIssuer = type("DocumentIssuer", (SyntheticDocumentIssuer,), {"label": label})
+        sys.modules[module.__name__] = module
+
+        document_issuers.update({name: {"app_name": SYNTHETIC_APP_NAME, "label": label}})
+
+    return document_issuers
+
+
+def create_synthetic_issuer(index=0):
+    """Creates and returns the DocumentIssuerChoice instance of an installed synthetic issuer"""
+    return DocumentIssuerChoice.objects.create(
+        app_name=SYNTHETIC_APP_NAME,
+        issuer_module_name=get_synthetic_issuer_module_name(index),
+        label=f"Synthetic {index}",
+    )
+
+
+def get_synthetic_context_query(index=0):
+    """Returns a context query which validates against the synthetic issuers' ContextQueryModel"""
+    return {
+        "student": {"name": f"Student {index}"},
+        "course": {
+            "name": f"Course {index % 10}",
+            "organization": {
+                "name": "Synthetic Organization",
+                "representative": "Jane Doe",
+                "signature": "signature.png",
+                "logo": "logo.png",
+            },
+        },
+    }
+
+
+def get_synthetic_metadata(width, depth):
+    """Returns a nested metadata dictionary with `width` keys and lists at each of `depth` levels"""
+    if depth == 0:
+        return {f"key_{index}": f"value {index}" for index in range(width)}
+
+    return {
+        f"key_{index}": [get_synthetic_metadata(width, depth - 1), index, str(index)] for index in range(width)
+    }
+
+
+def benchmark(cls):
+    """Registers a benchmark class in the suite"""
+    BENCHMARKS[cls.name] = cls
+    return cls
+
+
+class Benchmark:
+    """Base benchmark.
+
+    `setup` and `teardown` are excluded from the timing, only `run` is measured. Each
+    round is run inside a transaction which is rolled back afterwards.
+    """
+
+    name = ""
+
+    def __init__(self, scale):
+        self.scale = scale
+
+    @classmethod
+    def is_available(cls):
+        """Returns False when the benchmark cannot run in the current environment"""
+        return True
+
+    def setup(self):
+        pass
+
+    def run(self):
+        raise NotImplementedError
+
+    def teardown(self):
+        pass
+
+
+@benchmark
+class FlattenJsonBenchmark(Benchmark):
+    """Flattens nested metadata"""
+
+    name = "flatten_json"
+
+    def setup(self):
+        self.metadata = [get_synthetic_metadata(width=5, depth=2) for _ in range(self.scale)]
+
+    def run(self):
+        for metadata in self.metadata:
+            flatten_json(metadata)
+
+
+@benchmark
+class PydanticModelFieldValidationBenchmark(Benchmark):
+    """Validates serialized and deserialized context queries with PydanticModelField"""
+
+    name = "pydantic_model_field_validation"
+
+    def setup(self):
+        issuer = create_synthetic_issuer()
+        self.document = ReplicatDocument(issuer=issuer)
+        self.field = ReplicatDocument._meta.get_field("context_query")
+        self.values = [get_synthetic_context_query(index) for index in range(self.scale)]
+        self.values += [json.dumps(value) for value in self.values]
+
+    def run(self):
+        for value in self.values:
+            self.field.validate(value, self.document)
+
+
+@benchmark
+class RegisterIssuerObjectsBenchmark(Benchmark):
+    """Registers a large number of issuers, then registers them again"""
+
+    name = "register_issuer_objects"
+
+    def setup(self):
+        self.document_issuers = install_synthetic_issuers(self.scale)
+
+    def run(self):
+        register_issuer_objects(sender=None, document_issuers=self.document_issuers)
+        register_issuer_objects(sender=None, document_issuers=self.document_issuers)
+
+
+@benchmark
+class GetCachedInstancesBenchmark(Benchmark):
+    """Reads and refreshes the cached issuer instances"""
+
+    name = "get_cached_instances"
+
+    def setup(self):
+        register_issuer_objects(sender=None, document_issuers=install_synthetic_issuers(self.scale))
+        DocumentIssuerChoice.objects.clear_cached_instances()
+
+    def run(self):
+        for _ in range(10):
+            DocumentIssuerChoice.objects.get_cached_instances()
+        DocumentIssuerChoice.objects.get_cached_instances(refresh=True)
+
+    def teardown(self):
+        DocumentIssuerChoice.objects.clear_cached_instances()
+
+
+@benchmark
+class BulkCreateBenchmark(Benchmark):
+    """Creates documents in bulk, including context query validation"""
+
+    name = "bulk_create"
+
+    def setup(self):
+        issuer = create_synthetic_issuer()
+        self.documents = [
+            ReplicatDocument(issuer=issuer, context_query=get_synthetic_context_query(index))
+            for index in range(self.scale)
+        ]
+
+    def run(self):
+        ReplicatDocument.objects.bulk_create(self.documents, batch_size=500)
+
+
+@benchmark
+class RenderBenchmark(Benchmark):
+    """Renders documents to PDF"""
+
+    name = "render_to_pdf"
+
+    @classmethod
+    def is_available(cls):
+        return import_string(defaults.RENDERER).is_available()
+
+    def setup(self):
+        issuer = create_synthetic_issuer()
+        self.documents = ReplicatDocument.objects.bulk_create(
+            [
+                ReplicatDocument(issuer=issuer, context_query=get_synthetic_context_query(index))
+                for index in range(max(self.scale // 10, 1))
+            ]
+        )
+
+    def run(self):
+        for document in self.documents:
+            document.render_to_pdf()
+
+    def teardown(self):
+        for document in self.documents:
+            document.expire_files()
+
+
+def run_benchmark(cls, scale=100, rounds=5):
+    """Runs a single benchmark class and returns the timing statistics in seconds"""
+    timings = []
+
+    for _ in range(rounds):
+        with transaction.atomic():
+            instance = cls(scale)
+            instance.setup()
+            try:
+                start = time.perf_counter()
+                instance.run()
+                timings.append(time.perf_counter() - start)
+            finally:
+                instance.teardown()
+                transaction.set_rollback(True)
+
+    return {
+        "rounds": rounds,
+        "min": min(timings),
+        "max": max(timings),
+        "mean": statistics.mean(timings),
+        "median": statistics.median(timings),
+    }
+
+
+def run_benchmarks(names=None, scale=100, rounds=5):
+    """Runs the benchmark suite, or only the named benchmarks, and returns the results
+
+    Unless benchmarks are explicitly named, those which are not available in the current
+    environment are skipped.
+    """
+    install_synthetic_issuers(1)
+
+    if names is None:
+        names = [name for name, cls in BENCHMARKS.items() if cls.is_available()]
+
+    return {
+        "meta": {
+            "created_at": timezone.now().isoformat(),
+            "scale": scale,
+            "rounds": rounds,
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "replicat_documents": __version__,
+        },
+        "benchmarks": {name: run_benchmark(BENCHMARKS[name], scale=scale, rounds=rounds) for name in names},
+    }
+
+
+def save_results(results, path):
+    """Saves benchmark results as JSON"""
+    with open(path, "w") as results_file:
+        json.dump(results, results_file, indent=2)
+
+
+def load_results(path):
+    """Loads benchmark results previously saved as JSON"""
+    with open(path) as results_file:
+        return json.load(results_file)
+
+
+def compare_results(results, baseline, tolerance=0.2):
+    """Compares results against a baseline and returns a list of regressions
+
+    A benchmark has regressed when its median timing exceeds the baseline median by more
+    than `tolerance` (expressed as a fraction). Benchmarks missing from the baseline are
+    ignored. Each regression is a dictionary with the benchmark name, both medians and
+    their ratio.
+    """
+    regressions = []
+
+    for name, current in results["benchmarks"].items():
+        previous = baseline["benchmarks"].get(name)
+        if previous is None or not previous["median"]:
+            continue
+
+        ratio = current["median"] / previous["median"]
+        if ratio > 1 + tolerance:
+            regressions.append(
+                {"name": name, "baseline": previous["median"], "current": current["median"], "ratio": ratio}
+            )
+
+    return regressions
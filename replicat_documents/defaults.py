@@ -0,0 +1,167 @@
+"""Default settings for the replicat-documents application
+
+Each value can be overridden in the project settings using the same name prefixed by
+`REPLICAT_DOCUMENTS_`, e.g. `REPLICAT_DOCUMENTS_DOCUMENTS_ROOT`.
+"""
+
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+# Maximum number of documents in a merged PDF export, which is assembled in memory, unlike
+# ZIP exports which are streamed
+EXPORT_MERGED_PDF_MAX_DOCUMENTS = getattr(settings, "REPLICAT_DOCUMENTS_EXPORT_MERGED_PDF_MAX_DOCUMENTS", 200)
+
+# Directory where rendered documents are written
+DOCUMENTS_ROOT = Path(getattr(settings, "REPLICAT_DOCUMENTS_DOCUMENTS_ROOT", Path(settings.MEDIA_ROOT, "documents")))
+
+# Dotted path of the Django storage class rendered documents are written to, and the keyword
+# arguments used to initialize it. FileSystemStorage is located in DOCUMENTS_ROOT by default.
+DOCUMENTS_STORAGE = getattr(
+    settings, "REPLICAT_DOCUMENTS_DOCUMENTS_STORAGE", "django.core.files.storage.FileSystemStorage"
+)
+DOCUMENTS_STORAGE_OPTIONS = getattr(settings, "REPLICAT_DOCUMENTS_DOCUMENTS_STORAGE_OPTIONS", {})
+
+# Number of directory levels rendered documents are spread into, e.g. 2 for "ab/cd/<uuid>.pdf"
+DOCUMENTS_STORAGE_FANOUT = getattr(settings, "REPLICAT_DOCUMENTS_DOCUMENTS_STORAGE_FANOUT", 2)
+
+# Template directory (relative to the template engine directories) containing default issuer templates
+DOCUMENTS_TEMPLATE_ROOT = Path(
+    getattr(settings, "REPLICAT_DOCUMENTS_DOCUMENTS_TEMPLATE_ROOT", "replicat_documents/issuers")
+)
+
+# Return the existing document, instead of creating a duplicate, when a document is issued
+# again with the same issuer and context query
+IDEMPOTENT_ISSUANCE = getattr(settings, "REPLICAT_DOCUMENTS_IDEMPOTENT_ISSUANCE", False)
+
+# Record the context and context query replaced by each change of a document as a
+# DocumentContextVersion. Saving a versioned document locks its row.
+CONTEXT_HISTORY = getattr(settings, "REPLICAT_DOCUMENTS_CONTEXT_HISTORY", False)
+
+# Number of versions between two full snapshots of the context history, the other versions
+# being stored as JSON Patch deltas against the next version
+CONTEXT_VERSION_SNAPSHOT_INTERVAL = getattr(settings, "REPLICAT_DOCUMENTS_CONTEXT_VERSION_SNAPSHOT_INTERVAL", 10)
+
+# Extract the text of rendered documents into the full-text search index
+SEARCH_INDEX = getattr(settings, "REPLICAT_DOCUMENTS_SEARCH_INDEX", True)
+
+# Database aliases of the read replicas used by replicat_documents.routers.ReplicaRouter
+READ_REPLICAS = getattr(settings, "REPLICAT_DOCUMENTS_READ_REPLICAS", ())
+
+# Number of seconds reads stick to the primary database after a document is written
+READ_REPLICA_STICKY_SECONDS = getattr(settings, "REPLICAT_DOCUMENTS_READ_REPLICA_STICKY_SECONDS", 10)
+
+# Dotted path of the renderer backend laying out documents as PDF
+RENDERER = getattr(settings, "REPLICAT_DOCUMENTS_RENDERER", "replicat_documents.renderers.WeasyPrintRenderer")
+
+# Keyword arguments used to initialize the renderer backend, e.g. {"size": 4, "max_pages": 200}
+# for replicat_documents.renderers.BrowserPoolRenderer
+RENDERER_OPTIONS = getattr(settings, "REPLICAT_DOCUMENTS_RENDERER_OPTIONS", {})
+
+# Maximum total size in bytes of the static files (images, fonts, CSS) kept in memory by each
+# process while laying out documents, or 0 to read them from disk every time
+STATIC_FILE_CACHE_SIZE = getattr(settings, "REPLICAT_DOCUMENTS_STATIC_FILE_CACHE_SIZE", 32 * 1024 * 1024)
+
+# Maximum (width, height) in pixels of the PNG thumbnail renditions
+THUMBNAIL_SIZE = getattr(settings, "REPLICAT_DOCUMENTS_THUMBNAIL_SIZE", (320, 320))
+
+# Number of background threads rendering the new documents of issuers with the "eager" render policy
+EAGER_RENDER_WORKERS = getattr(settings, "REPLICAT_DOCUMENTS_EAGER_RENDER_WORKERS", 2)
+
+# Number of hours of document views taken into account to order issuers with the "predictive"
+# render policy when pre-rendering
+ACCESS_STATS_HOURS = getattr(settings, "REPLICAT_DOCUMENTS_ACCESS_STATS_HOURS", 24)
+
+# 1-minute load average per CPU above which pre-rendering stops, leaving the capacity to requests
+PRERENDER_MAX_LOAD = getattr(settings, "REPLICAT_DOCUMENTS_PRERENDER_MAX_LOAD", 0.75)
+
+# Linearize ("fast web view") rendered PDF documents with qpdf, so that viewers can show their
+# first page before downloading them fully with HTTP range requests
+LINEARIZE_PDF = getattr(settings, "REPLICAT_DOCUMENTS_LINEARIZE_PDF", False)
+
+# Maximum (width, height) in pixels and resolution in DPI of the cached PNG page previews
+PAGE_PREVIEW_SIZE = getattr(settings, "REPLICAT_DOCUMENTS_PAGE_PREVIEW_SIZE", (800, 800))
+PAGE_PREVIEW_RESOLUTION = getattr(settings, "REPLICAT_DOCUMENTS_PAGE_PREVIEW_RESOLUTION", 96)
+
+# Route document views to their async versions, for ASGI deployments
+ASYNC_VIEWS = getattr(settings, "REPLICAT_DOCUMENTS_ASYNC_VIEWS", False)
+
+# Number of seconds rendered HTML documents are cached for, or None to cache them forever
+HTML_CACHE_TIMEOUT = getattr(settings, "REPLICAT_DOCUMENTS_HTML_CACHE_TIMEOUT", 60 * 60 * 24)
+
+# Warm up the issuer registry and cache, issuer templates and renderer in a background thread
+# when the application is ready, so that the first requests of each worker do not pay for it
+WARM_UP = getattr(settings, "REPLICAT_DOCUMENTS_WARM_UP", False)
+
+# Maximum number of on-demand renders in progress or waiting in each process, or None for no
+# limit. Views refuse renders beyond it with a 503 response.
+RENDER_QUEUE_SIZE = getattr(settings, "REPLICAT_DOCUMENTS_RENDER_QUEUE_SIZE", None)
+
+# Maximum number of on-demand renders in progress or waiting for a single issuer in each
+# process, or None for no limit, and per issuer label overrides, e.g. {"Report": 2}. Views
+# refuse renders beyond it with a 429 response.
+RENDER_QUEUE_ISSUER_SIZE = getattr(settings, "REPLICAT_DOCUMENTS_RENDER_QUEUE_ISSUER_SIZE", None)
+RENDER_QUEUE_ISSUER_SIZES = getattr(settings, "REPLICAT_DOCUMENTS_RENDER_QUEUE_ISSUER_SIZES", {})
+
+# Maximum number of on-demand renders running at once in each process, or None for no limit.
+# Other admitted renders wait in the render queue.
+RENDER_CONCURRENCY = getattr(settings, "REPLICAT_DOCUMENTS_RENDER_CONCURRENCY", None)
+
+# Number of seconds clients are asked to wait before retrying a refused render
+RENDER_QUEUE_RETRY_AFTER = getattr(settings, "REPLICAT_DOCUMENTS_RENDER_QUEUE_RETRY_AFTER", 5)
+
+# Watch the issuers/documents directory of each application and reload issuers when their
+# modules change, without restarting the process
+WATCH_ISSUERS = getattr(settings, "REPLICAT_DOCUMENTS_WATCH_ISSUERS", False)
+
+# Number of seconds between two checks of the issuer modules when watchgod is not installed
+WATCH_ISSUERS_INTERVAL = getattr(settings, "REPLICAT_DOCUMENTS_WATCH_ISSUERS_INTERVAL", 2)
+
+# Expose render stage histograms in the Prometheus text format
+METRICS_ENABLED = getattr(settings, "REPLICAT_DOCUMENTS_METRICS_ENABLED", True)
+
+# Upper bounds (in seconds) of the render stage histogram buckets
+METRICS_BUCKETS = getattr(
+    settings,
+    "REPLICAT_DOCUMENTS_METRICS_BUCKETS",
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+# Record per-request SQL queries, cache lookups and wall time for document views
+PROFILING_ENABLED = getattr(settings, "REPLICAT_DOCUMENTS_PROFILING_ENABLED", False)
+
+# URL namespaces of the requests checked by the profiling middleware
+PROFILING_NAMESPACES = getattr(settings, "REPLICAT_DOCUMENTS_PROFILING_NAMESPACES", ("replicat_documents",))
+
+# Per-request limits. Supported keys are "queries", "query_time", "cache_misses" and "wall_time" (in seconds)
+REQUEST_BUDGET = getattr(
+    settings,
+    "REPLICAT_DOCUMENTS_REQUEST_BUDGET",
+    {"queries": 10, "query_time": 0.5, "wall_time": 2.0},
+)
+
+# Either "log" a warning or "raise" RequestBudgetExceeded when a request exceeds its budget
+REQUEST_BUDGET_ACTION = getattr(settings, "REPLICAT_DOCUMENTS_REQUEST_BUDGET_ACTION", "log")
+
+# Fraction (between 0 and 1) of the render jobs of each issuer, by label, which are profiled
+RENDER_PROFILING_RATES = getattr(settings, "REPLICAT_DOCUMENTS_RENDER_PROFILING_RATES", {})
+
+# Fraction of the render jobs profiled for issuers missing from RENDER_PROFILING_RATES
+RENDER_PROFILING_RATE = getattr(settings, "REPLICAT_DOCUMENTS_RENDER_PROFILING_RATE", 0)
+
+# Either the "sampling" profiler, writing collapsed stacks for flame graphs, or the
+# deterministic "cprofile" profiler, writing pstats files
+RENDER_PROFILER = getattr(settings, "REPLICAT_DOCUMENTS_RENDER_PROFILER", "sampling")
+
+# Number of seconds between two stack samples of the sampling profiler
+RENDER_PROFILING_INTERVAL = getattr(settings, "REPLICAT_DOCUMENTS_RENDER_PROFILING_INTERVAL", 0.005)
+
+# Local directory where render profiles are written
+RENDER_PROFILING_DIR = Path(
+    getattr(
+        settings,
+        "REPLICAT_DOCUMENTS_RENDER_PROFILING_DIR",
+        Path(tempfile.gettempdir(), "replicat_documents", "profiles"),
+    )
+)
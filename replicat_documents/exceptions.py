@@ -36,3 +36,53 @@ class DocumentIssuerMissingContextQuery(Exception):
     This exception is raised when the document issuer context query is missing
     to perform an action, e.g. to create a document.
     """
+
+
+class RequestBudgetExceeded(Exception):
+    """Request budget exceeded error.
+
+    This exception is raised when a profiled request exceeds its budget of SQL
+    queries, query time, cache misses or wall time.
+    """
+
+
+class RendererUnavailable(Exception):
+    """Renderer unavailable error.
+
+    This exception is raised when the renderer backend cannot lay out a
+    document in time, e.g. when all the browser sessions of a pool are busy.
+    """
+
+
+class UnsupportedRenditionFormat(Exception):
+    """Unsupported rendition format error.
+
+    This exception is raised when the renderer backend is asked for a
+    rendition format it cannot produce.
+    """
+
+
+class ExportTooLarge(Exception):
+    """Export too large error.
+
+    This exception is raised when more documents are selected than an export
+    format allows, e.g. for merged PDF exports which are assembled in memory.
+    """
+
+
+class RenderQueueFull(Exception):
+    """Render queue full error.
+
+    This exception is raised when an on-demand render is refused because the
+    render queue of the process already holds REPLICAT_DOCUMENTS_RENDER_QUEUE_SIZE
+    renders in progress or waiting.
+    """
+
+
+class IssuerRenderQueueFull(RenderQueueFull):
+    """Issuer render queue full error.
+
+    This exception is raised when an on-demand render is refused because the
+    render queue already holds as many renders of the document issuer as its
+    limit allows.
+    """
@@ -0,0 +1,155 @@
+"""Bulk export of rendered documents
+
+Documents are exported either as a ZIP archive of their PDF files or as a single merged
+PDF file. Output is produced as a stream of chunks while documents are read, and missing
+PDF renditions are rendered on the fly, through the render queue.
+"""
+
+import importlib.util
+import io
+import logging
+import re
+import zipfile
+
+from replicat_documents import defaults
+from replicat_documents.admission import render_queue
+from replicat_documents.exceptions import ExportTooLarge, RenderQueueFull
+from replicat_documents.models import ReplicatDocument
+from replicat_documents.renderers import PDF
+
+logger = logging.getLogger("replicat_documents")
+
+CHUNK_SIZE = 64 * 1024
+
+ZIP = "zip"
+MERGED_PDF = "pdf"
+
+CONTEXT_QUERY_PATH_RE = re.compile(r"^\w+(\.\w+)*$")
+
+
+class StreamBuffer(io.RawIOBase):
+    """Write-only, unseekable buffer whose content is drained as it is written"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        """Returns and forgets the chunks written since the previous call"""
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+
+def get_export_queryset(issuers=(), ids=(), context_query=None):
+    """Returns the documents to export, filtered by issuer labels, IDs and context query values
+
+    `context_query` is a dictionary mapping dotted paths, e.g. "course.name", to the exact
+    value the document context query should have at that path.
+    """
+    documents = ReplicatDocument.objects.select_related("issuer").filter(issuer__enabled=True)
+
+    if issuers:
+        documents = documents.filter(issuer__label__in=issuers)
+    if ids:
+        documents = documents.filter(pk__in=ids)
+    for path, value in (context_query or {}).items():
+        # Double underscores would let the path reach arbitrary lookups, e.g. "name__regex"
+        if not CONTEXT_QUERY_PATH_RE.match(path) or "__" in path:
+            raise ValueError(f"Invalid context query path: {path}")
+        documents = documents.filter(**{f"context_query__{path.replace('.', '__')}": value})
+
+    return documents.order_by("created_at", "pk")
+
+
+def iter_rendered_documents(documents):
+    """Yields each document whose PDF file exists, rendering it first if needed
+
+    Renders go through the render queue, like on-demand renders of the views. Documents
+    which cannot be rendered, or whose render is refused by a full queue, are skipped.
+    """
+    for document in documents.iterator(chunk_size=500):
+        if document.rendered_to_pdf_at is None or not document.rendition_exists(PDF):
+            try:
+                with render_queue.admit(document.issuer.label):
+                    rendered = document.render_to_pdf()
+            except RenderQueueFull as error:
+                logger.warning("Document %s is skipped from the export: %s", document.id, error)
+                continue
+            if not rendered:
+                logger.warning("Document %s could not be rendered and is skipped from the export", document.id)
+                continue
+        yield document
+
+
+def iter_zip(documents):
+    """Yields a ZIP archive of the PDF files of the documents, in chunks"""
+    buffer = StreamBuffer()
+
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        for document in iter_rendered_documents(documents):
+            with document.open_rendition(PDF) as document_file:
+                with archive.open(f"{document.id}.pdf", mode="w", force_zip64=True) as entry:
+                    for chunk in iter(lambda: document_file.read(CHUNK_SIZE), b""):
+                        entry.write(chunk)
+                        yield from buffer.drain()
+            yield from buffer.drain()
+
+    yield from buffer.drain()
+
+
+def iter_merged_pdf(documents):
+    """Yields a single PDF file merging the PDF files of the documents, in chunks
+
+    Merging requires the optional pypdf package. Unlike ZIP archives, the merged document
+    is assembled in memory before it is written, since the PDF cross-reference table
+    depends on every merged page, so iter_export limits the number of merged documents.
+    """
+    from pypdf import PdfWriter  # pylint: disable=import-outside-toplevel
+
+    writer = PdfWriter()
+    for document in iter_rendered_documents(documents):
+        with document.open_rendition(PDF) as document_file:
+            # pypdf reads objects lazily, so the document must stay readable until it is written
+            writer.append(io.BytesIO(document_file.read()))
+
+    buffer = StreamBuffer()
+    writer.write(buffer)
+    yield from buffer.drain()
+
+
+def is_export_format_available(export_format):
+    """Returns True if documents can be exported in the given format"""
+    if export_format == MERGED_PDF:
+        return importlib.util.find_spec("pypdf") is not None
+    return export_format == ZIP
+
+
+def iter_export(documents, export_format=ZIP):
+    """Returns an iterator over the export of the documents in the given format, in chunks
+
+    Raises ExportTooLarge when more than EXPORT_MERGED_PDF_MAX_DOCUMENTS documents would be merged.
+    """
+    if export_format == MERGED_PDF:
+        count = documents.count()
+        if count > defaults.EXPORT_MERGED_PDF_MAX_DOCUMENTS:
+            raise ExportTooLarge(
+                f"Merged PDF exports are limited to {defaults.EXPORT_MERGED_PDF_MAX_DOCUMENTS} documents "
+                f"and {count} were selected. Narrow the selection or export a ZIP archive instead."
+            )
+
+    if export_format == ZIP:
+        return iter_zip(documents)
+    if export_format == MERGED_PDF:
+        return iter_merged_pdf(documents)
+    raise ValueError(f"Unknown export format: {export_format}")
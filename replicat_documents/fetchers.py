@@ -0,0 +1,123 @@
+"""URL fetchers used while laying out documents"""
+
+import hashlib
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+
+from replicat_documents import defaults
+
+
+def get_static_file_path(url):
+    """Returns the local path of a `file://` URL or of a static file URL, or None"""
+    parsed_url = urlparse(url)
+
+    if parsed_url.scheme == "file":
+        return Path(unquote(parsed_url.path))
+
+    if settings.STATIC_URL and parsed_url.path.startswith(settings.STATIC_URL):
+        prefix_length = len(settings.STATIC_URL)
+        path = finders.find(unquote(parsed_url.path[prefix_length:]))
+        return Path(path) if path else None
+
+    return None
+
+
+class StaticFileCache:
+    """Thread-safe, size-bounded LRU cache of file contents keyed by path and modification time
+
+    Files larger than the cache are read from disk every time. Modified files are read again and
+    their previous contents are evicted once the cache is full.
+    """
+
+    def __init__(self, max_size=None):
+        self._max_size = max_size
+        self._files = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_size(self):
+        return defaults.STATIC_FILE_CACHE_SIZE if self._max_size is None else self._max_size
+
+    def read(self, path):
+        """Returns the contents of the file at `path`"""
+        stat = os.stat(path)
+        key = (str(path), stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            content = self._files.get(key)
+            if content is not None:
+                self._files.move_to_end(key)
+                self.hits += 1
+                return content
+            self.misses += 1
+
+        content = Path(path).read_bytes()
+        if len(content) > self.max_size:
+            return content
+
+        with self._lock:
+            if key not in self._files:
+                self._files[key] = content
+                self.size += len(content)
+            while self.size > self.max_size:
+                _, evicted = self._files.popitem(last=False)
+                self.size -= len(evicted)
+        return content
+
+    def clear(self):
+        with self._lock:
+            self._files.clear()
+            self.size = self.hits = self.misses = 0
+
+
+static_file_cache = StaticFileCache()
+
+
+def static_file_fetcher(url, *args, **kwargs):
+    """WeasyPrint URL fetcher reading local and static files through the static file cache
+
+    Other URLs are delegated to WeasyPrint's default URL fetcher.
+    """
+    path = get_static_file_path(url)
+
+    if path is None:
+        from weasyprint import default_url_fetcher  # pylint: disable=import-outside-toplevel
+
+        return default_url_fetcher(url, *args, **kwargs)
+
+    mime_type, encoding = mimetypes.guess_type(str(path))
+    return {
+        "string": static_file_cache.read(path),
+        "mime_type": mime_type,
+        "encoding": encoding,
+        "filename": path.name,
+    }
+
+
+_static_file_digests = {}
+
+
+def get_static_file_digest(path):
+    """Returns the SHA-256 hexadecimal digest of a static file, or None if it cannot be found
+
+    Digests are cached by path and modification time, so files are only read again once modified.
+    """
+    found_path = finders.find(str(path))
+    if found_path is None:
+        return None
+
+    key = (found_path, os.stat(found_path).st_mtime_ns)
+    digest = _static_file_digests.get(key)
+    if digest is None:
+        digest = _static_file_digests[key] = hashlib.sha256(Path(found_path).read_bytes()).hexdigest()
+    return digest
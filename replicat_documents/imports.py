@@ -0,0 +1,137 @@
+"""Streaming import of documents from CSV and JSON lines files
+
+Rows are read one at a time, validated against the issuer's context query model and
+created in batches, each batch being committed in its own transaction. Rejected rows are
+written to a side file with their validation errors, and an interrupted import can be
+resumed from the row following the last committed batch.
+"""
+
+import csv
+import itertools
+import json
+
+from django.db import transaction
+from pydantic.error_wrappers import ValidationError
+
+from replicat_documents import defaults
+from replicat_documents.models import ReplicatDocument, get_context_query_hash, unflatten_json
+from replicat_documents.policies import queue_eager_renders
+
+CSV = "csv"
+NDJSON = "ndjson"
+
+
+class MalformedRow(ValueError):
+    """Yielded in place of the payload of a row which cannot be read, so that it gets rejected"""
+
+    def __init__(self, message, payload):
+        super().__init__(message)
+        self.payload = payload
+
+
+def iter_csv_payloads(file, delimeter="."):
+    """Yields a context query dictionary per CSV row, nesting columns named like "course.name"
+
+    Empty cells are left out, so that optional fields get their default value. Raises ValueError
+    if the header has conflicting columns, such as "course" and "course.name". Rows with more
+    fields than the header are yielded as MalformedRow errors.
+    """
+    reader = csv.DictReader(file)
+    if reader.fieldnames:
+        try:
+            unflatten_json(dict.fromkeys(reader.fieldnames), delimeter)
+        except ValueError as error:
+            raise ValueError(f"Conflicting CSV columns: {error}") from error
+
+    for row in reader:
+        extra = row.pop(None, None)
+        if extra is not None:
+            yield MalformedRow(f"The row has {len(extra)} more field(s) than the header", {**row, "": extra})
+            continue
+        yield unflatten_json({column: value for column, value in row.items() if value not in ("", None)}, delimeter)
+
+
+def iter_ndjson_payloads(file):
+    """Yields a context query JSON string per line"""
+    yield from file
+
+
+def iter_payloads(file, import_format, delimeter="."):
+    if import_format == CSV:
+        return iter_csv_payloads(file, delimeter=delimeter)
+    if import_format == NDJSON:
+        return iter_ndjson_payloads(file)
+    raise ValueError(f"Unknown import format: {import_format}")
+
+
+def import_documents(issuer, payloads, batch_size=500, start_row=1, rejects=None):
+    """Creates a document per valid payload and yields a (row, created, rejected) tuple per committed batch
+
+    `row` is the number of the last row of the batch, rows being numbered from 1. Rows before
+    `start_row` are skipped. Invalid rows are written as JSON lines to the `rejects` file, if
+    any. With the IDEMPOTENT_ISSUANCE setting, rows whose document already exists are neither
+    created nor rejected. Documents of eager issuers are queued for rendering once their batch
+    is committed.
+    """
+    context_query_model = issuer.get_document_issuer().context_query_model
+    rows = itertools.islice(enumerate(payloads, start=1), start_row - 1, None)
+
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return
+
+        documents, rejected = [], 0
+        for row, payload in batch:
+            try:
+                if isinstance(payload, MalformedRow):
+                    raise payload
+                if isinstance(payload, str):
+                    context_query = context_query_model.parse_raw(payload)
+                else:
+                    context_query = context_query_model.parse_obj(payload)
+            except (ValidationError, ValueError) as error:
+                rejected += 1
+                if rejects is not None:
+                    if isinstance(error, ValidationError):
+                        errors = error.errors()
+                    else:
+                        errors = [{"msg": str(error), "type": "value_error"}]
+                    payload = getattr(error, "payload", payload)
+                    rejects.write(json.dumps({"row": row, "errors": errors, "payload": payload}, default=str))
+                    rejects.write("\n")
+                continue
+
+            context_query = json.loads(context_query.json())
+            documents.append(
+                ReplicatDocument(
+                    issuer=issuer,
+                    context_query=context_query,
+                    context_query_hash=get_context_query_hash(issuer, context_query),
+                )
+            )
+
+        if defaults.IDEMPOTENT_ISSUANCE:
+            issued = set(
+                ReplicatDocument.objects.filter(
+                    context_query_hash__in=[document.context_query_hash for document in documents]
+                ).values_list("context_query_hash", flat=True)
+            )
+            new_documents = []
+            for document in documents:
+                if document.context_query_hash not in issued:
+                    issued.add(document.context_query_hash)
+                    new_documents.append(document)
+            for document in new_documents:
+                document.issuance_key = document.context_query_hash
+            documents = new_documents
+
+        with transaction.atomic():
+            # Documents issued concurrently since the lookup above are skipped by their issuance key
+            ReplicatDocument.objects.bulk_create(documents, ignore_conflicts=defaults.IDEMPOTENT_ISSUANCE)
+            # bulk_create sends no post_save signal
+            queue_eager_renders(documents)
+
+        if rejects is not None:
+            rejects.flush()
+        yield batch[-1][0], len(documents), rejected
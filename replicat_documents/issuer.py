@@ -1,10 +1,12 @@
+import hashlib
 import uuid
 from abc import ABC, abstractmethod
+from pathlib import Path
 from typing import Union
 
-from django.conf import settings
 from django.template import Context
 from django.template.engine import Engine
+from django.template.loader_tags import ExtendsNode, IncludeNode
 from django.utils import timezone
 from django.utils.functional import cached_property
 from django.utils.text import re_camel_case
@@ -12,12 +14,18 @@ from django.utils.translation import gettext_lazy as _
 from pydantic import BaseModel
 from pydantic.error_wrappers import ValidationError
 
+from replicat_documents import defaults
 from replicat_documents.exceptions import (
     DocumentIssuerContextQueryValidationError,
     DocumentIssuerContextValidationError,
     DocumentIssuerMissingContext,
     DocumentIssuerMissingContextQuery,
 )
+from replicat_documents.fetchers import get_static_file_digest
+from replicat_documents.metrics import timed_stage
+from replicat_documents.renderers import PDF, get_renderer
+from replicat_documents.sampling import profile_render
+from replicat_documents.storage import get_documents_storage, get_rendition_name, save_rendition
 
 
 class AbstractDocumentIssuer(ABC):
@@ -33,194 +41,272 @@ class AbstractDocumentIssuer(ABC):
     context_model: BaseModel = None
     context_query_model: BaseModel = None
 
-    # def __init__(self, identifier: uuid.UUID = None, context_query: Union[str, dict] = None):
-
-    #     # Document
-    #     self.identifier = self.generate_identifier(identifier)
-    #     self.document_path = self.get_document_path()
-
-    #     # Data
-    #     self.context = None
-    #     self.context_query = self.validate_context_query(context_query) if context_query is not None else None
-
-    #     # Templates
-    #     self.css = None
-    #     self.html = None
-
-    #     super().__init__()
-
-    # @classmethod
-    # def validate_context(cls, context: Union[str, dict]) -> BaseModel:
-    #     """Use required context pydantic model to validate input context."""
-
-    #     if cls.context_model is None:
-    #         raise DocumentIssuerMissingContext(str(_("Context model is missing")))
-
-    #     try:
-    #         if isinstance(context, str):
-    #             context = cls.context_model.parse_raw(context)
-    #         elif isinstance(context, dict):
-    #             context = cls.context_model(**context)
-    #     except ValidationError as error:
-    #         raise DocumentIssuerContextValidationError(
-    #             _(f"Document issuer context string is not valid: {error}")
-    #         ) from error
-    #     return context
-
-    # @classmethod
-    # def validate_context_query(cls, context_query: Union[str, dict]) -> BaseModel:
-    #     """Use required context query pydantic model to validate input context query."""
-
-    #     if cls.context_query_model is None:
-    #         raise DocumentIssuerMissingContextQuery(str(_("Context query model is missing")))
-
-    #     try:
-    #         if isinstance(context_query, str):
-    #             context_query = cls.context_query_model.parse_raw(context_query)
-    #         if isinstance(context_query, dict):
-    #             context_query = cls.context_query_model(**context_query)
-    #     except ValidationError as error:
-    #         raise DocumentIssuerContextQueryValidationError(
-    #             _(f"Document issuer context query string is not valid: {error}")
-    #         ) from error
-    #     return context_query
-
-    # @cached_property
-    # def __default_template_basename(self):
-    #     """Get default template base name given its class name.
-    #     Example subsequent class name transformations:
-    #       DummyDocument
-    #         -> _Dummy_Document
-    #         -> Dummy_Document
-    #         -> dummy_document
-    #         -> dummy
-    #     """
-
-    #     return re_camel_case.sub(r"_\1", self.__class__.__name__).strip("_").lower().replace("_document", "")
-
-    # def __get_template(self, template_path):
-    #     """Get a template from its relative path.
-    #     This method always tries to return a template using the default
-    #     template engine if it is not set.
-    #     """
-    #     if self.template_engine is None:
-    #         template_engine = self.get_template_engine()
-    #     return template_engine.get_template(template_path)
-
-    # def generate_identifier(self, identifier=None):
-    #     """Generate the document identifier.
-    #     If the identifier has been set or is provided as an argument, it will
-    #     be returned, or else a new UUID is generated.
-    #     """
-
-    #     if hasattr(self, "identifier") and self.identifier is not None:
-    #         return self.identifier
-    #     if identifier is not None:
-    #         return str(identifier)
-    #     return str(uuid.uuid4())
-
-    # def get_document_path(self):
-    #     """Get (generated) document path.
-    #     Return default (or set) document path as a pathlib.Path object.
-    #     """
-
-    #     if hasattr(self, "document_path") and self.document_path is not None:
-    #         return self.document_path
-    #     return defaults.DOCUMENTS_ROOT.joinpath(f"{self.identifier}.pdf")
-
-    # def get_document_url(self, host=None, schema="https"):
-    #     """Get (generated) document URL.
-    #     If the host argument is provided a fully qualified URL will be
-    #     returned, or else, an absolute URL will be generated.
-    #     """
-    #     relative_path = self.get_document_path().relative_to(defaults.DOCUMENTS_ROOT)
-    #     relative_url = f"{settings.MEDIA_URL}{relative_path}"
-    #     if host is None:
-    #         return relative_url
-    #     return f"{schema}://{host}{relative_url}"
-
-    # def get_css(self):
-    #     """Get CSS template instance"""
-
-    #     if self.css is not None:
-    #         return self.css
-    #     return self.__get_template(self.get_css_template_path())
-
-    # def get_css_template_path(self):
-    #     """Get CSS template path.
-    #     Return default (or set) CSS template path as a pathlib.Path object.
-    #     """
-
-    #     if self.css_template_path is not None:
-    #         return self.css_template_path
-    #     return defaults.DOCUMENTS_TEMPLATE_ROOT.joinpath(f"{self.__default_template_basename}.css")
-
-    # def get_html(self):
-    #     """Get HTML template instance"""
-
-    #     if self.html is not None:
-    #         return self.html
-    #     return self.__get_template(self.get_html_template_path())
-
-    # def get_html_template_path(self):
-    #     """Get HTML template path.
-    #     Return default (or set) HTML template path as a pathlib.Path object.
-    #     """
-
-    #     if self.html_template_path is not None:
-    #         return self.html_template_path
-    #     return defaults.DOCUMENTS_TEMPLATE_ROOT.joinpath(f"{self.__default_template_basename}.html")
-
-    # def get_template_engine(self):
-    #     """Get template engine.
-    #     Return default (or set) template engine.
-    #     """
-    #     if self.template_engine is not None:
-    #         return self.template_engine
-    #     return Engine.get_default()
-
-    # @abstractmethod
-    # def fetch_context(self) -> dict:
-    #     """Fetch document context given context query parameters.
-    #     This method should be implemented while using this interface for a
-    #     custom document class.
-    #     Note that it is highly recommended to validate the context_query using
-    #     the validate_context_query method in your implementation to ensure data
-    #     consistency.
-    #     Returns fetched context as a dictionnary.
-    #     """
-
-    # def set_context(self, context: dict):
-    #     """Validate and set context passed as a dictionary instance"""
-    #     self.context = self.validate_context(context)
-
-    # def get_django_context(self) -> Context:
-    #     """Get the Django Context instance from the context model instance."""
-    #     return Context(self.context.dict())
-
-    # def create(self):
-    #     """Create document.
-    #     Given an HTML template, a CSS template and the required context to
-    #     compile them, we render the document HTML that will be used by
-    #     Chrome's headless web browser to generate the document as a PDF
-    #     file.
-    #     The path of the document is returned as a pathlib.Path instance.
-    #     """
-
-    #     if self.context is None:
-    #         self.set_context(self.fetch_context())
-
-    #     document_path = self.get_document_path()
-    #     django_context = self.get_django_context()
-    #     html_str = self.get_html().render(django_context)
-    #     css_str = self.get_css().render(django_context)
-
-    #     font_config = FontConfiguration()
-    #     html = HTML(string=html_str, url_fetcher=static_file_fetcher)
-    #     css = CSS(string=css_str, font_config=font_config)
-
-    #     document = html.render(stylesheets=[css], font_config=font_config)
-    #     document.metadata = self.metadata
-    #     document.write_pdf(target=document_path, zoom=1)
-
-    #     return document_path
+    # Templates
+    css_template_path = None
+    html_template_path = None
+    template_engine = None
+
+    # Paths of the static files used by the templates, tracked by the templates fingerprint.
+    # Templates extended or included with a literal name are tracked automatically, while
+    # those whose name is a variable are not.
+    static_assets = ()
+
+    def __init__(self, identifier: uuid.UUID = None, context_query: Union[str, dict] = None):
+
+        # Document
+        self.identifier = self.generate_identifier(identifier)
+        self.document_path = None
+        self.rendered_html = None
+
+        # Data
+        self.created = timezone.now().isoformat()
+        self.metadata = {}
+        self.context = None
+        self.context_query = self.validate_context_query(context_query) if context_query is not None else None
+
+        # Templates
+        self.css = None
+        self.html = None
+
+        super().__init__()
+
+    @classmethod
+    def validate_context(cls, context: Union[str, dict]) -> BaseModel:
+        """Use required context pydantic model to validate input context."""
+
+        if cls.context_model is None:
+            raise DocumentIssuerMissingContext(str(_("Context model is missing")))
+
+        try:
+            if isinstance(context, str):
+                context = cls.context_model.parse_raw(context)
+            elif isinstance(context, dict):
+                context = cls.context_model(**context)
+        except ValidationError as error:
+            raise DocumentIssuerContextValidationError(
+                _(f"Document issuer context string is not valid: {error}")
+            ) from error
+        return context
+
+    @classmethod
+    def validate_context_query(cls, context_query: Union[str, dict]) -> BaseModel:
+        """Use required context query pydantic model to validate input context query."""
+
+        if cls.context_query_model is None:
+            raise DocumentIssuerMissingContextQuery(str(_("Context query model is missing")))
+
+        try:
+            if isinstance(context_query, str):
+                context_query = cls.context_query_model.parse_raw(context_query)
+            if isinstance(context_query, dict):
+                context_query = cls.context_query_model(**context_query)
+        except ValidationError as error:
+            raise DocumentIssuerContextQueryValidationError(
+                _(f"Document issuer context query string is not valid: {error}")
+            ) from error
+        return context_query
+
+    @cached_property
+    def __default_template_basename(self):
+        """Get default template base name given its class name.
+        Example subsequent class name transformations:
+          DummyDocument
+            -> _Dummy_Document
+            -> Dummy_Document
+            -> dummy_document
+            -> dummy
+        """
+
+        return re_camel_case.sub(r"_\1", self.__class__.__name__).strip("_").lower().replace("_document", "")
+
+    def __get_template(self, template_path):
+        """Get a template from its relative path.
+        This method always tries to return a template using the default
+        template engine if it is not set.
+        """
+        return self.get_template_engine().get_template(str(template_path))
+
+    def generate_identifier(self, identifier=None):
+        """Generate the document identifier.
+        If the identifier has been set or is provided as an argument, it will
+        be returned, or else a new UUID is generated.
+        """
+
+        if hasattr(self, "identifier") and self.identifier is not None:
+            return self.identifier
+        if identifier is not None:
+            return str(identifier)
+        return str(uuid.uuid4())
+
+    def get_document_path(self):
+        """Get (generated) document path.
+        Return default (or set) document path as a pathlib.Path object.
+        Only storages with local files, such as FileSystemStorage, provide
+        paths.
+        """
+
+        if hasattr(self, "document_path") and self.document_path is not None:
+            return self.document_path
+        return self.get_rendition_path(PDF)
+
+    def get_document_url(self, host=None, schema="https"):
+        """Get (generated) document URL.
+        If the host argument is provided and the storage returns relative
+        URLs, a fully qualified URL will be returned, or else, the storage
+        URL will be returned.
+        """
+        url = get_documents_storage().url(self.get_rendition_name(PDF))
+        if host is None or "://" in url:
+            return url
+        return f"{schema}://{host}{url}"
+
+    def get_css(self):
+        """Get CSS template instance"""
+
+        if self.css is not None:
+            return self.css
+        return self.__get_template(self.get_css_template_path())
+
+    def get_css_template_path(self):
+        """Get CSS template path.
+        Return default (or set) CSS template path as a pathlib.Path object.
+        """
+
+        if self.css_template_path is not None:
+            return self.css_template_path
+        return defaults.DOCUMENTS_TEMPLATE_ROOT.joinpath(f"{self.__default_template_basename}.css")
+
+    def get_html(self):
+        """Get HTML template instance"""
+
+        if self.html is not None:
+            return self.html
+        return self.__get_template(self.get_html_template_path())
+
+    def get_html_template_path(self):
+        """Get HTML template path.
+        Return default (or set) HTML template path as a pathlib.Path object.
+        """
+
+        if self.html_template_path is not None:
+            return self.html_template_path
+        return defaults.DOCUMENTS_TEMPLATE_ROOT.joinpath(f"{self.__default_template_basename}.html")
+
+    def get_template_sources(self, template, seen=None):
+        """Get template sources.
+        Return the list of sources of a template and of the templates it
+        extends or includes, recursively. Only templates referenced by a
+        literal name, e.g. {% include "footer.html" %}, can be found.
+        """
+        seen = set() if seen is None else seen
+        sources = [template.source]
+        names = [node.parent_name.var for node in template.nodelist.get_nodes_by_type(ExtendsNode)]
+        names += [node.template.var for node in template.nodelist.get_nodes_by_type(IncludeNode)]
+        for name in names:
+            if isinstance(name, str) and name not in seen:
+                seen.add(name)
+                sources += self.get_template_sources(self.get_template_engine().get_template(name), seen)
+        return sources
+
+    def get_template_fingerprint(self):
+        """Get templates fingerprint.
+        Return the SHA-256 hexadecimal digest of the HTML and CSS template
+        sources, of the templates they extend or include, and of the static
+        assets, which changes whenever one of them is modified.
+        """
+        digest = hashlib.sha256()
+        for template in (self.get_html(), self.get_css()):
+            for source in self.get_template_sources(template):
+                digest.update(source.encode())
+                digest.update(b"\0")
+        for static_asset in self.static_assets:
+            digest.update(f"{static_asset}:{get_static_file_digest(static_asset)}".encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get_template_engine(self):
+        """Get template engine.
+        Return default (or set) template engine.
+        """
+        if self.template_engine is not None:
+            return self.template_engine
+        return Engine.get_default()
+
+    @abstractmethod
+    def fetch_context(self) -> dict:
+        """Fetch document context given context query parameters.
+        This method should be implemented while using this interface for a
+        custom document class.
+        Note that it is highly recommended to validate the context_query using
+        the validate_context_query method in your implementation to ensure data
+        consistency.
+        Returns fetched context as a dictionnary.
+        """
+
+    def set_context(self, context: dict):
+        """Validate and set context passed as a dictionary instance"""
+        self.context = self.validate_context(context)
+
+    def get_django_context(self) -> Context:
+        """Get the Django Context instance from the context model instance."""
+        return Context(self.context.dict())
+
+    def render_templates(self):
+        """Render the HTML and CSS templates.
+        The context is fetched and validated first if it has not been set.
+        Returns an (html, css) tuple of strings.
+        """
+
+        if self.context is None:
+            with timed_stage("fetch_context", self.label, self.identifier):
+                context = self.fetch_context()
+            with timed_stage("validate_context", self.label, self.identifier):
+                self.set_context(context)
+
+        with timed_stage("render_template", self.label, self.identifier):
+            django_context = self.get_django_context()
+            return self.get_html().render(django_context), self.get_css().render(django_context)
+
+    def get_rendition_name(self, rendition_format):
+        """Get (generated) rendition storage name.
+        Return the name of the rendition in the documents storage, spread
+        across hashed directories, e.g. "3f/a2/<identifier>.pdf".
+        """
+
+        return get_rendition_name(self.identifier, rendition_format)
+
+    def get_rendition_path(self, rendition_format):
+        """Get (generated) rendition path.
+        Return the local path of the rendition in the documents storage as
+        a pathlib.Path object. Storages without local files, such as object
+        stores, raise NotImplementedError.
+        """
+
+        return Path(get_documents_storage().path(self.get_rendition_name(rendition_format)))
+
+    def create(self, formats=(PDF,)):
+        """Create document.
+        Given an HTML template, a CSS template and the required context to
+        compile them, we render the document HTML that will be laid out by
+        the configured renderer backend and written in each of the requested
+        formats, using a single layout pass.
+        Each stage of the pipeline is timed and reported with the
+        `render_stage_finished` signal, and a sample of the jobs of each
+        issuer is profiled, see `replicat_documents.sampling`.
+        The storage names of the renditions are returned as a {format: name}
+        dictionary.
+        """
+
+        with profile_render(self.label, self.identifier), timed_stage("total", self.label, self.identifier):
+            html_str, css_str = self.render_templates()
+            self.rendered_html = html_str
+
+            with timed_stage("layout", self.label, self.identifier):
+                renditions = get_renderer().render(html_str, css_str, formats=formats, metadata=self.metadata)
+
+            with timed_stage("write", self.label, self.identifier):
+                names = {}
+                for rendition_format, content in renditions.items():
+                    names[rendition_format] = save_rendition(self.get_rendition_name(rendition_format), content)
+
+        return names
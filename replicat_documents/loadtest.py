@@ -0,0 +1,263 @@
+"""Local load-testing harness for the replicat-documents pipeline
+
+Synthetic issuers, like those of the benchmark suite, issue documents which are then
+rendered and viewed from concurrent threads, one operation after the other:
+
+- "issue" creates documents with `ReplicatDocument.objects.issue`,
+- "render" renders each issued document to PDF,
+- "view_html" and "view_pdf" request the document views through the Django test client.
+
+Unlike benchmarks, load tests commit their data so that every thread sees it. Synthetic
+documents and issuers are deleted at the end, but load tests should still be run against
+a disposable database. Everything runs offline, on the local machine.
+
+Synthetic issuers only exist in the process running the load test, so a separate server
+cannot load them. Servers are load tested by `run_server_load_test` instead, which requests
+the views of existing documents of issuers installed on the server.
+"""
+
+import itertools
+import math
+import platform
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+
+import django
+from django.db import connection, connections
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from replicat_documents import __version__
+from replicat_documents.benchmarks import (
+    SYNTHETIC_APP_NAME,
+    get_synthetic_context_query,
+    get_synthetic_issuer_module_name,
+    install_synthetic_issuers,
+)
+from replicat_documents.models import DocumentIssuerChoice, ReplicatDocument
+
+ISSUE = "issue"
+RENDER = "render"
+VIEW_HTML = "view_html"
+VIEW_PDF = "view_pdf"
+
+OPERATIONS = (ISSUE, RENDER, VIEW_HTML, VIEW_PDF)
+
+VIEW_OPERATIONS = (VIEW_HTML, VIEW_PDF)
+
+VIEW_URL_NAMES = {VIEW_HTML: "replicat_documents:document_view_html", VIEW_PDF: "replicat_documents:document_view_pdf"}
+
+
+class RequestFailed(Exception):
+    """A view request was answered with an error status"""
+
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+def percentile(values, fraction):
+    """Returns the nearest-rank percentile of a sorted list of values, or None if it is empty"""
+    if not values:
+        return None
+    return values[max(math.ceil(fraction * len(values)) - 1, 0)]
+
+
+def run_concurrently(tasks, concurrency):
+    """Runs the `tasks` callables from `concurrency` threads and returns their statistics
+
+    Latencies of the successful tasks and the errors of the others, by type or HTTP status,
+    are returned with the elapsed time and throughput of the whole run.
+    """
+    tasks = iter(tasks)
+    lock = threading.Lock()
+    latencies, errors = [], Counter()
+
+    def work():
+        try:
+            while True:
+                with lock:
+                    task = next(tasks, None)
+                if task is None:
+                    return
+
+                start = time.perf_counter()
+                try:
+                    task()
+                except Exception as error:  # pylint: disable=broad-except
+                    with lock:
+                        errors[str(error) if isinstance(error, RequestFailed) else type(error).__name__] += 1
+                else:
+                    with lock:
+                        latencies.append(time.perf_counter() - start)
+        finally:
+            connections.close_all()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=work, name=f"replicat-documents-load-{index}") for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "count": len(latencies),
+        "errors": dict(errors),
+        "elapsed": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed else None,
+        "p50": percentile(latencies, 0.5),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "max": latencies[-1] if latencies else None,
+    }
+
+
+def install_load_test_issuers(count):
+    """Makes `count` synthetic issuers importable and returns their enabled DocumentIssuerChoice instances
+
+    Unlike `register_issuer_objects`, other issuers are left untouched.
+    """
+    install_synthetic_issuers(count)
+    return [
+        DocumentIssuerChoice.objects.update_or_create(
+            app_name=SYNTHETIC_APP_NAME,
+            issuer_module_name=get_synthetic_issuer_module_name(index),
+            defaults={"label": f"Synthetic {index}", "enabled": True},
+        )[0]
+        for index in range(count)
+    ]
+
+
+def delete_load_test_data():
+    """Deletes the synthetic documents, their files and the synthetic issuers"""
+    documents = ReplicatDocument.objects.filter(issuer__app_name=SYNTHETIC_APP_NAME)
+    for document in documents.iterator():
+        document.expire_files()
+    documents.delete()
+    DocumentIssuerChoice.objects.filter(app_name=SYNTHETIC_APP_NAME).delete()
+
+
+def get_view_task(document_id, operation, base_url=None, host="localhost"):
+    """Returns a callable requesting a document view, through the test client or a running server"""
+    path = reverse(VIEW_URL_NAMES[operation], kwargs={"id": document_id})
+
+    if base_url:
+
+        def request():
+            try:
+                with urllib.request.urlopen(base_url.rstrip("/") + path) as response:
+                    response.read()
+            except urllib.error.HTTPError as error:
+                raise RequestFailed(error.code) from error
+
+        return request
+
+    def request():
+        response = Client(HTTP_HOST=host).get(path)
+        if response.streaming:
+            b"".join(response.streaming_content)
+        response.close()
+        if response.status_code >= 400:
+            raise RequestFailed(response.status_code)
+
+    return request
+
+
+def run_views(document_ids, requests, concurrency, operations, base_url=None, host="localhost"):
+    """Sends `requests` requests to each view of the given operations, cycling through the documents"""
+    results = {}
+    for operation in (VIEW_HTML, VIEW_PDF):
+        if operation in operations and document_ids:
+            views = itertools.islice(itertools.cycle(document_ids), requests)
+            results[operation] = run_concurrently(
+                (get_view_task(document_id, operation, base_url, host) for document_id in views), concurrency
+            )
+    return results
+
+
+def get_meta(**options):
+    """Returns the description of a load test run, with its options"""
+    return {
+        "created_at": timezone.now().isoformat(),
+        **options,
+        "database": connection.vendor,
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "replicat_documents": __version__,
+    }
+
+
+def run_load_test(issuers=2, documents=100, requests=100, concurrency=4, operations=OPERATIONS, host="localhost"):
+    """Runs the load test with synthetic issuers and returns its results
+
+    `documents` documents are issued and rendered, cycling through `issuers` synthetic issuers,
+    then `requests` requests are sent to each view through the test client, cycling through the
+    documents. Results are plain dictionaries, with per-operation latencies in seconds and
+    throughputs in operations per second.
+    """
+    issuer_choices = install_load_test_issuers(issuers)
+    issued = []
+    results = {}
+
+    def issue(index):
+        document, _ = ReplicatDocument.objects.issue(
+            issuer_choices[index % len(issuer_choices)], get_synthetic_context_query(index)
+        )
+        issued.append(document)
+
+    try:
+        if ISSUE in operations:
+            results[ISSUE] = run_concurrently(
+                (lambda index=index: issue(index) for index in range(documents)), concurrency
+            )
+        else:
+            for index in range(documents):
+                issue(index)
+
+        if RENDER in operations:
+            results[RENDER] = run_concurrently((document.render_to_pdf for document in issued), concurrency)
+
+        document_ids = [document.pk for document in issued]
+        results.update(run_views(document_ids, requests, concurrency, operations, host=host))
+    finally:
+        delete_load_test_data()
+
+    meta = get_meta(
+        issuers=issuers, documents=documents, requests=requests, concurrency=concurrency, target="test client"
+    )
+    return {"meta": meta, "operations": results}
+
+
+def run_server_load_test(base_url, issuers, documents=100, requests=100, concurrency=4, operations=VIEW_OPERATIONS):
+    """Load tests the views of a running server and returns the results, like `run_load_test`
+
+    The views of the `documents` newest documents of the `issuers`, by label, are requested.
+    The server shares the database of the current process and has these issuers installed.
+    Raises ValueError if an issuer is not enabled or if there are no documents to view.
+    """
+    if set(operations) - set(VIEW_OPERATIONS):
+        raise ValueError("Only the views of a server can be load tested")
+
+    enabled = set(DocumentIssuerChoice.objects.enabled().filter(label__in=issuers).values_list("label", flat=True))
+    missing = sorted(set(issuers) - enabled)
+    if missing:
+        raise ValueError(f"Unknown or disabled issuer(s): {', '.join(missing)}")
+
+    document_ids = list(
+        ReplicatDocument.objects.filter(issuer__label__in=issuers)
+        .order_by("-created_at")
+        .values_list("pk", flat=True)[:documents]
+    )
+    if not document_ids:
+        raise ValueError(f"There are no documents of the {', '.join(issuers)} issuer(s) to view")
+
+    meta = get_meta(
+        issuers=list(issuers), documents=len(document_ids), requests=requests, concurrency=concurrency, target=base_url
+    )
+    return {"meta": meta, "operations": run_views(document_ids, requests, concurrency, operations, base_url=base_url)}
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from replicat_documents.exceptions import DocumentIssuerContextQueryValidationError, DocumentIssuerMissingContextQuery
+from replicat_documents.models import ReplicatDocument, get_context_query_hash
+
+
+class Command(BaseCommand):
+    help = (
+        "Computes the context query hash of the documents created before it was recorded, so that idempotent "
+        "issuance finds them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Number of documents updated per query")
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only count the documents without a hash, without updating them"
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("The batch size should be positive")
+
+        documents = ReplicatDocument.objects.filter(context_query_hash="", issuer__isnull=False)
+        if options["dry_run"]:
+            self.stdout.write(f"{documents.count()} document(s) without a context query hash")
+            return
+
+        updated = failed = 0
+        batch = []
+        for document in documents.select_related("issuer").only("issuer", "context_query").iterator():
+            try:
+                document.context_query_hash = get_context_query_hash(document.issuer, document.context_query)
+            except (DocumentIssuerContextQueryValidationError, DocumentIssuerMissingContextQuery):
+                failed += 1
+                self.stderr.write(f"Could not hash the context query of {document.id}")
+                continue
+            batch.append(document)
+            if len(batch) == options["batch_size"]:
+                ReplicatDocument.objects.bulk_update(batch, ["context_query_hash"])
+                updated += len(batch)
+                batch = []
+        if batch:
+            ReplicatDocument.objects.bulk_update(batch, ["context_query_hash"])
+            updated += len(batch)
+
+        self.stdout.write(f"Hashed the context query of {updated} document(s), {failed} failure(s)")
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from replicat_documents.benchmarks import BENCHMARKS, compare_results, load_results, run_benchmarks, save_results
+
+
+class Command(BaseCommand):
+    help = "Runs the document pipeline benchmark suite, optionally comparing results against a saved baseline"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--benchmark",
+            action="append",
+            dest="benchmarks",
+            choices=sorted(BENCHMARKS),
+            help="Name of a benchmark to run. Can be repeated. Defaults to all benchmarks.",
+        )
+        parser.add_argument("--scale", type=int, default=100, help="Number of objects used by each benchmark")
+        parser.add_argument("--rounds", type=int, default=5, help="Number of timed rounds for each benchmark")
+        parser.add_argument("--output", help="Path of the JSON file the results are written to")
+        parser.add_argument("--baseline", help="Path of a JSON results file to compare against")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help="Allowed slowdown against the baseline median, as a fraction (default: 0.2)",
+        )
+
+    def handle(self, *args, **options):
+        results = run_benchmarks(names=options["benchmarks"], scale=options["scale"], rounds=options["rounds"])
+
+        for name, result in results["benchmarks"].items():
+            self.stdout.write(
+                f"{name:<35} median {result['median'] * 1000:10.3f} ms    "
+                f"min {result['min'] * 1000:10.3f} ms    max {result['max'] * 1000:10.3f} ms"
+            )
+
+        if options["output"]:
+            save_results(results, options["output"])
+            self.stdout.write(f"Results saved to {options['output']}")
+
+        if options["baseline"]:
+            regressions = compare_results(results, load_results(options["baseline"]), options["tolerance"])
+            for regression in regressions:
+                self.stderr.write(
+                    f"{regression['name']} regressed: {regression['baseline'] * 1000:.3f} ms -> "
+                    f"{regression['current'] * 1000:.3f} ms ({regression['ratio']:.2f}x)"
+                )
+            if regressions:
+                raise CommandError(f"{len(regressions)} benchmark(s) regressed against {options['baseline']}")
+            self.stdout.write(self.style.SUCCESS("No regression against the baseline"))
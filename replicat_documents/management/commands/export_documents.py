@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from replicat_documents.exceptions import ExportTooLarge
+from replicat_documents.exports import MERGED_PDF, ZIP, get_export_queryset, is_export_format_available, iter_export
+
+
+class Command(BaseCommand):
+    help = (
+        "Exports the PDF files of many documents as a ZIP archive or as a single merged PDF, "
+        "rendering them if needed"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Path of the exported file")
+        parser.add_argument("--format", dest="export_format", choices=[ZIP, MERGED_PDF], default=ZIP)
+        parser.add_argument(
+            "--issuer", action="append", dest="issuers", default=[], help="Issuer label. Can be repeated."
+        )
+        parser.add_argument("--id", action="append", dest="ids", default=[], help="Document ID. Can be repeated.")
+        parser.add_argument(
+            "--context-query",
+            action="append",
+            default=[],
+            metavar="PATH=VALUE",
+            help="Exact context query value, e.g. course.name='Super Course'. Can be repeated.",
+        )
+
+    def handle(self, *args, **options):
+        if not is_export_format_available(options["export_format"]):
+            raise CommandError(f"The {options['export_format']} export format requires the pypdf package")
+
+        context_query = {}
+        for item in options["context_query"]:
+            path, separator, value = item.partition("=")
+            if not separator:
+                raise CommandError(f"Invalid context query value, expected PATH=VALUE: {item}")
+            context_query[path] = value
+
+        try:
+            documents = get_export_queryset(
+                issuers=options["issuers"], ids=options["ids"], context_query=context_query
+            )
+        except ValueError as error:
+            raise CommandError(error) from error
+
+        try:
+            chunks = iter_export(documents, options["export_format"])
+        except ExportTooLarge as error:
+            raise CommandError(error) from error
+
+        with open(options["output"], "wb") as output:
+            for chunk in chunks:
+                output.write(chunk)
+
+        self.stdout.write(f"Exported documents to {options['output']}")
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from replicat_documents.models import DocumentRendition, ReplicatDocument
+from replicat_documents.renderers import PDF
+
+
+class Command(BaseCommand):
+    help = "Renders documents in the given formats, even if they have already been rendered"
+
+    def add_arguments(self, parser):
+        parser.add_argument("ids", nargs="+", help="IDs of the documents to render")
+        parser.add_argument(
+            "--format",
+            action="append",
+            dest="formats",
+            choices=[choice for choice, _ in DocumentRendition.FORMAT_CHOICES],
+            help="Rendition format. Can be repeated to render several formats in a single pass. Defaults to pdf.",
+        )
+
+    def handle(self, *args, **options):
+        formats = options["formats"] or [PDF]
+
+        for document_id in options["ids"]:
+            try:
+                document = ReplicatDocument.objects.select_related("issuer").get(pk=document_id)
+            except (ReplicatDocument.DoesNotExist, ValueError) as error:
+                raise CommandError(f"Document {document_id} does not exist") from error
+
+            if document.render(formats=formats):
+                self.stdout.write(f"Rendered {document_id} as {', '.join(formats)}")
+            else:
+                self.stderr.write(f"Could not render {document_id}")
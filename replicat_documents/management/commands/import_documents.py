@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from replicat_documents.imports import CSV, NDJSON, import_documents, iter_payloads
+from replicat_documents.models import DocumentIssuerChoice
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates documents from the rows of a CSV or JSON lines file, mapping each row to the issuer's "
+        "context query model and committing them in batches"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("issuer", help="Label of the issuer of the documents")
+        parser.add_argument("path", help="Path of the CSV or JSON lines file")
+        parser.add_argument(
+            "--format",
+            choices=[CSV, NDJSON],
+            help="Input file format. Defaults to csv for .csv files and to ndjson otherwise.",
+        )
+        parser.add_argument(
+            "--delimeter",
+            default=".",
+            help='Delimeter splitting CSV column names into context query paths, e.g. "course.name"',
+        )
+        parser.add_argument("--batch-size", type=int, default=500, help="Number of rows committed in each transaction")
+        parser.add_argument(
+            "--start-row",
+            type=int,
+            default=1,
+            help="Number of the first row to import, to resume an interrupted import. Rows are numbered from 1.",
+        )
+        parser.add_argument(
+            "--rejects",
+            help="Path of the JSON lines file rejected rows are appended to. Defaults to <path>.rejects.jsonl.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            issuer = DocumentIssuerChoice.objects.get(label=options["issuer"])
+        except DocumentIssuerChoice.DoesNotExist as error:
+            raise CommandError(f"Issuer {options['issuer']} does not exist") from error
+        if not issuer.writable():
+            raise CommandError(f"Issuer {issuer} does not allow creating documents")
+        if options["batch_size"] < 1 or options["start_row"] < 1:
+            raise CommandError("The batch size and the start row should be positive")
+
+        import_format = options["format"] or (CSV if options["path"].lower().endswith(".csv") else NDJSON)
+        rejects_path = options["rejects"] or f"{options['path']}.rejects.jsonl"
+
+        created = rejected = 0
+        with open(options["path"], encoding="utf-8", newline="") as file, open(
+            rejects_path, "a", encoding="utf-8"
+        ) as rejects:
+            payloads = iter_payloads(file, import_format, delimeter=options["delimeter"])
+            try:
+                for row, batch_created, batch_rejected in import_documents(
+                    issuer, payloads, batch_size=options["batch_size"], start_row=options["start_row"], rejects=rejects
+                ):
+                    created += batch_created
+                    rejected += batch_rejected
+                    self.stdout.write(f"Committed rows up to {row}, resume with --start-row {row + 1}")
+            except ValueError as error:
+                # Rows are rejected one by one, so this is an unreadable file, e.g. with conflicting CSV columns
+                raise CommandError(str(error)) from error
+
+        self.stdout.write(f"Created {created} document(s), rejected {rejected} row(s) to {rejects_path}")
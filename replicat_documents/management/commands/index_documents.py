@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+
+from replicat_documents.exceptions import DocumentIssuerContextValidationError, DocumentIssuerMissingContext
+from replicat_documents.models import ReplicatDocument
+from replicat_documents.search import index_document
+
+
+class Command(BaseCommand):
+    help = (
+        "Extracts the text of rendered documents into the full-text search index, such as documents rendered "
+        "before the index existed, by rendering their templates again without laying them out"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--issuer",
+            action="append",
+            dest="issuers",
+            help="Label of an issuer whose documents should be indexed. Can be repeated. Defaults to all issuers.",
+        )
+        parser.add_argument(
+            "--all", action="store_true", help="Also index again the documents which are already in the index"
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Only count the documents to index")
+
+    def handle(self, *args, **options):
+        documents = ReplicatDocument.objects.select_related("issuer").filter(issuer__enabled=True).rendered()
+        if options["issuers"]:
+            documents = documents.filter(issuer__label__in=options["issuers"])
+        if not options["all"]:
+            documents = documents.filter(search_text__isnull=True)
+
+        if options["dry_run"]:
+            self.stdout.write(f"{documents.count()} document(s) to index")
+            return
+
+        indexed = failed = 0
+        for document in documents.iterator():
+            document_issuer = document.get_document_issuer()
+            try:
+                if document.context is not None:
+                    document_issuer.set_context(document.context)
+                html, _ = document_issuer.render_templates()
+            except (DocumentIssuerContextValidationError, DocumentIssuerMissingContext):
+                failed += 1
+                self.stderr.write(f"Could not render {document.id}")
+                continue
+            index_document(document, html)
+            indexed += 1
+
+        self.stdout.write(f"Indexed {indexed} document(s), {failed} failure(s)")
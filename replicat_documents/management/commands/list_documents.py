@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from replicat_documents.models import ReplicatDocument
+
+
+class Command(BaseCommand):
+    help = "Lists documents with their issuer and dates, most recent first"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--issuer",
+            action="append",
+            dest="issuers",
+            help="Label of an issuer whose documents should be listed. Can be repeated. Defaults to all issuers.",
+        )
+        parser.add_argument("--limit", type=int, default=100, help="Maximum number of documents to list")
+
+    def handle(self, *args, **options):
+        documents = ReplicatDocument.objects.order_by("-created_at")
+        if options["issuers"]:
+            documents = documents.filter(issuer__label__in=options["issuers"])
+
+        for summary in documents[: options["limit"]].summaries():
+            rendered_at = summary.rendered_to_pdf_at.isoformat() if summary.rendered_to_pdf_at else "-"
+            self.stdout.write(
+                "\t".join((str(summary.id), summary.issuer_label or "-", summary.created_at.isoformat(), rendered_at))
+            )
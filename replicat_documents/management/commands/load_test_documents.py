@@ -0,0 +1,107 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from replicat_documents import defaults
+from replicat_documents.benchmarks import save_results
+from replicat_documents.loadtest import (
+    OPERATIONS,
+    RENDER,
+    VIEW_OPERATIONS,
+    VIEW_PDF,
+    run_load_test,
+    run_server_load_test,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Issues, renders and views synthetic documents from concurrent threads and reports the throughput and "
+        "latency percentiles of each operation. Synthetic data is committed then deleted, so only run it against "
+        "a disposable database. With --base-url, only the views of existing documents of the --issuer issuers "
+        "are loaded, on a running server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--operation",
+            action="append",
+            dest="operations",
+            choices=OPERATIONS,
+            help="Operation to load. Can be repeated. Defaults to all operations, or to the views with --base-url.",
+        )
+        parser.add_argument("--issuers", type=int, default=2, help="Number of synthetic issuers")
+        parser.add_argument("--documents", type=int, default=100, help="Number of documents issued and rendered")
+        parser.add_argument("--requests", type=int, default=100, help="Number of requests sent to each view")
+        parser.add_argument("--concurrency", type=int, default=4, help="Number of concurrent threads")
+        parser.add_argument(
+            "--base-url",
+            help="URL of a running server the view requests are sent to, e.g. http://localhost:8000, instead of "
+            "the Django test client. Requires --issuer, as the server cannot load synthetic issuers.",
+        )
+        parser.add_argument(
+            "--issuer",
+            action="append",
+            dest="issuer_labels",
+            metavar="LABEL",
+            help="Label of an issuer installed on the --base-url server, whose existing documents are viewed. "
+            "Can be repeated.",
+        )
+        parser.add_argument(
+            "--host",
+            default="localhost",
+            help="Host header of the test client requests, which must be in ALLOWED_HOSTS (default: localhost)",
+        )
+        parser.add_argument("--output", help="Path of the JSON file the results are written to")
+
+    def handle(self, *args, **options):
+        operations = options["operations"] or (VIEW_OPERATIONS if options["base_url"] else OPERATIONS)
+        for name in ("issuers", "documents", "concurrency"):
+            if options[name] < 1:
+                raise CommandError(f"The number of {name} should be positive")
+        if options["requests"] < 0:
+            raise CommandError("The number of requests should not be negative")
+        if options["base_url"]:
+            if not options["issuer_labels"]:
+                raise CommandError("--base-url requires the --issuer labels of issuers installed on the server")
+            if set(operations) - set(VIEW_OPERATIONS):
+                raise CommandError(f"Only the {' and '.join(VIEW_OPERATIONS)} operations can be sent to a server")
+            try:
+                results = run_server_load_test(
+                    options["base_url"],
+                    options["issuer_labels"],
+                    documents=options["documents"],
+                    requests=options["requests"],
+                    concurrency=options["concurrency"],
+                    operations=operations,
+                )
+            except ValueError as error:
+                raise CommandError(error) from error
+        elif options["issuer_labels"]:
+            raise CommandError("--issuer can only be used with --base-url")
+        else:
+            if {RENDER, VIEW_PDF} & set(operations) and not import_string(defaults.RENDERER).is_available():
+                raise CommandError(f"The {defaults.RENDERER} renderer is not available")
+            results = run_load_test(
+                issuers=options["issuers"],
+                documents=options["documents"],
+                requests=options["requests"],
+                concurrency=options["concurrency"],
+                operations=operations,
+                host=options["host"],
+            )
+
+        for name, result in results["operations"].items():
+            if not result["count"]:
+                self.stdout.write(f"{name:<10} no successful operation")
+            else:
+                self.stdout.write(
+                    f"{name:<10} {result['throughput']:10.1f} op/s    "
+                    f"p50 {result['p50'] * 1000:10.3f} ms    p95 {result['p95'] * 1000:10.3f} ms    "
+                    f"p99 {result['p99'] * 1000:10.3f} ms"
+                )
+            for error, count in result["errors"].items():
+                self.stderr.write(f"{name:<10} {count} failure(s): {error}")
+
+        if options["output"]:
+            save_results(results, options["output"])
+            self.stdout.write(f"Results saved to {options['output']}")
@@ -0,0 +1,53 @@
+import itertools
+
+from django.core.management.base import BaseCommand, CommandError
+
+from replicat_documents.models import ReplicatDocument
+from replicat_documents.policies import get_predictive_issuers, is_idle, render_document
+
+
+class Command(BaseCommand):
+    help = (
+        "Renders the documents of issuers with the predictive render policy ahead of their first view, the "
+        "most viewed issuers and the newest documents first, stopping when the server gets busy"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=100, help="Maximum number of documents to render")
+        parser.add_argument(
+            "--max-load",
+            type=float,
+            help="1-minute load average per CPU above which rendering stops. "
+            "Defaults to REPLICAT_DOCUMENTS_PRERENDER_MAX_LOAD.",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Only list the documents to render, in order")
+
+    def iter_documents(self):
+        """Yields the (document id, issuer) tuples of the documents to render, in order"""
+        for issuer in get_predictive_issuers():
+            documents = ReplicatDocument.objects.filter(issuer=issuer, rendered_to_pdf_at__isnull=True)
+            for document_id in documents.order_by("-created_at").values_list("pk", flat=True).iterator():
+                yield document_id, issuer
+
+    def handle(self, *args, **options):
+        if options["limit"] < 1:
+            raise CommandError("The limit should be positive")
+
+        documents = itertools.islice(self.iter_documents(), options["limit"])
+        if options["dry_run"]:
+            for document_id, issuer in documents:
+                self.stdout.write(f"{document_id}\t{issuer.label}")
+            return
+
+        rendered = failed = 0
+        for document_id, _ in documents:
+            if not is_idle(options["max_load"]):
+                self.stdout.write("Stopping, the server is busy")
+                break
+            if render_document(document_id):
+                rendered += 1
+            else:
+                failed += 1
+                self.stderr.write(f"Could not render {document_id}")
+
+        self.stdout.write(f"Pre-rendered {rendered} document(s), {failed} failure(s)")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from replicat_documents.reload import reload_issuers
+
+
+class Command(BaseCommand):
+    help = (
+        "Discovers the document issuers again, registering new ones and disabling removed ones, "
+        "and refreshes the issuer cache"
+    )
+
+    def handle(self, *args, **options):
+        changes = reload_issuers()
+        for change, names in changes.items():
+            for name in names:
+                self.stdout.write(f"{change.capitalize()} {name}")
+        self.stdout.write("Registered document issuers and refreshed the issuer cache")
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from replicat_documents.models import ReplicatDocument
+from replicat_documents.renderers import PDF
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-renders the documents whose issuer templates or static assets changed since they were last rendered, "
+        "in each of the formats they were rendered in"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--issuer",
+            action="append",
+            dest="issuers",
+            help="Label of an issuer whose documents should be re-rendered. Can be repeated. Defaults to all issuers.",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only count the stale documents, without re-rendering them"
+        )
+
+    def handle(self, *args, **options):
+        documents = ReplicatDocument.objects.select_related("issuer")
+        if options["issuers"]:
+            documents = documents.filter(issuer__label__in=options["issuers"])
+        documents = documents.stale()
+
+        if options["dry_run"]:
+            self.stdout.write(f"{documents.count()} stale document(s)")
+            return
+
+        rendered = failed = 0
+        for document in documents.iterator():
+            formats = list(document.renditions.values_list("format", flat=True)) or [PDF]
+            if document.render(formats=formats):
+                rendered += 1
+            else:
+                failed += 1
+                self.stderr.write(f"Could not render {document.id}")
+
+        self.stdout.write(f"Re-rendered {rendered} stale document(s), {failed} failure(s)")
@@ -0,0 +1,62 @@
+import itertools
+
+from django.core.management.base import BaseCommand
+
+from replicat_documents.models import DocumentRendition, ReplicatDocument
+from replicat_documents.renderers import PDF, PNG
+from replicat_documents.storage import get_documents_storage, get_rendition_name, move_rendition
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves the rendered files of existing documents from a previous directory layout of the documents storage "
+        "to the current REPLICAT_DOCUMENTS_DOCUMENTS_STORAGE_FANOUT layout"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--from-fanout",
+            type=int,
+            default=0,
+            help="Number of hashed directory levels of the previous layout. Defaults to 0, the flat layout.",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Only count the files to move, without moving them")
+
+    def handle(self, *args, **options):
+        storage = get_documents_storage()
+
+        # Only the recorded renditions and page previews are looked up, plus the PDF files of documents
+        # rendered before renditions were recorded, instead of probing the storage for every format.
+        renditions = DocumentRendition.objects.values_list("document_id", "format")
+        unrecorded_pdfs = (
+            ReplicatDocument.objects.filter(rendered_to_pdf_at__isnull=False)
+            .exclude(renditions__format=PDF)
+            .values_list("pk", flat=True)
+        )
+        page_previews = ReplicatDocument.objects.filter(page_preview_count__isnull=False).values_list(
+            "pk", "page_preview_count"
+        )
+        renditions = itertools.chain(
+            renditions.iterator(),
+            ((document_id, PDF) for document_id in unrecorded_pdfs.iterator()),
+            (
+                (document_id, f"page-{page}.{PNG}")
+                for document_id, count in page_previews.iterator()
+                for page in range(1, count + 1)
+            ),
+        )
+
+        moved = 0
+        for document_id, rendition_format in renditions:
+            old_name = get_rendition_name(document_id, rendition_format, fanout=options["from_fanout"])
+            new_name = get_rendition_name(document_id, rendition_format)
+            if old_name == new_name or not storage.exists(old_name):
+                continue
+            if not options["dry_run"]:
+                move_rendition(old_name, new_name)
+            moved += 1
+
+        if options["dry_run"]:
+            self.stdout.write(f"{moved} file(s) to move")
+        else:
+            self.stdout.write(f"Moved {moved} file(s)")
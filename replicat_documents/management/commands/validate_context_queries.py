@@ -0,0 +1,52 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from replicat_documents.models import DocumentIssuerChoice
+from replicat_documents.validation import format_result, validate_context_queries
+
+
+class Command(BaseCommand):
+    help = (
+        "Validates JSON lines of context query payloads against an issuer's context query model, "
+        "without creating any document, and writes one JSON line of results per payload"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("issuer", help="Label of the issuer whose context query model validates the payloads")
+        parser.add_argument("path", help="Path of the JSON lines file of payloads, or - to read the standard input")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Number of payloads sent to each worker")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Number of worker processes. Defaults to the number of processors, 0 validates in this process.",
+        )
+        parser.add_argument("--errors-only", action="store_true", help="Only write the results of invalid payloads")
+
+    def handle(self, *args, **options):
+        try:
+            issuer = DocumentIssuerChoice.objects.get(label=options["issuer"])
+        except DocumentIssuerChoice.DoesNotExist as error:
+            raise CommandError(f"Issuer {options['issuer']} does not exist") from error
+
+        payloads = sys.stdin if options["path"] == "-" else open(options["path"], encoding="utf-8")
+
+        valid = invalid = 0
+        try:
+            for result in validate_context_queries(
+                issuer, payloads, chunk_size=options["chunk_size"], workers=options["workers"]
+            ):
+                if result.errors:
+                    invalid += 1
+                else:
+                    valid += 1
+                if result.errors or not options["errors_only"]:
+                    self.stdout.write(format_result(result))
+        finally:
+            if payloads is not sys.stdin:
+                payloads.close()
+
+        self.stderr.write(f"{valid} valid payload(s), {invalid} invalid payload(s)")
+        if invalid:
+            raise CommandError(f"{invalid} invalid payload(s)")
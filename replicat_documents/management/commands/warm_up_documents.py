@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from replicat_documents.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = (
+        "Checks that the document issuers can be discovered and loaded, their templates compiled and the renderer "
+        "started, reporting the duration of each step. The caches of the command process are lost when it exits, "
+        "servers warm up their own processes, see replicat_documents.warmup."
+    )
+
+    def handle(self, *args, **options):
+        for step, duration in warm_up().items():
+            self.stdout.write(f"Warmed up {step} in {duration:.3f} seconds")
@@ -0,0 +1,142 @@
+"""In-process render metrics
+
+Durations of the render pipeline stages are emitted with the `render_stage_finished`
+signal and aggregated here into one histogram per issuer and stage. The histograms can be
+exposed in the Prometheus text format, along with the render queue depths.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+from replicat_documents import defaults
+from replicat_documents.admission import render_queue
+from replicat_documents.signals import render_stage_finished
+
+RENDER_STAGE_METRIC = "replicat_documents_render_stage_seconds"
+RENDER_QUEUE_DEPTH_METRIC = "replicat_documents_render_queue_depth"
+RENDER_QUEUE_REJECTED_METRIC = "replicat_documents_render_queue_rejected_total"
+
+
+class Histogram:
+    """Thread-safe cumulative histogram with fixed bucket upper bounds"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            for index, upper_bound in enumerate(self.buckets):
+                if value <= upper_bound:
+                    self.counts[index] += 1
+                    break
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self):
+        """Returns a (cumulative bucket counts, sum, count) tuple
+
+        Cumulative bucket counts are a list of (upper bound, count) tuples ending with +Inf.
+        """
+        with self._lock:
+            cumulative, total = [], 0
+            for upper_bound, count in zip(self.buckets, self.counts):
+                total += count
+                cumulative.append((upper_bound, total))
+            cumulative.append((float("inf"), self.count))
+            return cumulative, self.sum, self.count
+
+
+class RenderStageHistograms:
+    """Registry of histograms keyed by (issuer, stage)"""
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, issuer, stage, duration):
+        key = (issuer, stage)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(defaults.METRICS_BUCKETS)
+        histogram.observe(duration)
+
+    def get(self, issuer, stage):
+        return self._histograms.get((issuer, stage))
+
+    def items(self):
+        with self._lock:
+            return sorted(self._histograms.items())
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+
+
+render_stage_histograms = RenderStageHistograms()
+
+
+@contextmanager
+def timed_stage(stage, issuer, identifier=None):
+    """Times the wrapped block and sends `render_stage_finished` if it completes"""
+    start = time.perf_counter()
+    yield
+    render_stage_finished.send(
+        sender=RenderStageHistograms,
+        issuer=issuer,
+        stage=stage,
+        duration=time.perf_counter() - start,
+        identifier=identifier,
+    )
+
+
+# pylint: disable=unused-argument
+def record_render_stage(sender, issuer, stage, duration, **kwargs):
+    """Receiver aggregating `render_stage_finished` signals into the histograms"""
+    render_stage_histograms.observe(issuer, stage, duration)
+
+
+def _escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_bound(value):
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+def render_prometheus(histograms=render_stage_histograms, queue=render_queue):
+    """Returns the histograms and render queue metrics in the Prometheus text exposition format"""
+    lines = [
+        f"# HELP {RENDER_STAGE_METRIC} Duration of the document render pipeline stages in seconds.",
+        f"# TYPE {RENDER_STAGE_METRIC} histogram",
+    ]
+
+    for (issuer, stage), histogram in histograms.items():
+        labels = f'issuer="{_escape_label_value(issuer)}",stage="{_escape_label_value(stage)}"'
+        cumulative, total_sum, total_count = histogram.snapshot()
+        for upper_bound, count in cumulative:
+            lines.append(f'{RENDER_STAGE_METRIC}_bucket{{{labels},le="{_format_bound(upper_bound)}"}} {count}')
+        lines.append(f"{RENDER_STAGE_METRIC}_sum{{{labels}}} {total_sum!r}")
+        lines.append(f"{RENDER_STAGE_METRIC}_count{{{labels}}} {total_count}")
+
+    lines += [
+        f"# HELP {RENDER_QUEUE_DEPTH_METRIC} Number of on-demand renders in progress or waiting.",
+        f"# TYPE {RENDER_QUEUE_DEPTH_METRIC} gauge",
+    ]
+    for issuer, depth in queue.depths():
+        lines.append(f'{RENDER_QUEUE_DEPTH_METRIC}{{issuer="{_escape_label_value(issuer)}"}} {depth}')
+
+    lines += [
+        f"# HELP {RENDER_QUEUE_REJECTED_METRIC} Number of on-demand renders refused because the queue was full.",
+        f"# TYPE {RENDER_QUEUE_REJECTED_METRIC} counter",
+    ]
+    for (issuer, reason), count in queue.rejected():
+        labels = f'issuer="{_escape_label_value(issuer)}",reason="{reason}"'
+        lines.append(f"{RENDER_QUEUE_REJECTED_METRIC}{{{labels}}} {count}")
+
+    return "\n".join(lines) + "\n"
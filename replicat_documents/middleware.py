@@ -0,0 +1,104 @@
+import logging
+import time
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.urls import Resolver404, get_resolver
+
+from replicat_documents import defaults
+from replicat_documents.exceptions import RequestBudgetExceeded
+from replicat_documents.profiling import RequestProfile, format_exceeded
+from replicat_documents.routers import get_pinned_until, pin_to_primary, unpin
+
+logger = logging.getLogger("replicat_documents")
+
+
+class RequestBudgetMiddleware:
+    """Profiles requests to replicat_documents URLs and enforces the request budget
+
+    Enabled with the REPLICAT_DOCUMENTS_PROFILING_ENABLED setting. The SQL query count and
+    time, cache hits and misses and wall time of each profiled request are added to the
+    response as a Server-Timing header. Requests exceeding REPLICAT_DOCUMENTS_REQUEST_BUDGET
+    are logged, or raise RequestBudgetExceeded if REPLICAT_DOCUMENTS_REQUEST_BUDGET_ACTION
+    is "raise".
+    """
+
+    def __init__(self, get_response):
+        if not defaults.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def is_profiled(self, request):
+        """Returns True if the request URL belongs to one of the PROFILING_NAMESPACES"""
+        try:
+            resolver_match = get_resolver(getattr(request, "urlconf", None)).resolve(request.path_info)
+        except Resolver404:
+            return False
+        return bool(set(resolver_match.namespaces) & set(defaults.PROFILING_NAMESPACES))
+
+    def __call__(self, request):
+        if not self.is_profiled(request):
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        with profile.record():
+            response = self.get_response(request)
+
+        response["Server-Timing"] = (
+            f'db;desc="{profile.queries} queries";dur={profile.query_time * 1000:.3f}, '
+            f'cache;desc="{profile.cache_hits} hits, {profile.cache_misses} misses", '
+            f"total;dur={profile.wall_time * 1000:.3f}"
+        )
+
+        exceeded = profile.exceeded(defaults.REQUEST_BUDGET)
+        if exceeded:
+            message = f"{request.method} {request.path} exceeded its budget: {format_exceeded(exceeded)}"
+            if defaults.REQUEST_BUDGET_ACTION == "raise":
+                raise RequestBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
+
+
+class ReplicaStickinessMiddleware:
+    """Sticks the reads of a client to the primary database for a while after it wrote a document
+
+    Enabled with the REPLICAT_DOCUMENTS_READ_REPLICAS setting. When a request writes a
+    document or an issuer, a cookie makes the following requests of the same client read
+    from the primary database until the end of the REPLICAT_DOCUMENTS_READ_REPLICA_STICKY_SECONDS
+    window.
+    """
+
+    cookie_name = "replicat_documents_primary"
+
+    def __init__(self, get_response):
+        if not defaults.READ_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        unpin()
+        try:
+            # The cookie is set by the client, so never trust it beyond one window
+            pinned_until = min(
+                float(request.COOKIES.get(self.cookie_name, 0)), time.time() + defaults.READ_REPLICA_STICKY_SECONDS
+            )
+        except ValueError:
+            pinned_until = 0
+        if pinned_until > time.time():
+            pin_to_primary(until=pinned_until)
+
+        try:
+            response = self.get_response(request)
+            written_until = get_pinned_until()
+        finally:
+            unpin()
+
+        if written_until > max(pinned_until, time.time()):
+            response.set_cookie(
+                self.cookie_name,
+                str(written_until),
+                max_age=defaults.READ_REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
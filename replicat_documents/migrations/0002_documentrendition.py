@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-19 15:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('replicat_documents', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentRendition',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='ID for the Document Rendition as an UUID', primary_key=True, serialize=False, verbose_name='ID')),
+                ('format', models.CharField(choices=[('pdf', 'PDF'), ('png', 'PNG first page thumbnail'), ('html', 'Standalone HTML')], help_text='File format of this rendition', max_length=10, verbose_name='Format')),
+                ('rendered_at', models.DateTimeField(help_text='Date and time at which the document was last rendered in this format', verbose_name='Rendered at')),
+                ('document', models.ForeignKey(help_text='The rendered document', on_delete=django.db.models.deletion.CASCADE, related_name='renditions', to='replicat_documents.replicatdocument', verbose_name='Document')),
+            ],
+            options={
+                'verbose_name': 'Document Rendition',
+                'verbose_name_plural': 'Document Renditions',
+                'unique_together': {('document', 'format')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-19 15:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('replicat_documents', '0002_documentrendition'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='replicatdocument',
+            name='template_fingerprint',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Fingerprint of the issuer templates and static assets used for the last rendering', max_length=64, verbose_name='Template fingerprint'),
+        ),
+    ]
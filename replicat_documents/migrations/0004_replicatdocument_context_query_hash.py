@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-19 15:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('replicat_documents', '0003_replicatdocument_template_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='replicatdocument',
+            name='context_query_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Hash of the issuer and normalized context query, identifying duplicate documents', max_length=64, verbose_name='Context query hash'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-19 16:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('replicat_documents', '0004_replicatdocument_context_query_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='replicatdocument',
+            name='issuance_key',
+            field=models.CharField(editable=False, help_text='Context query hash of documents issued with idempotent issuance, preventing duplicates', max_length=64, null=True, unique=True, verbose_name='Issuance key'),
+        ),
+    ]
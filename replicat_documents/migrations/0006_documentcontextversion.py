@@ -0,0 +1,31 @@
+# Generated by Django 3.2.25 on 2026-10-19 16:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('replicat_documents', '0005_replicatdocument_issuance_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentContextVersion',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='ID for the Document Context Version as an UUID', primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField(help_text='Number of this version, starting from 1 for each document', verbose_name='Number')),
+                ('snapshot', models.JSONField(blank=True, help_text='Full context and context query of this version, stored periodically', null=True, verbose_name='Snapshot')),
+                ('delta', models.JSONField(blank=True, help_text='JSON Patch turning the previous version into this one, when there is no snapshot', null=True, verbose_name='Delta')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Date and time at which the version was recorded', verbose_name='Created on')),
+                ('document', models.ForeignKey(help_text='The versioned document', on_delete=django.db.models.deletion.CASCADE, related_name='context_versions', to='replicat_documents.replicatdocument', verbose_name='Document')),
+            ],
+            options={
+                'verbose_name': 'Document Context Version',
+                'verbose_name_plural': 'Document Context Versions',
+                'unique_together': {('document', 'number')},
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 3.2.25 on 2026-10-19 16:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+TEXT_TABLE = "replicat_documents_documentsearchtext"
+FTS5_TABLE = "replicat_documents_documentsearchtext_fts"
+
+# The expression index is used by queries with the same text search configuration, see
+# replicat_documents.search.SEARCH_CONFIG
+POSTGRESQL_INDEX = [
+    f"CREATE INDEX {TEXT_TABLE}_vector ON {TEXT_TABLE} USING GIN (to_tsvector('simple', text))",
+]
+POSTGRESQL_DROP_INDEX = [f"DROP INDEX IF EXISTS {TEXT_TABLE}_vector"]
+
+# External content FTS5 table, kept in sync with the search texts by triggers. Migrations
+# remaking the search text table on SQLite drop the triggers and have to recreate them.
+SQLITE_INDEX = [
+    f"CREATE VIRTUAL TABLE {FTS5_TABLE} USING fts5(text, content='{TEXT_TABLE}', content_rowid='id')",
+    f"""CREATE TRIGGER {TEXT_TABLE}_ai AFTER INSERT ON {TEXT_TABLE} BEGIN
+        INSERT INTO {FTS5_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+    f"""CREATE TRIGGER {TEXT_TABLE}_ad AFTER DELETE ON {TEXT_TABLE} BEGIN
+        INSERT INTO {FTS5_TABLE}({FTS5_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+    END""",
+    f"""CREATE TRIGGER {TEXT_TABLE}_au AFTER UPDATE ON {TEXT_TABLE} BEGIN
+        INSERT INTO {FTS5_TABLE}({FTS5_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS5_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+]
+SQLITE_DROP_INDEX = [
+    f"DROP TRIGGER IF EXISTS {TEXT_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {TEXT_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {TEXT_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS5_TABLE}",
+]
+
+
+def run_vendor_statements(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('replicat_documents', '0006_documentcontextversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSearchText',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('text', models.TextField(blank=True, help_text='Text extracted from the rendered HTML of the document', verbose_name='Text')),
+                ('document', models.OneToOneField(help_text='The indexed document', on_delete=django.db.models.deletion.CASCADE, related_name='search_text', to='replicat_documents.replicatdocument', verbose_name='Document')),
+            ],
+            options={
+                'verbose_name': 'Document Search Text',
+                'verbose_name_plural': 'Document Search Texts',
+            },
+        ),
+        migrations.RunPython(
+            run_vendor_statements({"postgresql": POSTGRESQL_INDEX, "sqlite": SQLITE_INDEX}),
+            run_vendor_statements({"postgresql": POSTGRESQL_DROP_INDEX, "sqlite": SQLITE_DROP_INDEX}),
+        ),
+    ]
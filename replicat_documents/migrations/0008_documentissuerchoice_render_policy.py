@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-19 16:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('replicat_documents', '0007_documentsearchtext'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentissuerchoice',
+            name='render_policy',
+            field=models.CharField(choices=[('lazy', 'Lazy: render on first view'), ('eager', 'Eager: render when issued'), ('predictive', 'Predictive: pre-render in idle capacity')], default='lazy', help_text='When the documents of this issuer are rendered, see replicat_documents.policies', max_length=10, verbose_name='Render policy'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-19 16:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('replicat_documents', '0008_documentissuerchoice_render_policy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='replicatdocument',
+            name='page_preview_count',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Number of PNG page previews cached for the current PDF rendition, if they were generated', null=True, verbose_name='Page preview count'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.25 on 2026-10-19 16:32
+
+from django.db import migrations, models
+
+
+def delete_forward_versions(apps, schema_editor):
+    # Versions recorded before this migration store deltas against the previous version,
+    # which cannot be rebuilt from the current state of their document
+    DocumentContextVersion = apps.get_model("replicat_documents", "DocumentContextVersion")
+    DocumentContextVersion.objects.using(schema_editor.connection.alias).all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('replicat_documents', '0009_replicatdocument_page_preview_count'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='documentcontextversion',
+            name='delta',
+            field=models.JSONField(blank=True, help_text='JSON Patch turning the next version into this one, when there is no snapshot', null=True, verbose_name='Delta'),
+        ),
+        migrations.RunPython(delete_forward_versions, migrations.RunPython.noop),
+    ]
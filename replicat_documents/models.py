@@ -1,14 +1,37 @@
+import hashlib
+import json
+import logging
 import uuid
+from pathlib import Path
 
 from django.core import serializers
 from django.core.cache import cache
 from django.core.exceptions import FieldError
 from django.core.exceptions import ValidationError as DjangoValidationError
-from django.db import models
+from django.db import IntegrityError, models, router, transaction
+from django.db.models.functions import Coalesce
 from django.urls import reverse
-from django.utils.translation import ugettext_lazy as _
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
 from pydantic.error_wrappers import ValidationError as PydanticValidationError
 
+from replicat_documents import defaults
+from replicat_documents.apps import load_document_issuer_class
+from replicat_documents.exceptions import (
+    DocumentIssuerContextQueryValidationError,
+    DocumentIssuerContextValidationError,
+    DocumentIssuerMissingContext,
+    DocumentIssuerMissingContextQuery,
+)
+from replicat_documents.policies import EAGER, LAZY, PREDICTIVE
+from replicat_documents.profiling import record_cache_lookup
+from replicat_documents.renderers import HTML, PDF, PNG, make_thumbnail, rasterize_pdf
+from replicat_documents.search import index_document, search
+from replicat_documents.storage import get_documents_storage, get_rendition_name, save_rendition
+from replicat_documents.versions import make_json_patch, rebuild_version
+
+logger = logging.getLogger("replicat_documents")
+
 CACHED_DOCUMENT_ISSUER_KEY = "cached_document_issuers"
 
 
@@ -32,6 +55,46 @@ def flatten_json(input, delimeter="_"):
     return output
 
 
+def unflatten_json(input, delimeter="_"):
+    """Returns a nested dictionary by splitting the keys of a flat dictionary on the given delimeter
+
+    Nested dictionaries whose keys are the consecutive integers from 0 are converted to lists,
+    reversing flatten_json.
+    """
+    output = {}
+
+    for key, value in input.items():
+        *parents, name = key.split(delimeter)
+        element = output
+        for parent in parents:
+            element = element.setdefault(parent, {})
+            if not isinstance(element, dict):
+                raise ValueError(f"Key {key} conflicts with the value of its parent {parent}")
+        element[name] = value
+
+    def unflatten(element):
+        if not isinstance(element, dict):
+            return element
+        if element and set(element) == {str(i) for i in range(len(element))}:
+            return [unflatten(element[str(i)]) for i in range(len(element))]
+        return {name: unflatten(value) for name, value in element.items()}
+
+    return unflatten(output)
+
+
+def get_context_query_hash(issuer, context_query):
+    """Returns the SHA-256 hexadecimal digest identifying an issuer and a context query
+
+    The context query is normalized with the issuer's context query model and serialized with
+    sorted keys, so that equivalent context queries share the same hash.
+    """
+    normalized = json.loads(issuer.get_document_issuer(context_query=context_query).context_query.json())
+    canonical = json.dumps(
+        {"issuer": str(issuer.pk), "context_query": normalized}, sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
 class PydanticModelField(models.JSONField):
     """Pydantic Model Field.
     This field is a pydantic model field but with model validation when the model
@@ -130,12 +193,21 @@ class DocumentIssuerChoiceManager(models.Manager):
 
     def get_cached_instances(self, allow_read_only=False, refresh=False):
         """Returns the cached DocumentIssuerChoice instances, refreshing the data if desired"""
-        if cache.get(CACHED_DOCUMENT_ISSUER_KEY, default=None) is None or refresh == True:
-            cached = self.set_cached_instances(allow_read_only=allow_read_only)
-
         document_issuer_choices = cache.get(CACHED_DOCUMENT_ISSUER_KEY, default=None)
+        record_cache_lookup(hit=document_issuer_choices is not None and not refresh)
+
+        if document_issuer_choices is None or refresh == True:
+            document_issuer_choices = self.set_cached_instances(allow_read_only=allow_read_only)
+
         return document_issuer_choices
 
+    def get_cached_labels(self):
+        """Returns a {pk: label} dictionary of the cached DocumentIssuerChoice instances"""
+        return {
+            issuer["pk"]: issuer["fields"]["label"]
+            for issuer in json.loads(self.get_cached_instances())
+        }
+
 
 CombinedDocumentIssuerChoiceManager = DocumentIssuerChoiceManager.from_queryset(DocumentIssuerChoiceQuerySet)
 
@@ -143,6 +215,12 @@ CombinedDocumentIssuerChoiceManager = DocumentIssuerChoiceManager.from_queryset(
 class DocumentIssuerChoice(models.Model):
     """Provides the list of allowed issuers for documents."""
 
+    RENDER_POLICY_CHOICES = (
+        (LAZY, _("Lazy: render on first view")),
+        (EAGER, _("Eager: render when issued")),
+        (PREDICTIVE, _("Predictive: pre-render in idle capacity")),
+    )
+
     id = models.UUIDField(
         _("ID"),
         primary_key=True,
@@ -192,6 +270,14 @@ class DocumentIssuerChoice(models.Model):
         ),
     )
 
+    render_policy = models.CharField(
+        _("Render policy"),
+        max_length=10,
+        choices=RENDER_POLICY_CHOICES,
+        default=LAZY,
+        help_text=_("When the documents of this issuer are rendered, see replicat_documents.policies"),
+    )
+
     objects = CombinedDocumentIssuerChoiceManager()
 
     def __str__(self):
@@ -206,11 +292,128 @@ class DocumentIssuerChoice(models.Model):
     def writable(self):
         return self.enabled and not self.read_only
 
+    def get_document_issuer(self, **kwargs):
+        """Returns an instance of the DocumentIssuer class for this issuer"""
+        return load_document_issuer_class(self.issuer_module_name, self.app_name, **kwargs)
+
+    def get_template_fingerprint(self):
+        """Returns the current fingerprint of this issuer's templates and static assets"""
+        return self.get_document_issuer().get_template_fingerprint()
+
     def enable(self):
         self.enabled = True
         self.save()
 
 
+class DocumentSummary:
+    """Compact read-only record of the listed fields of a document"""
+
+    __slots__ = ("id", "issuer_id", "issuer_label", "rendered_to_pdf_at", "created_at", "updated_at")
+
+    fields = ("id", "issuer_id", "rendered_to_pdf_at", "created_at", "updated_at")
+
+    def __init__(self, id, issuer_id, rendered_to_pdf_at, created_at, updated_at, issuer_label=None):
+        self.id = id
+        self.issuer_id = issuer_id
+        self.issuer_label = issuer_label
+        self.rendered_to_pdf_at = rendered_to_pdf_at
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+    def __repr__(self):
+        return f"<DocumentSummary: {self.id} ({self.issuer_label})>"
+
+
+class ReplicatDocumentQuerySet(models.QuerySet):
+    def rendered(self):
+        """Filters out documents which have never been rendered"""
+        has_renditions = models.Exists(DocumentRendition.objects.filter(document=models.OuterRef("pk")))
+        return self.filter(has_renditions | models.Q(rendered_to_pdf_at__isnull=False))
+
+    def stale(self):
+        """Filters rendered documents whose template fingerprint differs from their issuer's current one
+
+        Only documents of enabled issuers are returned. Templates extended or included with a
+        variable name are not part of the fingerprint, see AbstractDocumentIssuer.static_assets.
+        """
+        issuers = DocumentIssuerChoice.objects.enabled().filter(pk__in=self.values("issuer"))
+
+        stale = models.Q(pk__in=[])
+        for issuer in issuers:
+            stale |= models.Q(issuer=issuer) & ~models.Q(template_fingerprint=issuer.get_template_fingerprint())
+
+        return self.rendered().filter(stale)
+
+    def search(self, query):
+        """Filters documents whose rendered text matches all the terms of the query, best matches first
+
+        Documents are annotated with their `search_rank`, see replicat_documents.search.
+        """
+        return search(self, query)
+
+    def summaries(self):
+        """Returns a list of DocumentSummary records, without loading the JSON fields
+
+        Issuer labels are resolved from the cached issuers instead of a join. Issuers missing
+        from the cache, such as disabled or read only ones, are fetched with a single query.
+        """
+        summaries = [DocumentSummary(*row) for row in self.values_list(*DocumentSummary.fields)]
+
+        labels = DocumentIssuerChoice.objects.get_cached_labels()
+        missing = {
+            summary.issuer_id
+            for summary in summaries
+            if summary.issuer_id is not None and str(summary.issuer_id) not in labels
+        }
+        if missing:
+            labels.update(
+                (str(pk), label)
+                for pk, label in DocumentIssuerChoice.objects.filter(pk__in=missing).values_list("pk", "label")
+            )
+
+        for summary in summaries:
+            if summary.issuer_id is not None:
+                summary.issuer_label = labels.get(str(summary.issuer_id))
+        return summaries
+
+
+class ReplicatDocumentManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().all()
+
+    def issue(self, issuer, context_query, **kwargs):
+        """Creates a document, returning a (document, created) tuple like `get_or_create`
+
+        With the IDEMPOTENT_ISSUANCE setting, the oldest document with the same issuer and
+        context query is returned instead of creating a duplicate. Documents created this way
+        get a unique issuance key, so that concurrent issuances create a single document.
+        """
+        if not defaults.IDEMPOTENT_ISSUANCE:
+            return self.create(issuer=issuer, context_query=context_query, **kwargs), True
+
+        context_query_hash = get_context_query_hash(issuer, context_query)
+        document = self.filter(context_query_hash=context_query_hash).order_by("created_at").first()
+        if document is not None:
+            return document, False
+
+        # The unique issuance key makes concurrent issuances of the same document create it once
+        try:
+            with transaction.atomic(using=self.db):
+                document = self.create(
+                    issuer=issuer, context_query=context_query, issuance_key=context_query_hash, **kwargs
+                )
+            return document, True
+        except IntegrityError:
+            try:
+                return self.get(issuance_key=context_query_hash), False
+            except self.model.DoesNotExist:
+                pass
+            raise
+
+
+CombinedReplicatDocumentManager = ReplicatDocumentManager.from_queryset(ReplicatDocumentQuerySet)
+
+
 class ReplicatDocument(models.Model):
     """Replicat Document Model"""
 
@@ -260,6 +463,41 @@ class ReplicatDocument(models.Model):
         help_text=_("Date and time at which the document was last rendered as pdf"),
     )
 
+    page_preview_count = models.PositiveIntegerField(
+        _("Page preview count"),
+        null=True,
+        blank=True,
+        editable=False,
+        help_text=_("Number of PNG page previews cached for the current PDF rendition, if they were generated"),
+    )
+
+    context_query_hash = models.CharField(
+        _("Context query hash"),
+        max_length=64,
+        blank=True,
+        editable=False,
+        db_index=True,
+        help_text=_("Hash of the issuer and normalized context query, identifying duplicate documents"),
+    )
+
+    issuance_key = models.CharField(
+        _("Issuance key"),
+        max_length=64,
+        null=True,
+        unique=True,
+        editable=False,
+        help_text=_("Context query hash of documents issued with idempotent issuance, preventing duplicates"),
+    )
+
+    template_fingerprint = models.CharField(
+        _("Template fingerprint"),
+        max_length=64,
+        blank=True,
+        editable=False,
+        db_index=True,
+        help_text=_("Fingerprint of the issuer templates and static assets used for the last rendering"),
+    )
+
     created_at = models.DateTimeField(
         _("Created on"),
         auto_now_add=True,
@@ -274,6 +512,8 @@ class ReplicatDocument(models.Model):
         help_text=_("Date and time at which the document was last updated"),
     )
 
+    objects = CombinedReplicatDocumentManager()
+
     def __str__(self):
         return f"{self.id}"
 
@@ -281,14 +521,191 @@ class ReplicatDocument(models.Model):
         verbose_name = _("Replicat Document")
         verbose_name_plural = _("Replicat Document")
 
+    def _get_hashed_context_query(self):
+        """Returns the issuer and context query the context query hash depends on, if they were loaded"""
+        deferred = self.get_deferred_fields()
+        if "issuer_id" in deferred or "context_query" in deferred or "context_query_hash" in deferred:
+            return None
+        return self.issuer_id, json.dumps(self.context_query, sort_keys=True, default=str)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        # The context query is serialized when it is saved, rather than when it is loaded, so
+        # that read-only queries do not pay for it. The first save of a loaded document hashes
+        # it, later saves only hash it again if it changed.
+        hashed_context_query = None
+        if update_fields is None or {"issuer", "context_query"} & set(update_fields):
+            hashed_context_query = self._get_hashed_context_query()
+        if hashed_context_query is not None and hashed_context_query != getattr(self, "_hashed_context_query", None):
+            self.context_query_hash = ""
+            if self.issuer is not None and self.context_query is not None:
+                try:
+                    self.context_query_hash = get_context_query_hash(self.issuer, self.context_query)
+                except (DocumentIssuerContextQueryValidationError, DocumentIssuerMissingContextQuery):
+                    # Let the context_query field validation report the error
+                    pass
+            # A document whose context query changed no longer blocks issuing its previous one
+            if self.issuance_key is not None and self.issuance_key != self.context_query_hash:
+                self.issuance_key = None
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "context_query_hash", "issuance_key"}
+
+        versioned = defaults.CONTEXT_HISTORY and not self._state.adding
+        versioned = versioned and (update_fields is None or {"context", "context_query"} & set(update_fields))
+        if versioned and not {"context", "context_query"} & self.get_deferred_fields():
+            using = kwargs.get("using") or router.db_for_write(ReplicatDocument, instance=self)
+            with transaction.atomic(using=using):
+                # The row lock serializes concurrent saves, which would otherwise number their versions alike
+                previous = (
+                    ReplicatDocument._base_manager.using(using)
+                    .select_for_update()
+                    .filter(pk=self.pk)
+                    .values("context", "context_query")
+                    .first()
+                )
+                super().save(*args, **kwargs)
+                if previous is not None:
+                    self.record_context_version(previous)
+        else:
+            super().save(*args, **kwargs)
+
+        if hashed_context_query is not None:
+            self._hashed_context_query = hashed_context_query
+
+    def get_context_state(self):
+        """Returns the context and context query, as recorded by the context history"""
+        return json.loads(json.dumps({"context": self.context, "context_query": self.context_query}, default=str))
+
+    def get_context_version(self, number=None):
+        """Returns the context state of the given version, or the current state, with a single query
+
+        Raises DocumentContextVersion.DoesNotExist if the version does not exist.
+        """
+        current = self.get_context_state()
+        if number is None:
+            return current
+
+        versions = self.context_versions.all()
+        snapshot_number = (
+            versions.filter(snapshot__isnull=False, number__gte=number).order_by("number").values("number")[:1]
+        )
+        # Without a newer snapshot, the version is rebuilt from the current state
+        newest_number = Coalesce(
+            models.Subquery(snapshot_number), models.Value(2 ** 31 - 1), output_field=models.PositiveIntegerField()
+        )
+        rows = list(
+            versions.filter(number__gte=number, number__lte=newest_number)
+            .order_by("-number")
+            .values_list("number", "snapshot", "delta")
+        )
+        if not rows or rows[-1][0] != number:
+            raise DocumentContextVersion.DoesNotExist
+        return rebuild_version(current, [(snapshot, delta) for _, snapshot, delta in rows])
+
+    def record_context_version(self, previous):
+        """Records `previous`, the context state replaced by the current one, as a new version
+
+        The version stores the JSON Patch turning the current state back into `previous`, or a
+        full snapshot every CONTEXT_VERSION_SNAPSHOT_INTERVAL versions. The document row should
+        be locked, so that concurrent saves do not number their versions alike. The first
+        context of a document is not recorded, its previous state being empty. Returns the new
+        version, or None.
+        """
+        previous = json.loads(json.dumps(previous, default=str))
+        state = self.get_context_state()
+        delta = make_json_patch(state, previous)
+        if not delta:
+            return None
+
+        latest = self.context_versions.aggregate(number=models.Max("number"))["number"]
+        if latest is None and previous["context"] is None and previous["context_query"] == state["context_query"]:
+            return None
+
+        number = (latest or 0) + 1
+        if number % defaults.CONTEXT_VERSION_SNAPSHOT_INTERVAL == 0:
+            return self.context_versions.create(number=number, snapshot=previous)
+        return self.context_versions.create(number=number, delta=delta)
+
+    def get_context_pydantic_model(self):
+        """Returns the issuer's context model, used to validate the `context` field"""
+        return self.issuer.get_document_issuer().context_model
+
+    def get_context_query_pydantic_model(self):
+        """Returns the issuer's context query model, used to validate the `context_query` field"""
+        return self.issuer.get_document_issuer().context_query_model
+
     def get_absolute_url(self):
-        return reverse("document_view_html", kwargs={"id": self.id})
+        return reverse("replicat_documents:document_view_html", kwargs={"id": self.id})
+
+    def get_document_issuer(self):
+        """Returns an instance of this document's DocumentIssuer class, set up for this document"""
+        document_issuer = self.issuer.get_document_issuer(identifier=self.id, context_query=self.context_query)
+        document_issuer.metadata = self.flat_metadata
+        return document_issuer
+
+    def get_rendition_name(self, rendition_format):
+        """Returns the name of the rendered file in the given format in the documents storage"""
+        return get_rendition_name(self.id, rendition_format)
+
+    def get_document_path(self):
+        """Returns the path of the rendered PDF file as a pathlib.Path object"""
+        return self.get_rendition_path(PDF)
+
+    def get_rendition_path(self, rendition_format):
+        """Returns the path of the rendered file in the given format as a pathlib.Path object
+
+        Only storages with local files, such as FileSystemStorage, provide paths.
+        """
+        return Path(get_documents_storage().path(self.get_rendition_name(rendition_format)))
+
+    def rendition_exists(self, rendition_format=PDF):
+        """Returns True if the rendered file in the given format is in the documents storage"""
+        return get_documents_storage().exists(self.get_rendition_name(rendition_format))
+
+    def open_rendition(self, rendition_format=PDF):
+        """Opens the rendered file in the given format from the documents storage, for reading"""
+        return get_documents_storage().open(self.get_rendition_name(rendition_format), "rb")
+
+    def get_page_preview_name(self, page):
+        """Returns the name of the PNG preview of a page, numbered from 1, in the documents storage"""
+        return self.get_rendition_name(f"page-{page}.{PNG}")
+
+    def open_page_preview(self, page):
+        """Opens the PNG preview of a page, numbered from 1, from the documents storage, for reading"""
+        return get_documents_storage().open(self.get_page_preview_name(page), "rb")
+
+    def render_page_previews(self):
+        """Rasterizes each page of the rendered PDF into a cached PNG preview and returns their number
+
+        Previews fit in PAGE_PREVIEW_SIZE. They are deleted when the PDF is rendered again.
+        """
+        with self.open_rendition(PDF) as file:
+            pages = rasterize_pdf(file.read(), resolution=defaults.PAGE_PREVIEW_RESOLUTION)
+
+        self.delete_page_previews()
+        for page, png in enumerate(pages, start=1):
+            save_rendition(self.get_page_preview_name(page), make_thumbnail(png, defaults.PAGE_PREVIEW_SIZE))
+        self.page_preview_count = len(pages)
+        self.save(update_fields=["page_preview_count"])
+        return self.page_preview_count
+
+    def delete_page_previews(self):
+        """Removes the cached page previews, without saving the document"""
+        storage = get_documents_storage()
+        for page in range(1, (self.page_preview_count or 0) + 1):
+            storage.delete(self.get_page_preview_name(page))
+        self.page_preview_count = None
 
     def expire_files(self):
         """Remove associated rendered files and reset dates to None"""
 
-        if self.rendered_to_pdf_at is not None:
-            # ToDo: delete corresponding file
+        storage = get_documents_storage()
+        for rendition in self.renditions.all():
+            storage.delete(self.get_rendition_name(rendition.format))
+        self.renditions.all().delete()
+
+        if self.rendered_to_pdf_at is not None or self.page_preview_count is not None:
+            self.delete_page_previews()
             self.rendered_to_pdf_at = None
             self.save()
 
@@ -296,8 +713,189 @@ class ReplicatDocument(models.Model):
     def flat_metadata(self):
         return flatten_json(self.metadata)
 
+    def render(self, formats=(PDF,)):
+        """Attempts to render the document in each of the given formats using a single layout pass
+
+        Each rendered format is recorded as a DocumentRendition.
+        If successfull, returns True, otherwise returns False"""
+        if self.issuer is None or not self.issuer.enabled:
+            return False
+
+        document_issuer = self.get_document_issuer()
+        template_fingerprint = document_issuer.get_template_fingerprint()
+
+        try:
+            names = document_issuer.create(formats=formats)
+        except (DocumentIssuerContextValidationError, DocumentIssuerMissingContext) as error:
+            logger.warning("Document %s could not be rendered: %s", self.id, error)
+            return False
+
+        rendered_at = timezone.now()
+        with transaction.atomic():
+            self.context = json.loads(document_issuer.context.json())
+            self.template_fingerprint = template_fingerprint
+            if PDF in names:
+                self.rendered_to_pdf_at = rendered_at
+                # Previews of the previous PDF are outdated
+                self.delete_page_previews()
+            self.save()
+
+            for rendition_format in names:
+                DocumentRendition.objects.update_or_create(
+                    document=self, format=rendition_format, defaults={"rendered_at": rendered_at}
+                )
+            if defaults.SEARCH_INDEX:
+                index_document(self, document_issuer.rendered_html)
+        return True
+
     def render_to_pdf(self):
         """Attempts to render the file to PDF using the id as filename
 
         If successfull, returns True, otherwise returns False"""
-        return False
+        return self.render(formats=(PDF,))
+
+
+class DocumentRendition(models.Model):
+    """Records when a document was last rendered in a given format"""
+
+    FORMAT_CHOICES = (
+        (PDF, _("PDF")),
+        (PNG, _("PNG first page thumbnail")),
+        (HTML, _("Standalone HTML")),
+    )
+
+    id = models.UUIDField(
+        _("ID"),
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+        help_text=_("ID for the Document Rendition as an UUID"),
+    )
+
+    document = models.ForeignKey(
+        ReplicatDocument,
+        verbose_name=_("Document"),
+        related_name="renditions",
+        on_delete=models.CASCADE,
+        help_text=_("The rendered document"),
+    )
+
+    format = models.CharField(
+        _("Format"),
+        max_length=10,
+        choices=FORMAT_CHOICES,
+        help_text=_("File format of this rendition"),
+    )
+
+    rendered_at = models.DateTimeField(
+        _("Rendered at"),
+        help_text=_("Date and time at which the document was last rendered in this format"),
+    )
+
+    def __str__(self):
+        return f"{self.document_id}.{self.format}"
+
+    class Meta:
+        verbose_name = _("Document Rendition")
+        verbose_name_plural = _("Document Renditions")
+
+        unique_together = ("document", "format")
+
+    def get_name(self):
+        """Returns the name of the rendered file in the documents storage"""
+        return self.document.get_rendition_name(self.format)
+
+    def get_path(self):
+        """Returns the path of the rendered file as a pathlib.Path object"""
+        return self.document.get_rendition_path(self.format)
+
+
+class DocumentContextVersion(models.Model):
+    """Records a version of the context and context query of a document
+
+    Versions store either a full snapshot or a JSON Patch delta against the next version, or
+    the current state of the document for the latest version, see replicat_documents.versions.
+    """
+
+    id = models.UUIDField(
+        _("ID"),
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+        help_text=_("ID for the Document Context Version as an UUID"),
+    )
+
+    document = models.ForeignKey(
+        ReplicatDocument,
+        verbose_name=_("Document"),
+        related_name="context_versions",
+        on_delete=models.CASCADE,
+        help_text=_("The versioned document"),
+    )
+
+    number = models.PositiveIntegerField(
+        _("Number"),
+        help_text=_("Number of this version, starting from 1 for each document"),
+    )
+
+    snapshot = models.JSONField(
+        _("Snapshot"),
+        null=True,
+        blank=True,
+        help_text=_("Full context and context query of this version, stored periodically"),
+    )
+
+    delta = models.JSONField(
+        _("Delta"),
+        null=True,
+        blank=True,
+        help_text=_("JSON Patch turning the next version into this one, when there is no snapshot"),
+    )
+
+    created_at = models.DateTimeField(
+        _("Created on"),
+        auto_now_add=True,
+        editable=False,
+        help_text=_("Date and time at which the version was recorded"),
+    )
+
+    def __str__(self):
+        return f"{self.document_id} v{self.number}"
+
+    class Meta:
+        verbose_name = _("Document Context Version")
+        verbose_name_plural = _("Document Context Versions")
+
+        unique_together = ("document", "number")
+
+    def get_state(self):
+        """Returns the context and context query of this version"""
+        return self.document.get_context_version(self.number)
+
+
+class DocumentSearchText(models.Model):
+    """Stores the text of the last rendering of a document, indexed for full-text search"""
+
+    # An integer primary key is the stable rowid the SQLite FTS5 index refers to
+    id = models.AutoField(primary_key=True)
+
+    document = models.OneToOneField(
+        ReplicatDocument,
+        verbose_name=_("Document"),
+        related_name="search_text",
+        on_delete=models.CASCADE,
+        help_text=_("The indexed document"),
+    )
+
+    text = models.TextField(
+        _("Text"),
+        blank=True,
+        help_text=_("Text extracted from the rendered HTML of the document"),
+    )
+
+    def __str__(self):
+        return f"{self.document_id}"
+
+    class Meta:
+        verbose_name = _("Document Search Text")
+        verbose_name_plural = _("Document Search Texts")
@@ -0,0 +1,155 @@
+"""Render policies of document issuers
+
+Each issuer decides when its documents are rendered:
+
+- "lazy" documents are rendered when they are first viewed,
+- "eager" documents are queued for rendering in a background thread as soon as they are
+  issued, once the issuing transaction is committed,
+- "predictive" documents are rendered on first view, or ahead of it by the
+  `prerender_documents` command, which runs while the server has idle capacity and
+  favors the issuers whose documents were viewed the most recently.
+
+Views of predictive documents are counted per issuer and per hour in the cache.
+"""
+
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from replicat_documents import defaults
+from replicat_documents.admission import render_queue
+from replicat_documents.exceptions import RenderQueueFull
+
+logger = logging.getLogger("replicat_documents")
+
+EAGER = "eager"
+LAZY = "lazy"
+PREDICTIVE = "predictive"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Returns the thread pool rendering eager documents in the background"""
+    global _executor  # pylint: disable=global-statement
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=defaults.EAGER_RENDER_WORKERS, thread_name_prefix="replicat-documents-render"
+            )
+        return _executor
+
+
+def render_document(document_id):
+    """Renders a document to PDF through the render queue, unless it is already rendered
+
+    Returns True if the document was rendered. Documents refused by a full render queue are
+    left to be rendered on their first view.
+    """
+    from replicat_documents.models import ReplicatDocument  # pylint: disable=import-outside-toplevel
+
+    document = ReplicatDocument.objects.select_related("issuer").filter(pk=document_id).first()
+    if document is None or document.rendered_to_pdf_at is not None:
+        return False
+
+    try:
+        with render_queue.admit(document.issuer.label):
+            return document.render_to_pdf()
+    except RenderQueueFull as error:
+        logger.info("Document %s will be rendered on its first view: %s", document_id, error)
+        return False
+
+
+def render_document_in_background(document_id):
+    try:
+        render_document(document_id)
+    except Exception:  # pylint: disable=broad-except
+        logger.exception("Document %s could not be rendered in the background", document_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_render(document_id):
+    """Queues the rendering of a document in the background thread pool"""
+    return get_executor().submit(render_document_in_background, document_id)
+
+
+# pylint: disable=unused-argument
+def queue_eager_render(sender, instance, created, raw=False, using=None, **kwargs):
+    """Receiver of `post_save` queuing the rendering of new documents of eager issuers"""
+    if not created or raw or instance.issuer_id is None or instance.issuer.render_policy != EAGER:
+        return
+    transaction.on_commit(functools.partial(schedule_render, instance.pk), using=using)
+
+
+def queue_eager_renders(documents, using=None):
+    """Queues the rendering of the documents of eager issuers once the current transaction is committed
+
+    Used for documents created without a `post_save` signal, e.g. by `bulk_create`.
+    """
+    for document in documents:
+        if document.issuer_id is not None and document.issuer.render_policy == EAGER:
+            transaction.on_commit(functools.partial(schedule_render, document.pk), using=using)
+
+
+def get_access_key(issuer_id, hour):
+    return f"replicat_documents:issuer_views:{issuer_id}:{hour}"
+
+
+def get_current_hour():
+    return int(timezone.now().timestamp() // 3600)
+
+
+def record_access(issuer):
+    """Counts a view of a document of a predictive issuer"""
+    if issuer.render_policy != PREDICTIVE:
+        return
+
+    key = get_access_key(issuer.pk, get_current_hour())
+    cache.add(key, 0, timeout=(defaults.ACCESS_STATS_HOURS + 1) * 3600)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The key was evicted since it was added
+        pass
+
+
+def get_access_counts(issuers):
+    """Returns the {issuer pk: number of views} of the given issuers over the last ACCESS_STATS_HOURS hours"""
+    hour = get_current_hour()
+    keys = {
+        get_access_key(issuer.pk, hour - age): issuer.pk
+        for issuer in issuers
+        for age in range(defaults.ACCESS_STATS_HOURS)
+    }
+    counts = {issuer.pk: 0 for issuer in issuers}
+    for key, count in cache.get_many(keys).items():
+        counts[keys[key]] += count
+    return counts
+
+
+def get_predictive_issuers():
+    """Returns the enabled predictive issuers, the most viewed ones first"""
+    from replicat_documents.models import DocumentIssuerChoice  # pylint: disable=import-outside-toplevel
+
+    issuers = list(DocumentIssuerChoice.objects.enabled().filter(render_policy=PREDICTIVE).order_by("label"))
+    counts = get_access_counts(issuers)
+    return sorted(issuers, key=lambda issuer: counts[issuer.pk], reverse=True)
+
+
+def is_idle(max_load=None):
+    """Returns True if the 1-minute load average per CPU is below `max_load`, or PRERENDER_MAX_LOAD"""
+    max_load = defaults.PRERENDER_MAX_LOAD if max_load is None else max_load
+    try:
+        load = os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        # The load average is not available on every platform
+        return True
+    return load < max_load
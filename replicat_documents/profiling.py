@@ -0,0 +1,84 @@
+"""Per-request profiling of SQL queries, cache lookups and wall time"""
+
+import time
+from contextlib import ExitStack, contextmanager
+
+from asgiref.local import Local
+from django.db import connections
+
+_state = Local()
+
+
+def get_current_profile():
+    """Returns the RequestProfile being recorded in the current context, if any"""
+    return getattr(_state, "profile", None)
+
+
+def record_cache_lookup(hit):
+    """Records a cache hit or miss on the current RequestProfile, if any"""
+    profile = get_current_profile()
+    if profile is None:
+        return
+    if hit:
+        profile.cache_hits += 1
+    else:
+        profile.cache_misses += 1
+
+
+class RequestProfile:
+    """Collects SQL query count and time, cache hits and misses and wall time"""
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.wall_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper timing each query"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_time += time.perf_counter() - start
+
+    @contextmanager
+    def record(self):
+        """Records the queries, cache lookups and wall time of the wrapped block"""
+        previous_profile = get_current_profile()
+        _state.profile = self
+        start = time.perf_counter()
+
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(self))
+                yield self
+        finally:
+            self.wall_time += time.perf_counter() - start
+            _state.profile = previous_profile
+
+    def as_dict(self):
+        return {
+            "queries": self.queries,
+            "query_time": self.query_time,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "wall_time": self.wall_time,
+        }
+
+    def exceeded(self, budget):
+        """Returns a dictionary of the {metric: (value, limit)} exceeding the given budget"""
+        values = self.as_dict()
+        return {
+            metric: (values[metric], limit)
+            for metric, limit in budget.items()
+            if limit is not None and values[metric] > limit
+        }
+
+
+def format_exceeded(exceeded):
+    """Returns a human readable description of exceeded budget metrics"""
+    return ", ".join(f"{metric} {value:g} > {limit:g}" for metric, (value, limit) in sorted(exceeded.items()))
@@ -0,0 +1,138 @@
+"""Hot reload of document issuers
+
+Issuer modules are discovered once per process by `get_document_issuers`. Reloading clears
+that cache, imports new and modified issuer modules again, registers the issuers as
+DocumentIssuerChoice instances and refreshes the issuer cache, so that issuers can be added,
+changed or removed without restarting the process.
+
+With the REPLICAT_DOCUMENTS_WATCH_ISSUERS setting, each process watches the issuers/documents
+directory of the installed applications and reloads issuers when their modules change. The
+watchgod package is used when it is installed, or else the directories are polled.
+"""
+
+import importlib
+import importlib.util
+import logging
+import os
+import sys
+import threading
+
+from django.apps import apps
+from django.db import close_old_connections
+
+from replicat_documents import defaults
+from replicat_documents.apps import find_document_issuers, get_document_issuers, register_issuer_objects
+
+logger = logging.getLogger("replicat_documents")
+
+_reload_lock = threading.Lock()
+_module_mtimes = {}
+
+
+def get_issuers_directories():
+    """Returns the existing issuers/documents directories of the installed applications"""
+    directories = [os.path.join(app_config.path, "issuers", "documents") for app_config in apps.get_app_configs()]
+    return [directory for directory in directories if os.path.isdir(directory)]
+
+
+def get_issuer_module_mtimes():
+    """Returns a {module name: modification time} dictionary of the issuer modules"""
+    mtimes = {}
+    for app_config in apps.get_app_configs():
+        issuers_dir = os.path.join(app_config.path, "issuers")
+        for name in find_document_issuers(issuers_dir):
+            path = os.path.join(issuers_dir, "documents", f"{name}.py")
+            try:
+                mtimes[f"{app_config.name}.issuers.documents.{name}"] = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+    return mtimes
+
+
+def reload_issuers():
+    """Reloads the issuer modules and registers the issuers
+
+    Returns an {"added": [...], "reloaded": [...], "removed": [...]} dictionary of the
+    module names which changed since the previous reload, or since they were imported.
+    """
+    from replicat_documents.models import DocumentIssuerChoice  # pylint: disable=import-outside-toplevel
+
+    with _reload_lock:
+        mtimes = get_issuer_module_mtimes()
+        changes = {"added": [], "reloaded": [], "removed": []}
+
+        for name, mtime in mtimes.items():
+            module = sys.modules.get(name)
+            if module is None:
+                changes["added"].append(name)
+            elif mtime != _module_mtimes.get(name, _get_loaded_mtime(module)):
+                importlib.reload(module)
+                changes["reloaded"].append(name)
+
+        for name in set(_module_mtimes) - set(mtimes):
+            sys.modules.pop(name, None)
+            changes["removed"].append(name)
+
+        _module_mtimes.clear()
+        _module_mtimes.update(mtimes)
+
+        importlib.invalidate_caches()
+        get_document_issuers.cache_clear()
+        register_issuer_objects(sender=None, document_issuers=get_document_issuers())
+        DocumentIssuerChoice.objects.set_cached_instances()
+
+    logger.info("Reloaded document issuers: %s", changes)
+    return changes
+
+
+def _get_loaded_mtime(module):
+    """Returns the modification time of the file a module was loaded from, or None"""
+    try:
+        return os.stat(module.__file__).st_mtime_ns if module.__file__ else None
+    except OSError:
+        return None
+
+
+def watch_issuers(stop_event=None):
+    """Reloads issuers whenever issuer modules change, until `stop_event` is set"""
+    stop_event = stop_event or threading.Event()
+
+    if importlib.util.find_spec("watchgod") is not None:
+        import watchgod  # pylint: disable=import-outside-toplevel
+
+        def watch_directory(directory):
+            for _ in watchgod.watch(directory, stop_event=stop_event):
+                _reload_safely()
+
+        threads = [
+            threading.Thread(target=watch_directory, args=(directory,), daemon=True)
+            for directory in get_issuers_directories()
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return
+
+    mtimes = get_issuer_module_mtimes()
+    while not stop_event.wait(defaults.WATCH_ISSUERS_INTERVAL):
+        current_mtimes = get_issuer_module_mtimes()
+        if current_mtimes != mtimes:
+            mtimes = current_mtimes
+            _reload_safely()
+
+
+def _reload_safely():
+    try:
+        reload_issuers()
+    except Exception:  # pylint: disable=broad-except
+        logger.exception("Could not reload document issuers")
+    finally:
+        close_old_connections()
+
+
+def start_watching_issuers():
+    """Watches issuer modules in a background thread and returns the thread"""
+    thread = threading.Thread(target=watch_issuers, name="replicat-documents-issuers-watcher", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,417 @@
+"""Renderer backends laying out rendered templates as PDF documents
+
+The renderer backend is selected with the REPLICAT_DOCUMENTS_RENDERER setting and
+initialized with the REPLICAT_DOCUMENTS_RENDERER_OPTIONS keyword arguments. One renderer
+instance is created per process, so that its startup cost is paid once per worker rather
+than once per document.
+
+Renderers lay out each document once to produce all of its requested renditions.
+"""
+
+import atexit
+import base64
+import functools
+import importlib.util
+import io
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.utils.module_loading import import_string
+
+from replicat_documents import defaults
+from replicat_documents.exceptions import RendererUnavailable, UnsupportedRenditionFormat
+from replicat_documents.fetchers import static_file_fetcher
+
+logger = logging.getLogger("replicat_documents")
+
+# Rendition formats
+PDF = "pdf"
+PNG = "png"
+HTML = "html"
+
+_renderers = {}
+_renderers_lock = threading.Lock()
+
+
+def get_renderer():
+    """Returns the configured renderer instance of the current process"""
+    key = (os.getpid(), defaults.RENDERER)
+
+    with _renderers_lock:
+        renderer = _renderers.get(key)
+        if renderer is None:
+            renderer = _renderers[key] = import_string(defaults.RENDERER)(**defaults.RENDERER_OPTIONS)
+        return renderer
+
+
+def close_renderers():
+    """Closes the renderer instances of the current process"""
+    with _renderers_lock:
+        for key in [key for key in _renderers if key[0] == os.getpid()]:
+            _renderers.pop(key).close()
+
+
+atexit.register(close_renderers)
+
+
+def get_standalone_html(html, css):
+    """Returns a standalone HTML page embedding the CSS"""
+    return (
+        '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+        f"<style>\n{css}\n</style>\n</head>\n<body>\n{html}\n</body>\n</html>\n"
+    )
+
+
+def make_thumbnail(png, size=None):
+    """Returns a PNG thumbnail, fitting in `size` or THUMBNAIL_SIZE, of a PNG image"""
+    from PIL import Image  # pylint: disable=import-outside-toplevel
+
+    image = Image.open(io.BytesIO(png))
+    image.thumbnail(size or defaults.THUMBNAIL_SIZE)
+    output = io.BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+
+def is_rasterizer_available():
+    """Returns True if poppler's pdftoppm rasterizer is installed"""
+    return shutil.which("pdftoppm") is not None
+
+
+def rasterize_pdf(pdf, first_page=1, last_page=None, resolution=72, timeout=60):
+    """Returns the list of PNG images of the pages of a PDF document, using poppler's pdftoppm"""
+    with tempfile.TemporaryDirectory() as directory:
+        source = Path(directory, "document.pdf")
+        source.write_bytes(pdf)
+
+        arguments = ["pdftoppm", "-png", "-r", str(resolution), "-f", str(first_page)]
+        if last_page is not None:
+            arguments += ["-l", str(last_page)]
+        # capture_output is only available from Python 3.7
+        subprocess.run(
+            arguments + [str(source), str(Path(directory, "page"))],
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=timeout,
+        )
+
+        # Page numbers are zero-padded to the same width, e.g. page-01.png to page-12.png
+        return [path.read_bytes() for path in sorted(Path(directory).glob("page-*.png"))]
+
+
+def is_linearizer_available():
+    """Returns True if the qpdf command line tool is installed"""
+    return shutil.which("qpdf") is not None
+
+
+@functools.lru_cache(maxsize=None)
+def warn_linearizer_unavailable():
+    logger.warning("PDF documents are not linearized, qpdf is not installed")
+
+
+def linearize_pdf(pdf, timeout=60):
+    """Returns the linearized ("fast web view") version of a PDF document, using qpdf
+
+    Linearized PDFs start with the objects of their first page, so that viewers reading
+    them with HTTP range requests can show it before the whole file is downloaded.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        source, target = Path(directory, "document.pdf"), Path(directory, "linearized.pdf")
+        source.write_bytes(pdf)
+        # qpdf exits with 3 when it succeeds with warnings
+        result = subprocess.run(
+            ["qpdf", "--linearize", str(source), str(target)],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=timeout,
+        )
+        if result.returncode not in (0, 3):
+            raise subprocess.CalledProcessError(result.returncode, result.args, result.stdout, result.stderr)
+        return target.read_bytes()
+
+
+class BaseRenderer:
+    """Base renderer backend.
+
+    To define a new renderer backend, one should inherit from this class and implement the
+    `layout` method, returning the rendered document in each of the requested formats
+    listed in `formats`. Standalone HTML renditions are provided by this base class.
+    """
+
+    formats = (PDF,)
+
+    @classmethod
+    def is_available(cls):
+        """Returns False when the renderer dependencies are not installed"""
+        return True
+
+    def layout(self, html: str, css: str, formats, metadata: dict = None) -> dict:
+        """Lays out the HTML with the CSS once and returns a {format: bytes} dictionary"""
+        raise NotImplementedError
+
+    def render(self, html: str, css: str, formats=(PDF,), metadata: dict = None) -> dict:
+        """Returns a {format: bytes} dictionary of the document rendered in each of the formats"""
+        unsupported = set(formats) - set(self.formats) - {HTML}
+        if unsupported:
+            raise UnsupportedRenditionFormat(
+                f"{self.__class__.__name__} cannot render {', '.join(sorted(unsupported))} renditions"
+            )
+
+        layout_formats = [rendition_format for rendition_format in formats if rendition_format != HTML]
+        renditions = self.layout(html, css, layout_formats, metadata=metadata) if layout_formats else {}
+        if PDF in renditions and defaults.LINEARIZE_PDF:
+            if is_linearizer_available():
+                renditions[PDF] = linearize_pdf(renditions[PDF])
+            else:
+                warn_linearizer_unavailable()
+        if HTML in formats:
+            renditions[HTML] = get_standalone_html(html, css).encode()
+        return renditions
+
+    def render_pdf(self, html: str, css: str, metadata: dict = None) -> bytes:
+        """Lays out the HTML with the CSS and returns the PDF document as bytes"""
+        return self.render(html, css, formats=(PDF,), metadata=metadata)[PDF]
+
+    def warm_up(self):
+        """Pays the renderer startup cost ahead of the first document"""
+
+    def close(self):
+        """Releases the renderer resources"""
+
+
+class WeasyPrintRenderer(BaseRenderer):
+    """In-process HTML to PDF renderer using WeasyPrint
+
+    PNG thumbnails are rasterized from the first page of the PDF document, and require
+    poppler's pdftoppm to be installed.
+
+    The font configuration is created once per thread and reused across documents, so that
+    fonts shared by every document of a batch are only loaded once.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def get_font_config(self):
+        """Returns the font configuration of the current thread"""
+        font_config = getattr(self._local, "font_config", None)
+        if font_config is None:
+            from weasyprint.text.fonts import FontConfiguration  # pylint: disable=import-outside-toplevel
+
+            font_config = self._local.font_config = FontConfiguration()
+        return font_config
+
+    @classmethod
+    def is_available(cls):
+        # WeasyPrint raises OSError on import when its Pango system libraries are missing
+        try:
+            import weasyprint  # noqa pylint: disable=import-outside-toplevel,unused-import
+        except (ImportError, OSError):
+            return False
+        return True
+
+    @property
+    def formats(self):
+        return (PDF, PNG) if is_rasterizer_available() else (PDF,)
+
+    def layout(self, html, css, formats, metadata=None):
+        from weasyprint import CSS, HTML  # pylint: disable=import-outside-toplevel
+
+        font_config = self.get_font_config()
+        # Assets of both the HTML and the CSS, e.g. images and @font-face fonts, are read
+        # through the static file cache
+        stylesheet = CSS(string=css, font_config=font_config, url_fetcher=static_file_fetcher)
+        document = HTML(string=html, url_fetcher=static_file_fetcher).render(
+            stylesheets=[stylesheet], font_config=font_config
+        )
+        for key, value in (metadata or {}).items():
+            setattr(document.metadata, key, value)
+
+        pdf = document.write_pdf(zoom=1)
+        renditions = {}
+        if PDF in formats:
+            renditions[PDF] = pdf
+        if PNG in formats:
+            renditions[PNG] = make_thumbnail(rasterize_pdf(pdf, last_page=1)[0])
+        return renditions
+
+    def warm_up(self):
+        self.get_font_config()
+
+
+def get_process_tree_rss(pid):
+    """Returns the resident memory in bytes of a process and its descendants, or None
+
+    Relies on the Linux /proc filesystem.
+    """
+    try:
+        rss = int(Path(f"/proc/{pid}/statm").read_text().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        children = Path(f"/proc/{pid}/task/{pid}/children").read_text().split()
+    except (OSError, ValueError, IndexError):
+        return None
+
+    for child in children:
+        rss += get_process_tree_rss(int(child)) or 0
+    return rss
+
+
+class BrowserSession:
+    """A headless browser session with the number of pages it has rendered"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+
+    def get_memory_usage(self):
+        """Returns the resident memory in bytes of the browser processes, or None"""
+        process = getattr(self.driver.service, "process", None)
+        return get_process_tree_rss(process.pid) if process is not None else None
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Could not quit the browser session")
+
+
+class BrowserPoolRenderer(BaseRenderer):
+    """Renderer printing documents with a pool of warm headless Chrome sessions
+
+    PNG thumbnails are captured from the first screen of the same page load as the PDF.
+
+    Sessions are started on demand up to `size` and reused across documents. A session is
+    recycled once it has rendered `max_pages` documents or once the memory of its browser
+    processes exceeds `max_memory` bytes. Rendering waits up to `timeout` seconds for a
+    session to be available.
+    """
+
+    formats = (PDF, PNG)
+
+    def __init__(self, size=2, max_pages=100, max_memory=512 * 1024 * 1024, timeout=30, arguments=None, **kwargs):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_memory = max_memory
+        self.timeout = timeout
+        self.arguments = arguments or ["--headless", "--disable-gpu", "--disable-dev-shm-usage"]
+        self.driver_kwargs = kwargs
+
+        self._sessions = queue.LifoQueue()
+        self._started = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def is_available(cls):
+        return importlib.util.find_spec("selenium") is not None
+
+    def start_session(self):
+        """Starts a new headless Chrome session"""
+        from selenium.webdriver import Chrome, ChromeOptions  # pylint: disable=import-outside-toplevel
+
+        options = ChromeOptions()
+        for argument in self.arguments:
+            options.add_argument(argument)
+        return BrowserSession(Chrome(options=options, **self.driver_kwargs))
+
+    def _try_start_session(self):
+        """Starts and returns a new session if the pool is not full, or returns None"""
+        with self._lock:
+            if self._started >= self.size:
+                return None
+            self._started += 1
+
+        try:
+            return self.start_session()
+        except Exception:
+            with self._lock:
+                self._started -= 1
+            raise
+
+    def acquire(self):
+        """Returns an idle session, starting a new one if the pool is not full
+
+        Raises RendererUnavailable if no session is available within `timeout` seconds.
+        """
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            try:
+                return self._sessions.get_nowait()
+            except queue.Empty:
+                pass
+
+            session = self._try_start_session()
+            if session is not None:
+                return session
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RendererUnavailable(f"No browser session available after {self.timeout} seconds")
+
+            # Sessions may be recycled while waiting, so check again for room in the pool regularly
+            try:
+                return self._sessions.get(timeout=min(remaining, 0.5))
+            except queue.Empty:
+                continue
+
+    def release(self, session, discard=False):
+        """Returns a session to the pool, or quits it if it should be recycled"""
+        memory = session.get_memory_usage() if self.max_memory else None
+
+        if discard or session.pages >= self.max_pages or (memory is not None and memory > self.max_memory):
+            logger.debug("Recycling browser session after %s pages (%s bytes)", session.pages, memory)
+            session.quit()
+            with self._lock:
+                self._started -= 1
+            return
+
+        self._sessions.put(session)
+
+    def layout(self, html, css, formats, metadata=None):
+        session = self.acquire()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "document.html")
+            path.write_text(get_standalone_html(html, css), encoding="utf-8")
+
+            try:
+                session.driver.get(path.as_uri())
+                renditions = {}
+                if PDF in formats:
+                    result = session.driver.execute_cdp_cmd(
+                        "Page.printToPDF", {"printBackground": True, "preferCSSPageSize": True}
+                    )
+                    renditions[PDF] = base64.b64decode(result["data"])
+                if PNG in formats:
+                    result = session.driver.execute_cdp_cmd("Page.captureScreenshot", {"format": "png"})
+                    renditions[PNG] = make_thumbnail(base64.b64decode(result["data"]))
+            except Exception:
+                self.release(session, discard=True)
+                raise
+
+        session.pages += 1
+        self.release(session)
+        return renditions
+
+    def warm_up(self):
+        session = self._try_start_session()
+        while session is not None:
+            self._sessions.put(session)
+            session = self._try_start_session()
+
+    def close(self):
+        while True:
+            try:
+                session = self._sessions.get_nowait()
+            except queue.Empty:
+                break
+            session.quit()
+            with self._lock:
+                self._started -= 1
@@ -0,0 +1,75 @@
+"""Database router sending document reads to read replicas
+
+Add "replicat_documents.routers.ReplicaRouter" to the DATABASE_ROUTERS setting and list the
+replica database aliases in REPLICAT_DOCUMENTS_READ_REPLICAS. Reads of the application
+models are then spread across the replicas, while writes go to the primary database.
+
+Once a document or an issuer is written, reads of the current thread or async context stick
+to the primary database for REPLICAT_DOCUMENTS_READ_REPLICA_STICKY_SECONDS, so that they are
+not served stale data by a lagging replica. ReplicaStickinessMiddleware extends this window
+to the following requests of the same client.
+"""
+
+import random
+import time
+
+from asgiref.local import Local
+from django.db import DEFAULT_DB_ALIAS
+
+from replicat_documents import defaults
+
+APP_LABEL = "replicat_documents"
+
+_state = Local()
+
+
+def pin_to_primary(until=None):
+    """Sticks reads of the current context to the primary database until the given timestamp
+
+    Defaults to READ_REPLICA_STICKY_SECONDS from now. An earlier timestamp than the current
+    one is ignored.
+    """
+    if until is None:
+        until = time.time() + defaults.READ_REPLICA_STICKY_SECONDS
+    _state.pinned_until = max(until, get_pinned_until())
+
+
+def get_pinned_until():
+    """Returns the timestamp until which reads of the current context stick to the primary database"""
+    return getattr(_state, "pinned_until", 0)
+
+
+def unpin():
+    _state.pinned_until = 0
+
+
+def is_pinned_to_primary():
+    return get_pinned_until() > time.time()
+
+
+class ReplicaRouter:
+    """Routes reads of the application models to the read replicas, except after a write"""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label != APP_LABEL or not defaults.READ_REPLICAS:
+            return None
+        if is_pinned_to_primary():
+            return DEFAULT_DB_ALIAS
+        return random.choice(defaults.READ_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label != APP_LABEL:
+            return None
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary database
+        if obj1._meta.app_label == APP_LABEL or obj2._meta.app_label == APP_LABEL:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label == APP_LABEL and db in defaults.READ_REPLICAS:
+            return False
+        return None
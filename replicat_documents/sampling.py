@@ -0,0 +1,115 @@
+"""Profiling of a sample of render jobs
+
+A fraction of the render jobs of each issuer, set with the RENDER_PROFILING_RATES and
+RENDER_PROFILING_RATE settings, is profiled from context fetching to file writing. Profiles
+are written to RENDER_PROFILING_DIR, named after the issuer label and document identifier:
+
+- the "sampling" profiler records the stack of the rendering thread every
+  RENDER_PROFILING_INTERVAL seconds from a background thread, and writes the collapsed
+  stacks (`.folded`) read by flamegraph.pl, inferno or speedscope,
+- the "cprofile" profiler traces every call with cProfile and writes `.prof` statistics,
+  read by pstats, snakeviz or flameprof.
+
+When the rate of an issuer is 0, render jobs only pay for a dictionary lookup.
+"""
+
+import cProfile
+import logging
+import random
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.utils import timezone
+from django.utils.text import slugify
+
+from replicat_documents import defaults
+
+logger = logging.getLogger("replicat_documents")
+
+SAMPLING = "sampling"
+CPROFILE = "cprofile"
+
+
+def get_profiling_rate(issuer):
+    """Returns the fraction of the render jobs of an issuer, by label, which are profiled"""
+    return defaults.RENDER_PROFILING_RATES.get(issuer, defaults.RENDER_PROFILING_RATE)
+
+
+def collapse_stack(frame):
+    """Returns the stack ending with `frame` in the collapsed format, from the outermost call"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})".replace(";", ":"))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """Counts the collapsed stacks of a thread, sampled at a fixed interval from a background thread"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="replicat-documents-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)  # pylint: disable=protected-access
+            if frame is not None:
+                self.stacks[collapse_stack(frame)] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+def get_profile_path(issuer, identifier, extension):
+    """Returns the path of a new profile of a render job in RENDER_PROFILING_DIR"""
+    directory = Path(defaults.RENDER_PROFILING_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    timestamp = timezone.now().strftime("%Y%m%dT%H%M%S%f")
+    return directory / f"{slugify(issuer)}_{identifier}_{timestamp}.{extension}"
+
+
+@contextmanager
+def profile_render(issuer, identifier):
+    """Profiles the wrapped render job if it is part of the sample of its issuer"""
+    rate = get_profiling_rate(issuer)
+    if not rate or random.random() >= rate:
+        yield
+        return
+
+    if defaults.RENDER_PROFILER == CPROFILE:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            path = get_profile_path(issuer, identifier, "prof")
+            profiler.dump_stats(path)
+    else:
+        sampler = StackSampler(threading.get_ident(), defaults.RENDER_PROFILING_INTERVAL)
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            path = get_profile_path(issuer, identifier, "folded")
+            sampler.write(path)
+
+    logger.debug("Render job of document %s profiled in %s", identifier, path)
@@ -0,0 +1,107 @@
+"""Full-text search over the rendered text of documents
+
+The text of the rendered HTML is extracted when a document is rendered and stored as a
+DocumentSearchText. It is indexed with an expression GIN index over its `tsvector` on
+PostgreSQL, and with an FTS5 table kept in sync by triggers on SQLite, see the
+0007_documentsearchtext migration. Other databases fall back to a case-insensitive scan.
+"""
+
+import re
+from html.parser import HTMLParser
+
+from django.db import connections
+from django.db.models import FloatField, Value
+from django.db.models.expressions import RawSQL
+
+# Text search configuration of the PostgreSQL GIN index, which queries have to use as well
+SEARCH_CONFIG = "simple"
+
+# Name of the FTS5 table indexing the search texts on SQLite
+FTS5_TABLE = "replicat_documents_documentsearchtext_fts"
+
+
+class HTMLTextExtractor(HTMLParser):
+    """Collects the text of an HTML document, leaving out the content of style and script elements"""
+
+    skipped_tags = ("script", "style", "title")
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.chunks = []
+        self._skipped = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.skipped_tags:
+            self._skipped += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.skipped_tags and self._skipped:
+            self._skipped -= 1
+
+    def handle_data(self, data):
+        if not self._skipped:
+            self.chunks.append(data)
+
+
+def extract_text(html):
+    """Returns the visible text of an HTML document, with whitespace collapsed"""
+    extractor = HTMLTextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return re.sub(r"\s+", " ", " ".join(extractor.chunks)).strip()
+
+
+def index_document(document, html):
+    """Stores the text extracted from the rendered HTML of a document in the search index"""
+    from replicat_documents.models import DocumentSearchText  # pylint: disable=import-outside-toplevel
+
+    DocumentSearchText.objects.update_or_create(document=document, defaults={"text": extract_text(html)})
+
+
+def get_fts5_query(query):
+    """Returns an FTS5 query matching all the terms of a user query, quoted to escape FTS5 syntax"""
+    return " ".join('"{}"'.format(term.replace('"', '""')) for term in query.split())
+
+
+def search(queryset, query):
+    """Filters the documents of `queryset` whose rendered text matches all the terms of `query`
+
+    Documents are annotated with a `search_rank`, higher for better matches, and ordered by it.
+    """
+    from replicat_documents.models import DocumentSearchText  # pylint: disable=import-outside-toplevel
+
+    if not query.split():
+        return queryset.none()
+
+    vendor = connections[queryset.db].vendor
+    text_table = DocumentSearchText._meta.db_table
+    document_table = queryset.model._meta.db_table
+
+    if vendor == "postgresql":
+        vector = f"to_tsvector('{SEARCH_CONFIG}', texts.text)"
+        tsquery = f"plainto_tsquery('{SEARCH_CONFIG}', %s)"
+        matches = RawSQL(f"SELECT texts.document_id FROM {text_table} texts WHERE {vector} @@ {tsquery}", [query])
+        rank = RawSQL(
+            f"SELECT ts_rank({vector}, {tsquery}) FROM {text_table} texts "
+            f"WHERE texts.document_id = {document_table}.id",
+            [query],
+            output_field=FloatField(),
+        )
+    elif vendor == "sqlite":
+        fts_query = get_fts5_query(query)
+        matching = f"FROM {FTS5_TABLE} JOIN {text_table} texts ON texts.id = {FTS5_TABLE}.rowid"
+        matches = RawSQL(f"SELECT texts.document_id {matching} WHERE {FTS5_TABLE} MATCH %s", [fts_query])
+        # bm25() is lower for better matches
+        rank = RawSQL(
+            f"SELECT -bm25({FTS5_TABLE}) {matching} "
+            f"WHERE {FTS5_TABLE} MATCH %s AND texts.document_id = {document_table}.id",
+            [fts_query],
+            output_field=FloatField(),
+        )
+    else:
+        queryset = queryset.filter(search_text__isnull=False)
+        for term in query.split():
+            queryset = queryset.filter(search_text__text__icontains=term)
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    return queryset.filter(pk__in=matches).annotate(search_rank=rank).order_by("-search_rank")
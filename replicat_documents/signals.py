@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent when a stage of the render pipeline completes.
+# Arguments: "issuer" (issuer label), "stage", "duration" (in seconds), "identifier"
+render_stage_finished = Signal()
@@ -0,0 +1,70 @@
+"""Storage of the rendered document files
+
+Rendered files are written through the Django storage backend configured with the
+REPLICAT_DOCUMENTS_DOCUMENTS_STORAGE setting, so that they can live on the local filesystem
+or in an object store. Their names are spread across hashed directories, e.g.
+"3f/a2/<uuid>.pdf", so that no directory holds millions of files.
+"""
+
+import hashlib
+import threading
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.utils.module_loading import import_string
+
+from replicat_documents import defaults
+
+_storages = {}
+_storages_lock = threading.Lock()
+
+
+def get_documents_storage():
+    """Returns the configured storage instance of rendered documents"""
+    key = (defaults.DOCUMENTS_STORAGE, repr(defaults.DOCUMENTS_STORAGE_OPTIONS), str(defaults.DOCUMENTS_ROOT))
+
+    with _storages_lock:
+        storage = _storages.get(key)
+        if storage is None:
+            storage_class = import_string(defaults.DOCUMENTS_STORAGE)
+            options = dict(defaults.DOCUMENTS_STORAGE_OPTIONS)
+            if issubclass(storage_class, FileSystemStorage):
+                options.setdefault("location", defaults.DOCUMENTS_ROOT)
+            storage = _storages[key] = storage_class(**options)
+        return storage
+
+
+def get_rendition_name(identifier, rendition_format, fanout=None):
+    """Returns the storage name of a document rendition, e.g. "3f/a2/<identifier>.pdf"
+
+    Directory names are taken from the SHA-256 digest of the identifier, over `fanout`
+    levels which default to DOCUMENTS_STORAGE_FANOUT. A `fanout` of 0 returns the flat
+    "<identifier>.pdf" layout.
+    """
+    fanout = defaults.DOCUMENTS_STORAGE_FANOUT if fanout is None else fanout
+    digest = hashlib.sha256(str(identifier).encode()).hexdigest()
+    directories = [digest[start:][:2] for start in range(0, fanout * 2, 2)]
+    return "/".join(directories + [f"{identifier}.{rendition_format}"])
+
+
+def save_rendition(name, content):
+    """Writes a rendition, replacing any previous version, and returns its storage name
+
+    `content` is either bytes or a File. Storage backends read Files in chunks, so that
+    object stores can upload large files in several parts.
+    """
+    storage = get_documents_storage()
+    if isinstance(content, bytes):
+        content = ContentFile(content)
+    if storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, content)
+
+
+def move_rendition(old_name, new_name):
+    """Moves a rendition to a new storage name, copying it in chunks, and returns the new name"""
+    storage = get_documents_storage()
+    with storage.open(old_name, "rb") as file:
+        name = save_rendition(new_name, file)
+    storage.delete(old_name)
+    return name
@@ -0,0 +1,34 @@
+"""Test helpers for projects using replicat-documents"""
+
+from contextlib import contextmanager
+
+from replicat_documents.profiling import RequestProfile, format_exceeded
+
+
+@contextmanager
+def assert_within_budget(queries=None, query_time=None, cache_misses=None, wall_time=None):
+    """Fails with an AssertionError if the wrapped block exceeds the given budget
+
+    Example:
+        with assert_within_budget(queries=2):
+            self.client.get(document.get_absolute_url())
+    """
+    profile = RequestProfile()
+    with profile.record():
+        yield profile
+
+    exceeded = profile.exceeded(
+        {"queries": queries, "query_time": query_time, "cache_misses": cache_misses, "wall_time": wall_time}
+    )
+    if exceeded:
+        raise AssertionError(f"Budget exceeded: {format_exceeded(exceeded)}")
+
+
+def assert_view_within_budget(client, url, queries=None, query_time=None, cache_misses=None, wall_time=None):
+    """Requests `url` with the test client and asserts the request stays within the given budget
+
+    Returns the response.
+    """
+    with assert_within_budget(queries=queries, query_time=query_time, cache_misses=cache_misses, wall_time=wall_time):
+        response = client.get(url)
+    return response
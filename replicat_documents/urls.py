@@ -1,10 +1,23 @@
 from django.urls import path
 
-from replicat_documents import views
+from replicat_documents import defaults, views
 
 app_name = "replicat_documents"
 
+if defaults.ASYNC_VIEWS:
+    document_view_html, document_view_pdf = views.document_view_html_async, views.document_view_pdf_async
+else:
+    document_view_html, document_view_pdf = views.document_view_html, views.document_view_pdf
+
 urlpatterns = [
-    path("documents/<uuid:id>", views.document_view_html, name="document_view_html"),
-    path("documents/<uuid:id>.pdf", views.document_view_pdf, name="document_view_df"),
+    path("documents/export.<str:export_format>", views.documents_export_view, name="documents_export"),
+    path("documents/<uuid:id>", document_view_html, name="document_view_html"),
+    path("documents/<uuid:id>.pdf", document_view_pdf, name="document_view_pdf"),
+    path(
+        "documents/<uuid:id>/pages/<int:page>.png",
+        views.document_view_page_preview,
+        name="document_view_page_preview",
+    ),
+    path("metrics", views.metrics_view, name="metrics"),
+    path("ready", views.readiness_view, name="readiness"),
 ]
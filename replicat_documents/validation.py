@@ -0,0 +1,83 @@
+"""Bulk validation of context query payloads
+
+Payloads are validated against an issuer's context query model without writing anything.
+Rows are sent in chunks to a pool of worker processes and their results are yielded in
+input order as soon as their chunk is validated, so that large batches are neither held in
+memory nor validated by a single process.
+"""
+
+import collections
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from pydantic.error_wrappers import ValidationError
+
+ValidationResult = collections.namedtuple("ValidationResult", ["row", "errors"])
+ValidationResult.__doc__ = """Validation result of a payload, `errors` being an empty list when it is valid"""
+
+
+def validate_context_query(context_query_model, payload):
+    """Returns the list of pydantic errors of a JSON string or dictionary payload"""
+    try:
+        if isinstance(payload, (str, bytes)):
+            context_query_model.parse_raw(payload)
+        else:
+            context_query_model.parse_obj(payload)
+    except ValidationError as error:
+        return error.errors()
+    return []
+
+
+def validate_chunk(context_query_model, chunk):
+    """Validates a list of (row, payload) tuples and returns their ValidationResult list"""
+    return [ValidationResult(row, validate_context_query(context_query_model, payload)) for row, payload in chunk]
+
+
+def iter_chunks(payloads, chunk_size, start=1):
+    """Yields lists of at most `chunk_size` (row, payload) tuples, rows being numbered from `start`"""
+    rows = enumerate(payloads, start=start)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def validate_context_queries(issuer, payloads, chunk_size=1000, workers=None):
+    """Yields a ValidationResult for each payload validated against the issuer's context query model
+
+    `payloads` is an iterable of JSON strings or dictionaries, consumed lazily. Chunks are
+    validated by `workers` processes, defaulting to the number of processors, or in the
+    current process when `workers` is 0.
+
+    Worker processes rely on the issuer module being importable, as the context query model
+    is sent to them by reference.
+    """
+    context_query_model = issuer.get_document_issuer().context_query_model
+    chunks = iter_chunks(payloads, chunk_size)
+
+    if workers == 0:
+        for chunk in chunks:
+            yield from validate_chunk(context_query_model, chunk)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Bound the number of pending chunks so that payloads are read as results are consumed
+        max_pending = workers * 2
+        pending = collections.deque()
+
+        for chunk in chunks:
+            pending.append(executor.submit(validate_chunk, context_query_model, chunk))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+
+        while pending:
+            yield from pending.popleft().result()
+
+
+def format_result(result):
+    """Returns a ValidationResult as a JSON line"""
+    return json.dumps({"row": result.row, "valid": not result.errors, "errors": result.errors}, default=str)
@@ -0,0 +1,115 @@
+"""Delta-compressed history of document contexts
+
+Each change of the context or context query of a document records the state it replaced as
+a DocumentContextVersion, numbered from 1 for the oldest state. The current state is only
+stored in the document row. Versions store the reverse JSON Patch (RFC 6902) turning the
+state which replaced them back into theirs, except every CONTEXT_VERSION_SNAPSHOT_INTERVAL
+versions, which store a full snapshot. Any version is rebuilt from the current state, or
+from the closest newer snapshot, by applying the patches of the newer versions in reverse
+order.
+"""
+
+import copy
+import itertools
+
+
+def _escape_pointer_token(token):
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape_pointer_token(token):
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def _is_equal(source, target):
+    # 1 == 1.0 == True in Python, but they are different JSON values
+    return type(source) is type(target) and source == target
+
+
+def make_json_patch(source, target, path=""):
+    """Returns a list of JSON Patch operations turning the `source` JSON value into `target`
+
+    Objects and lists are compared recursively, so that only the changed values are part of
+    the patch. Lists are compared index by index, removing or appending items at their end.
+    """
+    if _is_equal(source, target):
+        return []
+
+    if isinstance(source, dict) and isinstance(target, dict):
+        operations = [
+            {"op": "remove", "path": f"{path}/{_escape_pointer_token(key)}"} for key in source if key not in target
+        ]
+        for key, value in target.items():
+            key_path = f"{path}/{_escape_pointer_token(key)}"
+            if key in source:
+                operations += make_json_patch(source[key], value, key_path)
+            else:
+                operations.append({"op": "add", "path": key_path, "value": value})
+        return operations
+
+    if isinstance(source, list) and isinstance(target, list):
+        operations = []
+        for index, (source_item, target_item) in enumerate(zip(source, target)):
+            operations += make_json_patch(source_item, target_item, f"{path}/{index}")
+        # Remove from the end, so that the indexes of the remaining items do not change
+        for index in reversed(range(len(target), len(source))):
+            operations.append({"op": "remove", "path": f"{path}/{index}"})
+        for item in itertools.islice(target, len(source), None):
+            operations.append({"op": "add", "path": f"{path}/-", "value": item})
+        return operations
+
+    return [{"op": "replace", "path": path, "value": target}]
+
+
+def apply_json_patch(document, patch):
+    """Returns a copy of the `document` JSON value with the add, remove and replace operations of `patch` applied
+
+    Raises ValueError for unsupported operations and paths which do not exist.
+    """
+    document = copy.deepcopy(document)
+
+    for operation in patch:
+        if operation["op"] not in ("add", "remove", "replace"):
+            raise ValueError(f"Unsupported JSON Patch operation: {operation['op']}")
+        if operation["path"] == "":
+            if operation["op"] == "remove":
+                raise ValueError("The whole document cannot be removed")
+            document = copy.deepcopy(operation["value"])
+            continue
+
+        *parents, name = [_unescape_pointer_token(token) for token in operation["path"].split("/")[1:]]
+        try:
+            parent = document
+            for token in parents:
+                parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+
+            if isinstance(parent, list):
+                index = len(parent) if name == "-" else int(name)
+                if operation["op"] == "add":
+                    parent.insert(index, copy.deepcopy(operation["value"]))
+                elif operation["op"] == "remove":
+                    del parent[index]
+                else:
+                    parent[index] = copy.deepcopy(operation["value"])
+            elif operation["op"] == "remove":
+                del parent[name]
+            else:
+                if operation["op"] == "replace" and name not in parent:
+                    raise KeyError(name)
+                parent[name] = copy.deepcopy(operation["value"])
+        except (KeyError, IndexError, TypeError) as error:
+            raise ValueError(f"The path {operation['path']} does not exist") from error
+
+    return document
+
+
+def rebuild_version(current, versions):
+    """Returns the JSON value of the oldest of the given versions
+
+    `versions` is a sequence of (snapshot, delta) tuples ordered from the newest version to
+    the oldest, whose deltas turn `current`, or the previous version, into their own value.
+    """
+    value = copy.deepcopy(current)
+    for snapshot, delta in versions:
+        value = copy.deepcopy(snapshot) if snapshot is not None else apply_json_patch(value, delta)
+    return value
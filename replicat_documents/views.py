@@ -1,23 +1,329 @@
-import uuid
+import re
 
+import django
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import permission_required
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import close_old_connections
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django.template.response import TemplateResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from replicat_documents import defaults
+from replicat_documents.admission import render_queue
+from replicat_documents.exceptions import ExportTooLarge, IssuerRenderQueueFull, RenderQueueFull
+from replicat_documents.exports import ZIP, get_export_queryset, is_export_format_available, iter_export
+from replicat_documents.metrics import render_prometheus
+from replicat_documents.models import ReplicatDocument
+from replicat_documents.policies import record_access
+from replicat_documents.profiling import record_cache_lookup
+from replicat_documents.renderers import PDF, is_rasterizer_available
+from replicat_documents.warmup import RETRY_INTERVAL, is_warm
+
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+def get_document(id):
+    """Returns the document with the given id if its issuer is enabled, or raises Http404"""
+    return get_object_or_404(ReplicatDocument.objects.select_related("issuer"), pk=id, issuer__enabled=True)
+
+
+def get_document_html_cache_key(document, fingerprint):
+    """Returns the cache key of the rendered HTML for a document and its templates fingerprint"""
+    return f"replicat_documents:document_html:{document.id}:{document.updated_at.timestamp()}:{fingerprint}"
+
+
+def get_document_html_response(request, document):
+    """Returns the response rendering the document as html
+
+    The rendered page is cached until the document or its issuer templates change. An ETag
+    header is sent, so that clients holding a current copy get a 304 response. There is no
+    Last-Modified header, as templates change independently of the document.
+    """
+    document_issuer = document.get_document_issuer()
+    fingerprint = document_issuer.get_template_fingerprint()
+
+    etag = quote_etag(f"{document.updated_at.timestamp():.6f}-{fingerprint[:16]}")
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        cache_key = get_document_html_cache_key(document, fingerprint)
+        content = cache.get(cache_key)
+        record_cache_lookup(hit=content is not None)
+
+        if content is None:
+            if document.context is not None:
+                document_issuer.set_context(document.context)
+            html, css = document_issuer.render_templates()
+
+            template = "replicat_documents/document_detail.html"
+            context = {"document": document, "html": html, "css": css}
+
+            content = TemplateResponse(request, template, context).rendered_content
+            cache.set(cache_key, content, defaults.HTML_CACHE_TIMEOUT)
+
+        response = HttpResponse(content)
+
+    response["ETag"] = etag
+    return response
 
 
 def document_view_html(request, id):
     """Renders the document as html"""
-    obj = get_object_or_404(Post, pk=uuid.UUID(id))
+    document = get_document(id)
+    record_access(document.issuer)
+    return get_document_html_response(request, document)
 
-    template = "detail_view.html"
-    context = {}
 
-    context["data"] = MyModel.objects.get(id=id)
+def render_document_to_pdf(document):
+    """Renders the document to PDF through the render queue, which raises RenderQueueFull when full"""
+    with render_queue.admit(document.issuer.label):
+        return document.render_to_pdf()
 
-    return TemplateResponse(request, template, context)
+
+def render_document_to_pdf_in_worker(document):
+    """Renders the document to PDF from a worker thread of the async views, then closes its database connections
+
+    Renders run outside of the thread shared by sync code, so that they do not block the
+    database queries of other async requests.
+    """
+    try:
+        return render_document_to_pdf(document)
+    finally:
+        close_old_connections()
+
+
+def get_render_queue_full_response(error):
+    """Returns the response refusing a render, 429 for an issuer queue and 503 for the whole queue"""
+    status = 429 if isinstance(error, IssuerRenderQueueFull) else 503
+    response = HttpResponse(str(error), content_type="text/plain", status=status)
+    response["Retry-After"] = defaults.RENDER_QUEUE_RETRY_AFTER
+    return response
+
+
+def parse_range_header(header, size):
+    """Returns the (first, last) byte positions of a single byte range header, or None to send the whole file
+
+    Multiple ranges are not supported, they are answered with the whole file as allowed by
+    RFC 9110. Raises ValueError if the range cannot be satisfied.
+    """
+    match = re.fullmatch(r"\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*", header or "")
+    if match is None or match.groups() == ("", ""):
+        return None
+
+    first, last = match.groups()
+    if not first:
+        # Suffix range, e.g. "bytes=-500" for the last 500 bytes
+        if int(last) == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - int(last), 0), size - 1
+
+    last = min(int(last), size - 1) if last else size - 1
+    if int(first) >= size or int(first) > last:
+        raise ValueError("Unsatisfiable range")
+    return int(first), last
+
+
+def iter_file_range(file, length, chunk_size=FILE_CHUNK_SIZE):
+    """Yields `length` bytes of an open file from its current position, in chunks, then closes it"""
+    try:
+        while length > 0:
+            chunk = file.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def get_pdf_file_response(request, file, filename):
+    """Returns the response serving an open PDF file, or the byte range requested with a Range header
+
+    Ranges let viewers show the first page of linearized PDFs before downloading them fully.
+    If-Range requests get the whole file, as PDF responses have no validators.
+    """
+    size = file.size
+    range_header = None if "HTTP_IF_RANGE" in request.META else request.META.get("HTTP_RANGE")
+    try:
+        byte_range = parse_range_header(range_header, size)
+    except ValueError:
+        file.close()
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    if byte_range is None:
+        response = FileResponse(file, content_type="application/pdf", filename=filename)
+    else:
+        first, last = byte_range
+        file.seek(first)
+        response = StreamingHttpResponse(
+            iter_file_range(file, last - first + 1), status=206, content_type="application/pdf"
+        )
+        response["Content-Length"] = last - first + 1
+        response["Content-Range"] = f"bytes {first}-{last}/{size}"
+        response["Content-Disposition"] = f'inline; filename="{filename}"'
+    response["Accept-Ranges"] = "bytes"
+    return response
 
 
 def document_view_pdf(request, id):
     """Renders the document as a PDF"""
+    document = get_document(id)
+    record_access(document.issuer)
+
+    # Serve the existing PDF file, rendering it first if needed
+    if document.rendered_to_pdf_at is None or not document.rendition_exists(PDF):
+        try:
+            if not render_document_to_pdf(document):
+                raise Http404
+        except RenderQueueFull as error:
+            return get_render_queue_full_response(error)
+
+    return get_pdf_file_response(request, document.open_rendition(PDF), f"{document.id}.pdf")
+
+
+def document_view_page_preview(request, id, page):
+    """Serves the PNG preview of a page of the document, numbered from 1
+
+    Previews of all the pages are generated once, rendering the PDF first if needed, and
+    cached with the document until its PDF is rendered again.
+    """
+    document = get_document(id)
+    record_access(document.issuer)
+
+    if document.page_preview_count is None:
+        if not is_rasterizer_available():
+            raise Http404
+        try:
+            with render_queue.admit(document.issuer.label):
+                if document.rendered_to_pdf_at is None or not document.rendition_exists(PDF):
+                    if not document.render_to_pdf():
+                        raise Http404
+                document.render_page_previews()
+        except RenderQueueFull as error:
+            return get_render_queue_full_response(error)
+
+    if not 1 <= page <= document.page_preview_count:
+        raise Http404
+
+    return FileResponse(document.open_page_preview(page), content_type="image/png")
+
+
+@permission_required("replicat_documents.view_replicatdocument", raise_exception=True)
+def documents_export_view(request, export_format):
+    """Streams the PDF files of many documents as a ZIP archive or as a single merged PDF
+
+    Documents are selected with the `issuer` (label) and `id` query parameters, which can be
+    repeated, and with `context_query.<path>` query parameters matching context query values,
+    e.g. `?issuer=Certificate&context_query.course.name=Super%20Course`.
+    """
+    if not is_export_format_available(export_format):
+        raise Http404
+
+    context_query = {
+        key.partition(".")[2]: value for key, value in request.GET.items() if key.startswith("context_query.")
+    }
+    try:
+        documents = get_export_queryset(
+            issuers=request.GET.getlist("issuer"), ids=request.GET.getlist("id"), context_query=context_query
+        )
+        chunks = iter_export(documents, export_format)
+    except (ValueError, ValidationError, ExportTooLarge) as error:
+        return HttpResponseBadRequest(str(error))
+
+    content_type = "application/zip" if export_format == ZIP else "application/pdf"
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="documents.{export_format}"'
+    return response
+
+
+def metrics_view(request):
+    """Exposes the render stage histograms in the Prometheus text format"""
+    if not defaults.METRICS_ENABLED:
+        raise Http404
+
+    return HttpResponse(render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def readiness_view(request):
+    """Reports whether the worker is warm, for load balancer health checks
+
+    Responds with 503 until warm-up is done when the REPLICAT_DOCUMENTS_WARM_UP setting is enabled.
+    """
+    if defaults.WARM_UP and not is_warm():
+        response = HttpResponse("warming up", content_type="text/plain", status=503)
+        response["Retry-After"] = RETRY_INTERVAL
+        return response
+
+    return HttpResponse("ready", content_type="text/plain")
+
+
+async def aget_document(id):
+    """Asynchronously returns the document with the given id if its issuer is enabled, or raises Http404"""
+    queryset = ReplicatDocument.objects.select_related("issuer").filter(pk=id, issuer__enabled=True)
+
+    # Async queryset methods are available from Django 4.1
+    if hasattr(queryset, "afirst"):
+        document = await queryset.afirst()
+    else:
+        document = await sync_to_async(queryset.first)()
+
+    if document is None:
+        raise Http404
+    return document
+
+
+async def aiter_file(file, chunk_size=FILE_CHUNK_SIZE):
+    """Yields the content of an open file in chunks, running the blocking file calls in a thread pool
+
+    The file is closed once it has been read.
+    """
+    try:
+        while True:
+            chunk = await sync_to_async(file.read, thread_sensitive=False)(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        await sync_to_async(file.close, thread_sensitive=False)()
+
+
+async def document_view_html_async(request, id):
+    """Asynchronously renders the document as html"""
+    document = await aget_document(id)
+    await sync_to_async(record_access)(document.issuer)
+    return await sync_to_async(get_document_html_response)(request, document)
+
+
+async def document_view_pdf_async(request, id):
+    """Asynchronously renders the document as a PDF, streaming the file content"""
+    document = await aget_document(id)
+    await sync_to_async(record_access)(document.issuer)
+
+    # Serve the existing PDF file, rendering it first if needed
+    exists = await sync_to_async(document.rendition_exists, thread_sensitive=False)(PDF)
+    if document.rendered_to_pdf_at is None or not exists:
+        try:
+            if not await sync_to_async(render_document_to_pdf_in_worker, thread_sensitive=False)(document):
+                raise Http404
+        except RenderQueueFull as error:
+            return get_render_queue_full_response(error)
+
+    file = await sync_to_async(document.open_rendition, thread_sensitive=False)(PDF)
 
-    # Check if a pdf version exists, and if so, serve it
+    # Async iterators can be streamed from Django 4.2. Earlier versions cannot stream them,
+    # so they get the response of the sync view, which is also read in bounded chunks.
+    # Range requests are served by the sync view as well.
+    if django.VERSION < (4, 2) or "HTTP_RANGE" in request.META:
+        return await sync_to_async(get_pdf_file_response, thread_sensitive=False)(request, file, f"{document.id}.pdf")
 
-    # If not, render to PDF and then serve the file
+    response = StreamingHttpResponse(aiter_file(file), content_type="application/pdf")
+    response["Content-Length"] = await sync_to_async(lambda: file.size, thread_sensitive=False)()
+    response["Content-Disposition"] = f'inline; filename="{document.id}.pdf"'
+    response["Accept-Ranges"] = "bytes"
+    return response
@@ -0,0 +1,103 @@
+"""Warm-up of the per-process caches ahead of the first requests
+
+Warming up discovers the document issuers, fills the issuer cache, loads the enabled issuer
+classes, compiles their templates and starts the renderer. It runs in a background thread
+from `ReplicatDocumentsConfig.ready()` when the REPLICAT_DOCUMENTS_WARM_UP setting is
+enabled, and the readiness view reports whether it is done.
+
+The caches belong to the process which warmed up. Pre-fork servers should warm up each
+worker after it is forked, e.g. by calling `warm_up()` from gunicorn's `post_worker_init`
+server hook, as database connections and renderer processes do not survive a fork. The
+`warm_up_documents` management command runs in a process of its own, whose caches are lost
+when it exits: it only checks that the warm-up succeeds.
+"""
+
+import logging
+import threading
+import time
+
+from django.db import close_old_connections, connections, router
+
+logger = logging.getLogger("replicat_documents")
+
+# Seconds to wait before trying again a failed warm-up, e.g. while the database is starting
+RETRY_INTERVAL = 5
+
+_warm = threading.Event()
+
+
+def is_warm():
+    """Returns True once the current process has been warmed up"""
+    return _warm.is_set()
+
+
+def warm_up_issuers():
+    """Fills the issuer cache, then loads each enabled issuer and compiles its templates"""
+    from replicat_documents.models import DocumentIssuerChoice  # pylint: disable=import-outside-toplevel
+
+    DocumentIssuerChoice.objects.set_cached_instances()
+    for issuer in DocumentIssuerChoice.objects.enabled():
+        document_issuer = issuer.get_document_issuer()
+        document_issuer.get_html()
+        document_issuer.get_css()
+        # Also caches the digests of the issuer static assets
+        document_issuer.get_template_fingerprint()
+
+
+def warm_up_renderer():
+    from replicat_documents.renderers import get_renderer  # pylint: disable=import-outside-toplevel
+
+    get_renderer().warm_up()
+
+
+def warm_up():
+    """Runs each warm-up step, marks the process as warm and returns the {step: seconds} durations"""
+    from replicat_documents.apps import get_document_issuers  # pylint: disable=import-outside-toplevel
+
+    durations = {}
+    for step, function in (
+        ("discover_issuers", get_document_issuers),
+        ("issuers", warm_up_issuers),
+        ("renderer", warm_up_renderer),
+    ):
+        start = time.perf_counter()
+        function()
+        durations[step] = time.perf_counter() - start
+        logger.debug("Warm-up step %s took %.3f seconds", step, durations[step])
+
+    _warm.set()
+    return durations
+
+
+def is_migrated():
+    """Returns True if the issuers table exists, which is not the case before the first `migrate`"""
+    from replicat_documents.models import DocumentIssuerChoice  # pylint: disable=import-outside-toplevel
+
+    connection = connections[router.db_for_read(DocumentIssuerChoice)]
+    return DocumentIssuerChoice._meta.db_table in connection.introspection.table_names()
+
+
+def warm_up_until_done():
+    """Warms up the process, trying again every RETRY_INTERVAL seconds until it succeeds
+
+    The warm-up is skipped when the tables do not exist yet, e.g. in the `migrate` command.
+    """
+    while True:
+        try:
+            if not is_migrated():
+                logger.info("Skipping the warm-up, the replicat_documents tables do not exist yet")
+                return
+            warm_up()
+            return
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Warm-up failed, trying again in %s seconds", RETRY_INTERVAL)
+            time.sleep(RETRY_INTERVAL)
+        finally:
+            close_old_connections()
+
+
+def start_warm_up():
+    """Warms up the process in a background thread and returns the thread"""
+    thread = threading.Thread(target=warm_up_until_done, name="replicat-documents-warm-up", daemon=True)
+    thread.start()
+    return thread
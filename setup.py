@@ -61,6 +61,10 @@ setuptools.setup(
     description="Repeatable documents for Django",
     include_package_data=True,
     install_requires=requirements,
+    extras_require={
+        # Merged PDF exports
+        "pypdf": ["pypdf>=3.0"],
+    },
     license="MIT license",
     long_description=readme + "\n\n" + history,
     keywords="replicat replicat-documents replicat_documents documents django pdf png jpg embed embedded",
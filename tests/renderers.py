@@ -0,0 +1,19 @@
+from replicat_documents.renderers import PDF, PNG, BaseRenderer
+
+PDF_CONTENT = b"%PDF-1.4\n1 0 obj << /Type /Catalog >> endobj\ntrailer << /Root 1 0 R >>\n%%EOF\n"
+
+PNG_CONTENT = b"\x89PNG\r\n\x1a\n"
+
+
+class DummyRenderer(BaseRenderer):
+    """Renderer returning placeholder renditions and recording the rendered documents"""
+
+    formats = (PDF, PNG)
+
+    def __init__(self):
+        self.rendered = []
+
+    def layout(self, html, css, formats, metadata=None):
+        self.rendered.append((html, css, formats, metadata))
+        contents = {PDF: PDF_CONTENT, PNG: PNG_CONTENT}
+        return {rendition_format: contents[rendition_format] for rendition_format in formats}
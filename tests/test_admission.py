@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_admission
+------------
+
+Tests for `replicat-documents` admission module.
+"""
+
+import tempfile
+import threading
+from pathlib import Path
+from unittest import mock
+
+from django.test import TestCase
+
+from replicat_documents import defaults
+from replicat_documents.admission import RenderQueue, render_queue
+from replicat_documents.exceptions import IssuerRenderQueueFull, RenderQueueFull
+from replicat_documents.metrics import render_prometheus
+from replicat_documents.models import DocumentIssuerChoice, ReplicatDocument
+from tests.renderers import PDF_CONTENT
+from tests.test_views import CONTEXT_QUERY
+
+
+class TestRenderQueue(TestCase):
+    @mock.patch.object(defaults, "RENDER_QUEUE_SIZE", 2)
+    def test_queue_size(self):
+        queue = RenderQueue()
+
+        with queue.admit("Certificate"), queue.admit("Report"):
+            self.assertEqual(queue.depths(), [("Certificate", 1), ("Report", 1)])
+            with self.assertRaises(RenderQueueFull):
+                with queue.admit("Certificate"):
+                    pass
+
+        self.assertEqual(queue.depths(), [("Certificate", 0), ("Report", 0)])
+        self.assertEqual(queue.rejected(), [(("Certificate", "queue"), 1)])
+
+    @mock.patch.object(defaults, "RENDER_QUEUE_ISSUER_SIZE", 1)
+    @mock.patch.object(defaults, "RENDER_QUEUE_ISSUER_SIZES", {"Report": 2})
+    def test_issuer_queue_size(self):
+        queue = RenderQueue()
+
+        with queue.admit("Certificate"), queue.admit("Report"), queue.admit("Report"):
+            with self.assertRaises(IssuerRenderQueueFull):
+                with queue.admit("Certificate"):
+                    pass
+            with self.assertRaises(IssuerRenderQueueFull):
+                with queue.admit("Report"):
+                    pass
+
+    @mock.patch.object(defaults, "RENDER_CONCURRENCY", 1)
+    def test_concurrency(self):
+        queue = RenderQueue()
+        started, release = threading.Event(), threading.Event()
+
+        def render():
+            with queue.admit("Certificate"):
+                started.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=render)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(release.set)
+        started.wait(5)
+
+        started.clear()
+        waiting = threading.Thread(target=render)
+        waiting.start()
+        self.addCleanup(waiting.join)
+
+        # The second render is queued until the first one is done
+        self.assertFalse(started.wait(0.1))
+        self.assertEqual(queue.depths(), [("Certificate", 2)])
+        release.set()
+        self.assertTrue(started.wait(5))
+
+
+@mock.patch.object(defaults, "RENDERER", "tests.renderers.DummyRenderer")
+class TestAdmissionViews(TestCase):
+    def setUp(self):
+        documents_root = tempfile.TemporaryDirectory()
+        self.addCleanup(documents_root.cleanup)
+        patcher = mock.patch.object(defaults, "DOCUMENTS_ROOT", Path(documents_root.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        render_queue.reset()
+        self.addCleanup(render_queue.reset)
+        self.document = ReplicatDocument.objects.create(
+            issuer=DocumentIssuerChoice.objects.get(label="Certificate"), context_query=CONTEXT_QUERY
+        )
+        self.url = f"/documents/{self.document.id}.pdf"
+
+    @mock.patch.object(defaults, "RENDER_QUEUE_SIZE", 1)
+    def test_full_queue(self):
+        with render_queue.admit("Report"):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], str(defaults.RENDER_QUEUE_RETRY_AFTER))
+        rejected = 'replicat_documents_render_queue_rejected_total{issuer="Certificate",reason="queue"} 1'
+        self.assertIn(rejected, render_prometheus())
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), PDF_CONTENT)
+
+    @mock.patch.object(defaults, "RENDER_QUEUE_ISSUER_SIZE", 1)
+    def test_full_issuer_queue(self):
+        with render_queue.admit("Certificate"):
+            response = self.client.get(self.url)
+            self.assertIn('replicat_documents_render_queue_depth{issuer="Certificate"} 1', render_prometheus())
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], str(defaults.RENDER_QUEUE_RETRY_AFTER))
+
+    @mock.patch.object(defaults, "RENDER_QUEUE_SIZE", 0)
+    def test_rendered_documents_are_served_when_the_queue_is_full(self):
+        with mock.patch.object(defaults, "RENDER_QUEUE_SIZE", None):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        self.assertEqual(self.client.get(self.url).status_code, 200)
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_benchmarks
+------------
+
+Runs the `replicat-documents` benchmark suite.
+
+The suite runs at a small scale by default. Set REPLICAT_BENCHMARK_SCALE to run it at a
+larger scale, REPLICAT_BENCHMARK_OUTPUT to save the results as JSON and
+REPLICAT_BENCHMARK_BASELINE to fail on regressions against previously saved results.
+"""
+
+import os
+
+from django.test import TestCase
+
+from replicat_documents.benchmarks import BENCHMARKS, compare_results, load_results, run_benchmarks, save_results
+from replicat_documents.models import DocumentIssuerChoice, ReplicatDocument
+
+
+class TestBenchmarks(TestCase):
+    def test_benchmark_suite(self):
+        results = run_benchmarks(scale=int(os.environ.get("REPLICAT_BENCHMARK_SCALE", 10)), rounds=1)
+
+        self.assertEqual(set(results["benchmarks"]), {name for name, cls in BENCHMARKS.items() if cls.is_available()})
+        self.assertFalse(DocumentIssuerChoice.objects.filter(label__startswith="Synthetic").exists())
+        self.assertFalse(ReplicatDocument.objects.exists())
+
+        if os.environ.get("REPLICAT_BENCHMARK_OUTPUT"):
+            save_results(results, os.environ["REPLICAT_BENCHMARK_OUTPUT"])
+
+        if os.environ.get("REPLICAT_BENCHMARK_BASELINE"):
+            regressions = compare_results(results, load_results(os.environ["REPLICAT_BENCHMARK_BASELINE"]))
+            self.assertEqual(regressions, [])
+
+    def test_compare_results(self):
+        baseline = {"benchmarks": {"fast": {"median": 1.0}, "slow": {"median": 1.0}}}
+        results = {"benchmarks": {"fast": {"median": 1.1}, "slow": {"median": 1.5}, "new": {"median": 3.0}}}
+
+        regressions = compare_results(results, baseline, tolerance=0.2)
+
+        self.assertEqual([regression["name"] for regression in regressions], ["slow"])
+        self.assertEqual(regressions[0]["ratio"], 1.5)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_exports
+------------
+
+Tests for `replicat-documents` exports module.
+"""
+
+import copy
+import io
+import tempfile
+import zipfile
+from pathlib import Path
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import Permission, User
+from django.core.management import call_command
+from django.test import TestCase
+
+from replicat_documents import defaults
+from replicat_documents.admission import render_queue
+from replicat_documents.exports import (
+    MERGED_PDF,
+    get_export_queryset,
+    is_export_format_available,
+    iter_export,
+    iter_zip,
+)
+from replicat_documents.models import DocumentIssuerChoice, ReplicatDocument
+from tests.renderers import PDF_CONTENT, DummyRenderer
+from tests.test_views import CONTEXT_QUERY
+
+
+class BlankPdfRenderer(DummyRenderer):
+    """Renderer returning a valid single blank page PDF document"""
+
+    def layout(self, html, css, formats, metadata=None):
+        from pypdf import PdfWriter  # pylint: disable=import-outside-toplevel
+
+        writer = PdfWriter()
+        writer.add_blank_page(width=595, height=842)
+        output = io.BytesIO()
+        writer.write(output)
+        return {rendition_format: output.getvalue() for rendition_format in formats}
+
+
+@mock.patch.object(defaults, "RENDERER", "tests.renderers.DummyRenderer")
+class TestExports(TestCase):
+    def setUp(self):
+        self.documents_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.documents_root.cleanup)
+        patcher = mock.patch.object(defaults, "DOCUMENTS_ROOT", Path(self.documents_root.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        certificate = DocumentIssuerChoice.objects.get(label="Certificate")
+        other_context_query = copy.deepcopy(CONTEXT_QUERY)
+        other_context_query["course"]["name"] = "Other Course"
+
+        self.documents = [
+            ReplicatDocument.objects.create(issuer=certificate, context_query=CONTEXT_QUERY) for _ in range(3)
+        ]
+        ReplicatDocument.objects.create(issuer=certificate, context_query=other_context_query)
+        ReplicatDocument.objects.create(
+            issuer=DocumentIssuerChoice.objects.get(label="Report"), context_query=CONTEXT_QUERY
+        )
+
+    def test_get_export_queryset(self):
+        documents = get_export_queryset(issuers=["Certificate"], context_query={"course.name": "Super Course"})
+
+        self.assertEqual(set(documents), set(self.documents))
+
+    def test_get_export_queryset_invalid_path(self):
+        with self.assertRaises(ValueError):
+            get_export_queryset(context_query={"course__name__regex": ".*"})
+
+    def test_iter_zip_renders_missing_documents(self):
+        documents = get_export_queryset(issuers=["Certificate"], context_query={"course.name": "Super Course"})
+
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(iter_zip(documents))))
+
+        self.assertEqual(sorted(archive.namelist()), sorted(f"{document.id}.pdf" for document in self.documents))
+        self.assertEqual(archive.read(f"{self.documents[0].id}.pdf"), PDF_CONTENT)
+        self.assertEqual(ReplicatDocument.objects.filter(rendered_to_pdf_at__isnull=False).count(), 3)
+
+    @mock.patch.object(defaults, "RENDER_QUEUE_ISSUER_SIZE", 1)
+    def test_iter_zip_renders_through_the_render_queue(self):
+        render_queue.reset()
+        self.addCleanup(render_queue.reset)
+        documents = get_export_queryset(issuers=["Certificate"], context_query={"course.name": "Super Course"})
+
+        with render_queue.admit("Certificate"), self.assertLogs("replicat_documents", level="WARNING"):
+            archive = zipfile.ZipFile(io.BytesIO(b"".join(iter_zip(documents))))
+
+        self.assertEqual(archive.namelist(), [])
+        self.assertEqual(render_queue.rejected(), [(("Certificate", "issuer"), 3)])
+        self.assertFalse(ReplicatDocument.objects.filter(rendered_to_pdf_at__isnull=False).exists())
+
+    def test_export_view(self):
+        user = User.objects.create_user("staff")
+        self.client.force_login(user)
+        url = "/documents/export.zip?issuer=Certificate&context_query.course.name=Super%20Course"
+
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        user.user_permissions.add(Permission.objects.get(codename="view_replicatdocument"))
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(len(archive.namelist()), 3)
+
+    def test_export_documents_command(self):
+        output = Path(self.documents_root.name, "export.zip")
+
+        call_command(
+            "export_documents", str(output), "--issuer", "Report", stdout=io.StringIO()
+        )
+
+        self.assertEqual(len(zipfile.ZipFile(output).namelist()), 1)
+
+    @skipUnless(is_export_format_available(MERGED_PDF), "pypdf is not installed")
+    def test_merged_pdf(self):
+        from pypdf import PdfReader  # pylint: disable=import-outside-toplevel
+
+        documents = get_export_queryset(issuers=["Certificate"])
+
+        with mock.patch.object(defaults, "RENDERER", "tests.test_exports.BlankPdfRenderer"):
+            merged = PdfReader(io.BytesIO(b"".join(iter_export(documents, MERGED_PDF))))
+
+        self.assertEqual(len(merged.pages), 4)
+
+    @skipUnless(is_export_format_available(MERGED_PDF), "pypdf is not installed")
+    @mock.patch.object(defaults, "EXPORT_MERGED_PDF_MAX_DOCUMENTS", 3)
+    def test_merged_pdf_is_limited(self):
+        user = User.objects.create_user("staff")
+        user.user_permissions.add(Permission.objects.get(codename="view_replicatdocument"))
+        self.client.force_login(user)
+
+        response = self.client.get("/documents/export.pdf?issuer=Certificate")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(b"limited to 3 documents and 4 were selected", response.content)
+        with mock.patch.object(defaults, "RENDERER", "tests.test_exports.BlankPdfRenderer"):
+            response = self.client.get("/documents/export.pdf?issuer=Report")
+            self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_fetchers
+------------
+
+Tests for `replicat-documents` fetchers module.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from replicat_documents.fetchers import StaticFileCache
+
+
+class TestStaticFileCache(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.logo = Path(directory.name, "logo.png")
+        self.logo.write_bytes(b"logo")
+        self.font = Path(directory.name, "font.woff")
+        self.font.write_bytes(b"font")
+
+    def test_files_are_read_once(self):
+        cache = StaticFileCache(max_size=1024)
+
+        for _ in range(3):
+            self.assertEqual(cache.read(self.logo), b"logo")
+
+        self.assertEqual((cache.hits, cache.misses, cache.size), (2, 1, 4))
+
+    def test_modified_files_are_read_again(self):
+        cache = StaticFileCache(max_size=1024)
+        cache.read(self.logo)
+
+        self.logo.write_bytes(b"new logo")
+        stat = self.logo.stat()
+        os.utime(self.logo, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+        self.assertEqual(cache.read(self.logo), b"new logo")
+        self.assertEqual(cache.misses, 2)
+
+    def test_least_recently_used_files_are_evicted(self):
+        cache = StaticFileCache(max_size=6)
+        cache.read(self.logo)
+        cache.read(self.font)
+
+        self.assertEqual(cache.size, 4)
+        cache.read(self.logo)
+        self.assertEqual(cache.misses, 3)
+
+    def test_files_larger_than_the_cache_are_not_kept(self):
+        cache = StaticFileCache(max_size=2)
+
+        self.assertEqual(cache.read(self.logo), b"logo")
+        self.assertEqual(cache.size, 0)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_imports
+------------
+
+Tests for `replicat-documents` imports module.
+"""
+
+import io
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from replicat_documents import defaults
+from replicat_documents.imports import import_documents, iter_csv_payloads
+from replicat_documents.models import DocumentIssuerChoice, ReplicatDocument, flatten_json, unflatten_json
+from tests.test_views import CONTEXT_QUERY
+
+CSV_CONTENT = (
+    "student.name,course.name,course.organization.name,course.organization.representative,"
+    "course.organization.signature,course.organization.logo\n"
+    "Richie Cunningham,Super Course,Super Org,Joanie Cunningham,signature.png,logo.png\n"
+    ",Super Course,Super Org,Joanie Cunningham,signature.png,logo.png\n"
+    "Fonzie,Super Course,Super Org,Joanie Cunningham,signature.png,logo.png\n"
+)
+
+
+class TestImports(TestCase):
+    def setUp(self):
+        self.issuer = DocumentIssuerChoice.objects.get(label="Certificate")
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def test_unflatten_json(self):
+        value = {"course": CONTEXT_QUERY["course"], "tags": ["a", "b"], "matrix": [[1], [2, 3]]}
+
+        self.assertEqual(unflatten_json(flatten_json(value, delimeter="."), delimeter="."), value)
+
+    def test_csv_columns_are_nested(self):
+        payloads = list(iter_csv_payloads(io.StringIO(CSV_CONTENT)))
+
+        self.assertEqual(payloads[0], CONTEXT_QUERY)
+        self.assertNotIn("student", payloads[1])
+
+    def test_import_documents_in_batches(self):
+        rejects = io.StringIO()
+
+        results = list(
+            import_documents(self.issuer, iter_csv_payloads(io.StringIO(CSV_CONTENT)), batch_size=2, rejects=rejects)
+        )
+
+        self.assertEqual(results, [(2, 1, 1), (3, 1, 0)])
+        self.assertEqual(ReplicatDocument.objects.filter(issuer=self.issuer).count(), 2)
+        self.assertEqual(json.loads(rejects.getvalue())["row"], 2)
+
+    def test_import_documents_rejects_malformed_rows(self):
+        rejects = io.StringIO()
+        content = CSV_CONTENT.replace("Fonzie,Super Course", "Fonzie,Extra,Super Course")
+
+        results = list(import_documents(self.issuer, iter_csv_payloads(io.StringIO(content)), rejects=rejects))
+
+        self.assertEqual(results, [(3, 1, 2)])
+        rejected = [json.loads(line) for line in rejects.getvalue().splitlines()]
+        self.assertEqual(rejected[1]["row"], 3)
+        self.assertEqual(rejected[1]["errors"][0]["msg"], "The row has 1 more field(s) than the header")
+        self.assertEqual(rejected[1]["payload"][""], ["logo.png"])
+
+    def test_import_documents_command_rejects_conflicting_columns(self):
+        path = self.directory / "documents.csv"
+        path.write_text(CSV_CONTENT.replace("student.name,", "course,", 1))
+
+        with self.assertRaisesMessage(CommandError, "Conflicting CSV columns"):
+            call_command("import_documents", "Certificate", str(path), stdout=io.StringIO())
+
+        self.assertEqual(ReplicatDocument.objects.count(), 0)
+
+    def test_import_documents_from_start_row(self):
+        results = list(import_documents(self.issuer, iter_csv_payloads(io.StringIO(CSV_CONTENT)), start_row=3))
+
+        self.assertEqual(results, [(3, 1, 0)])
+        self.assertEqual(ReplicatDocument.objects.get().context_query["student"]["name"], "Fonzie")
+
+    @mock.patch.object(defaults, "IDEMPOTENT_ISSUANCE", True)
+    def test_import_documents_skips_issued_documents(self):
+        ReplicatDocument.objects.issue(self.issuer, CONTEXT_QUERY)
+        payloads = [json.dumps(CONTEXT_QUERY)] * 3
+
+        self.assertEqual(list(import_documents(self.issuer, payloads)), [(3, 0, 0)])
+        self.assertEqual(ReplicatDocument.objects.count(), 1)
+
+    def test_import_documents_command(self):
+        path = self.directory / "documents.jsonl"
+        path.write_text(f"{json.dumps(CONTEXT_QUERY)}\nnot json\n{json.dumps(CONTEXT_QUERY)}\n")
+        stdout = io.StringIO()
+
+        call_command("import_documents", "Certificate", str(path), "--batch-size", "2", stdout=stdout)
+
+        self.assertIn("Created 2 document(s), rejected 1 row(s)", stdout.getvalue())
+        self.assertIn("resume with --start-row 3", stdout.getvalue())
+        self.assertEqual(ReplicatDocument.objects.count(), 2)
+        self.assertEqual(json.loads(Path(f"{path}.rejects.jsonl").read_text())["row"], 2)
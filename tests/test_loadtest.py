@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_loadtest
+------------
+
+Tests for `replicat-documents` loadtest module.
+"""
+
+import io
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import LiveServerTestCase, TestCase, TransactionTestCase
+
+from replicat_documents import defaults
+from replicat_documents.benchmarks import SYNTHETIC_APP_NAME
+from replicat_documents.loadtest import (
+    ISSUE,
+    OPERATIONS,
+    RENDER,
+    VIEW_HTML,
+    VIEW_OPERATIONS,
+    percentile,
+    run_load_test,
+    run_server_load_test,
+)
+from replicat_documents.models import DocumentIssuerChoice, ReplicatDocument
+from tests.test_views import CONTEXT_QUERY
+
+
+# Shared-cache in-memory SQLite databases lock whole tables on concurrent writes, and live
+# servers share a single connection to them between threads
+CONCURRENCY = 1 if connection.vendor == "sqlite" else 3
+
+
+class TestPercentile(TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([3], 0.95), 3)
+        self.assertIsNone(percentile([], 0.5))
+
+
+@mock.patch.object(defaults, "RENDERER", "tests.renderers.DummyRenderer")
+class TestLoadTest(TransactionTestCase):
+    def setUp(self):
+        documents_root = tempfile.TemporaryDirectory()
+        self.addCleanup(documents_root.cleanup)
+        patcher = mock.patch.object(defaults, "DOCUMENTS_ROOT", Path(documents_root.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_run_load_test(self):
+        results = run_load_test(issuers=2, documents=6, requests=8, concurrency=CONCURRENCY, host="testserver")
+
+        self.assertEqual(list(results["operations"]), list(OPERATIONS))
+        counts = {operation: result["count"] for operation, result in results["operations"].items()}
+        self.assertEqual(counts, {"issue": 6, "render": 6, "view_html": 8, "view_pdf": 8})
+        for result in results["operations"].values():
+            self.assertEqual(result["errors"], {})
+            self.assertLessEqual(result["p50"], result["p95"])
+            self.assertLessEqual(result["p95"], result["p99"])
+            self.assertGreater(result["throughput"], 0)
+
+        self.assertFalse(DocumentIssuerChoice.objects.filter(label__startswith="Synthetic").exists())
+        self.assertFalse(ReplicatDocument.objects.exists())
+        self.assertEqual(list(defaults.DOCUMENTS_ROOT.rglob("*.pdf")), [])
+
+    def test_failed_requests_are_counted(self):
+        results = run_load_test(documents=2, requests=2, concurrency=1, operations=(VIEW_HTML,), host="example.com")
+
+        self.assertEqual(list(results["operations"]), [VIEW_HTML])
+        self.assertEqual(results["operations"][VIEW_HTML]["count"], 0)
+        self.assertEqual(results["operations"][VIEW_HTML]["errors"], {"HTTP 400": 2})
+
+    def test_command(self):
+        stdout = io.StringIO()
+
+        call_command(
+            "load_test_documents",
+            "--operation",
+            RENDER,
+            "--documents",
+            "2",
+            "--concurrency",
+            str(CONCURRENCY),
+            stdout=stdout,
+        )
+
+        self.assertIn("render", stdout.getvalue())
+        self.assertIn("p99", stdout.getvalue())
+
+    def test_command_arguments(self):
+        with self.assertRaises(CommandError):
+            call_command("load_test_documents", "--concurrency", "0")
+
+        with mock.patch.object(defaults, "RENDERER", "replicat_documents.renderers.BrowserPoolRenderer"):
+            with mock.patch("replicat_documents.renderers.BrowserPoolRenderer.is_available", return_value=False):
+                with self.assertRaises(CommandError):
+                    call_command("load_test_documents", "--operation", RENDER)
+
+    def test_server_command_arguments(self):
+        with self.assertRaises(CommandError):
+            call_command("load_test_documents", "--base-url", "http://localhost:8000")
+
+        with self.assertRaises(CommandError):
+            call_command(
+                "load_test_documents",
+                "--base-url",
+                "http://localhost:8000",
+                "--issuer",
+                "Certificate",
+                "--operation",
+                ISSUE,
+            )
+
+        with self.assertRaises(CommandError):
+            call_command("load_test_documents", "--base-url", "http://localhost:8000", "--issuer", "Unknown")
+
+        with self.assertRaises(CommandError):
+            call_command("load_test_documents", "--issuer", "Certificate")
+
+
+@mock.patch.object(defaults, "RENDERER", "tests.renderers.DummyRenderer")
+class TestServerLoadTest(LiveServerTestCase):
+    def setUp(self):
+        documents_root = tempfile.TemporaryDirectory()
+        self.addCleanup(documents_root.cleanup)
+        patcher = mock.patch.object(defaults, "DOCUMENTS_ROOT", Path(documents_root.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # The server should only rely on the issuers it has installed
+        patcher = mock.patch.dict(sys.modules)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for name in [name for name in sys.modules if name.startswith(SYNTHETIC_APP_NAME)]:
+            del sys.modules[name]
+
+        issuer = DocumentIssuerChoice.objects.get(label="Certificate")
+        for _ in range(2):
+            ReplicatDocument.objects.create(issuer=issuer, context_query=CONTEXT_QUERY)
+
+    def test_run_server_load_test(self):
+        results = run_server_load_test(self.live_server_url, ["Certificate"], requests=4, concurrency=CONCURRENCY)
+
+        self.assertEqual(results["meta"]["target"], self.live_server_url)
+        self.assertEqual(results["meta"]["documents"], 2)
+        self.assertEqual(list(results["operations"]), list(VIEW_OPERATIONS))
+        for result in results["operations"].values():
+            self.assertEqual(result["errors"], {})
+            self.assertEqual(result["count"], 4)
+        self.assertEqual(ReplicatDocument.objects.count(), 2)
+
+    def test_command(self):
+        stdout = io.StringIO()
+
+        call_command(
+            "load_test_documents",
+            "--base-url",
+            self.live_server_url,
+            "--issuer",
+            "Certificate",
+            "--requests",
+            "2",
+            "--concurrency",
+            str(CONCURRENCY),
+            stdout=stdout,
+        )
+
+        self.assertIn("view_html", stdout.getvalue())
+        self.assertIn("view_pdf", stdout.getvalue())
+
+    def test_unknown_issuers_are_refused(self):
+        with self.assertRaises(ValueError):
+            run_server_load_test(self.live_server_url, ["Synthetic 0"])
+
+        with self.assertRaises(ValueError):
+            run_server_load_test(self.live_server_url, ["Certificate"], operations=(RENDER,))
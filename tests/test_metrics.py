@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_metrics
+------------
+
+Tests for `replicat-documents` metrics module.
+"""
+
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import TestCase
+
+from replicat_documents import defaults
+from replicat_documents.benchmarks import (
+    create_synthetic_issuer,
+    get_synthetic_context_query,
+    install_synthetic_issuers,
+)
+from replicat_documents.metrics import Histogram, render_prometheus, render_stage_histograms, timed_stage
+from replicat_documents.models import ReplicatDocument
+
+
+class TestMetrics(TestCase):
+    def setUp(self):
+        render_stage_histograms.reset()
+
+    def tearDown(self):
+        render_stage_histograms.reset()
+
+    def test_histogram_cumulative_counts(self):
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 5.0):
+            histogram.observe(value)
+
+        cumulative, total_sum, total_count = histogram.snapshot()
+
+        self.assertEqual(cumulative, [(0.1, 1), (1.0, 3), (float("inf"), 4)])
+        self.assertAlmostEqual(total_sum, 6.25)
+        self.assertEqual(total_count, 4)
+
+    def test_timed_stage_is_recorded(self):
+        with timed_stage("layout", "Certificate"):
+            pass
+
+        self.assertEqual(render_stage_histograms.get("Certificate", "layout").count, 1)
+
+    def test_failed_stage_is_not_recorded(self):
+        with self.assertRaises(ValueError):
+            with timed_stage("layout", "Certificate"):
+                raise ValueError
+
+        self.assertIsNone(render_stage_histograms.get("Certificate", "layout"))
+
+    def test_metrics_view(self):
+        with timed_stage("write", 'Quoted "label"'):
+            pass
+
+        response = self.client.get("/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content.decode(), render_prometheus())
+        self.assertIn(
+            'replicat_documents_render_stage_seconds_bucket{issuer="Quoted \\"label\\"",stage="write",le="+Inf"} 1',
+            response.content.decode(),
+        )
+
+    @mock.patch.object(defaults, "RENDERER", "tests.renderers.DummyRenderer")
+    def test_render_stages_are_recorded(self):
+        documents_root = tempfile.TemporaryDirectory()
+        self.addCleanup(documents_root.cleanup)
+        install_synthetic_issuers(1)
+        document = ReplicatDocument.objects.create(
+            issuer=create_synthetic_issuer(), context_query=get_synthetic_context_query()
+        )
+
+        with mock.patch.object(defaults, "DOCUMENTS_ROOT", Path(documents_root.name)):
+            self.assertTrue(document.render_to_pdf())
+
+        for stage in ("fetch_context", "validate_context", "render_template", "layout", "write", "total"):
+            self.assertEqual(render_stage_histograms.get("Synthetic 0", stage).count, 1)
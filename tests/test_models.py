@@ -8,9 +8,16 @@ test_replicat-documents
 Tests for `replicat-documents` models module.
 """
 
+import copy
+import io
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.test import TestCase
 
-from replicat_documents import models
+from replicat_documents import defaults, models
+from tests.test_views import CONTEXT_QUERY
 
 
 class TestReplicat_documents(TestCase):
@@ -22,3 +29,134 @@ class TestReplicat_documents(TestCase):
 
     def tearDown(self):
         pass
+
+
+class TestIdempotentIssuance(TestCase):
+    def setUp(self):
+        self.issuer = models.DocumentIssuerChoice.objects.get(label="Certificate")
+
+    def test_context_query_hash_is_normalized(self):
+        reordered = dict(reversed(list(CONTEXT_QUERY.items())))
+
+        self.assertEqual(
+            models.get_context_query_hash(self.issuer, CONTEXT_QUERY),
+            models.get_context_query_hash(self.issuer, reordered),
+        )
+        self.assertNotEqual(
+            models.get_context_query_hash(self.issuer, CONTEXT_QUERY),
+            models.get_context_query_hash(models.DocumentIssuerChoice.objects.get(label="Report"), CONTEXT_QUERY),
+        )
+
+    def test_issue_creates_duplicates_by_default(self):
+        first, first_created = models.ReplicatDocument.objects.issue(self.issuer, CONTEXT_QUERY)
+        second, second_created = models.ReplicatDocument.objects.issue(self.issuer, CONTEXT_QUERY)
+
+        self.assertTrue(first_created and second_created)
+        self.assertNotEqual(first, second)
+        self.assertEqual(first.context_query_hash, second.context_query_hash)
+
+    @mock.patch.object(defaults, "IDEMPOTENT_ISSUANCE", True)
+    def test_issue_returns_existing_document(self):
+        first, first_created = models.ReplicatDocument.objects.issue(self.issuer, CONTEXT_QUERY)
+
+        with self.assertNumQueries(1):
+            second, second_created = models.ReplicatDocument.objects.issue(self.issuer, copy.deepcopy(CONTEXT_QUERY))
+
+        self.assertTrue(first_created)
+        self.assertFalse(second_created)
+        self.assertEqual(first, second)
+
+    @mock.patch.object(defaults, "IDEMPOTENT_ISSUANCE", True)
+    def test_issue_returns_concurrently_issued_document(self):
+        first, _ = models.ReplicatDocument.objects.issue(self.issuer, CONTEXT_QUERY)
+
+        # Another process created the document after the lookup
+        with mock.patch.object(models.ReplicatDocumentQuerySet, "first", return_value=None):
+            second, second_created = models.ReplicatDocument.objects.issue(self.issuer, CONTEXT_QUERY)
+
+        self.assertFalse(second_created)
+        self.assertEqual(first, second)
+        self.assertEqual(models.ReplicatDocument.objects.count(), 1)
+
+    @mock.patch.object(defaults, "IDEMPOTENT_ISSUANCE", True)
+    def test_changing_the_context_query_releases_the_issuance_key(self):
+        document, _ = models.ReplicatDocument.objects.issue(self.issuer, CONTEXT_QUERY)
+        self.assertEqual(document.issuance_key, document.context_query_hash)
+
+        document.context_query = {**CONTEXT_QUERY, "student": {"name": "Arthur Fonzarelli"}}
+        document.save()
+
+        self.assertIsNone(document.issuance_key)
+        self.assertTrue(models.ReplicatDocument.objects.issue(self.issuer, CONTEXT_QUERY)[1])
+
+    def test_save_only_hashes_changed_context_queries(self):
+        models.ReplicatDocument.objects.create(issuer=self.issuer, context_query=CONTEXT_QUERY)
+        document = models.ReplicatDocument.objects.get()
+
+        # Loaded context queries are hashed once, by the first save
+        document.save()
+        with mock.patch.object(models, "get_context_query_hash", wraps=models.get_context_query_hash) as hash_mock:
+            document.metadata = {"title": "Unchanged context query"}
+            document.save()
+            self.assertFalse(hash_mock.called)
+
+            document.context_query = {**CONTEXT_QUERY, "student": {"name": "Arthur Fonzarelli"}}
+            document.save()
+            self.assertTrue(hash_mock.called)
+
+    def test_backfill_context_query_hashes_command(self):
+        document = models.ReplicatDocument.objects.create(issuer=self.issuer, context_query=CONTEXT_QUERY)
+        models.ReplicatDocument.objects.update(context_query_hash="")
+        stdout = io.StringIO()
+
+        call_command("backfill_context_query_hashes", stdout=stdout)
+
+        document.refresh_from_db()
+        self.assertEqual(document.context_query_hash, models.get_context_query_hash(self.issuer, CONTEXT_QUERY))
+        self.assertIn("Hashed the context query of 1 document(s), 0 failure(s)", stdout.getvalue())
+
+
+class TestDocumentSummaries(TestCase):
+    def setUp(self):
+        self.certificate = models.DocumentIssuerChoice.objects.get(label="Certificate")
+        self.report = models.DocumentIssuerChoice.objects.get(label="Report")
+        self.documents = [
+            models.ReplicatDocument.objects.create(issuer=issuer, context_query=CONTEXT_QUERY)
+            for issuer in (self.certificate, self.report)
+        ]
+        models.DocumentIssuerChoice.objects.set_cached_instances()
+
+    def test_summaries(self):
+        with self.assertNumQueries(1):
+            summaries = models.ReplicatDocument.objects.order_by("created_at").summaries()
+
+        self.assertEqual([summary.id for summary in summaries], [document.id for document in self.documents])
+        self.assertEqual([summary.issuer_label for summary in summaries], ["Certificate", "Report"])
+        self.assertFalse(hasattr(summaries[0], "__dict__"))
+
+    def test_summaries_of_uncached_issuers(self):
+        self.report.read_only = True
+        self.report.save()
+        models.DocumentIssuerChoice.objects.set_cached_instances()
+
+        with self.assertNumQueries(2):
+            summaries = models.ReplicatDocument.objects.filter(issuer=self.report).summaries()
+
+        self.assertEqual(summaries[0].issuer_label, "Report")
+
+    def test_list_documents_command(self):
+        stdout = io.StringIO()
+
+        call_command("list_documents", "--issuer", "Report", stdout=stdout)
+
+        self.assertEqual(stdout.getvalue().split("\t")[:2], [str(self.documents[1].id), "Report"])
+
+    def test_admin_changelist_defers_json_fields(self):
+        self.client.force_login(User.objects.create_superuser("admin"))
+
+        response = self.client.get("/admin/replicat_documents/replicatdocument/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.context["cl"].queryset.query.deferred_loading, ({"context", "context_query", "metadata"}, True)
+        )
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_policies
+------------
+
+Tests for `replicat-documents` policies module.
+"""
+
+import io
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from replicat_documents import defaults, policies
+from replicat_documents.admission import render_queue
+from replicat_documents.imports import import_documents
+from replicat_documents.models import DocumentIssuerChoice, ReplicatDocument
+from tests.test_views import CONTEXT_QUERY
+
+
+@mock.patch.object(defaults, "RENDERER", "tests.renderers.DummyRenderer")
+class TestRenderPolicies(TestCase):
+    def setUp(self):
+        documents_root = tempfile.TemporaryDirectory()
+        self.addCleanup(documents_root.cleanup)
+        patcher = mock.patch.object(defaults, "DOCUMENTS_ROOT", Path(documents_root.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        cache.clear()
+        self.addCleanup(cache.clear)
+        render_queue.reset()
+        self.addCleanup(render_queue.reset)
+
+        self.certificate = DocumentIssuerChoice.objects.get(label="Certificate")
+        self.report = DocumentIssuerChoice.objects.get(label="Report")
+
+    def create_document(self, issuer):
+        return ReplicatDocument.objects.create(issuer=issuer, context_query=CONTEXT_QUERY)
+
+    def test_eager_documents_are_rendered_once_committed(self):
+        self.certificate.render_policy = policies.EAGER
+        self.certificate.save()
+
+        with mock.patch.object(policies, "schedule_render") as schedule_render:
+            with self.captureOnCommitCallbacks(execute=True):
+                eager = self.create_document(self.certificate)
+                schedule_render.assert_not_called()
+            self.create_document(self.report)
+
+        schedule_render.assert_called_once_with(eager.pk)
+
+    def test_imported_eager_documents_are_rendered_once_committed(self):
+        self.certificate.render_policy = policies.EAGER
+        self.certificate.save()
+
+        with mock.patch.object(policies, "schedule_render") as schedule_render:
+            with self.captureOnCommitCallbacks(execute=True):
+                batches = import_documents(self.certificate, [CONTEXT_QUERY, CONTEXT_QUERY], batch_size=1)
+                self.assertEqual(next(batches)[1], 1)
+                schedule_render.assert_not_called()
+                self.assertEqual(list(batches)[0][1], 1)
+            list(import_documents(self.report, [CONTEXT_QUERY]))
+
+        documents = ReplicatDocument.objects.filter(issuer=self.certificate).order_by("created_at")
+        self.assertCountEqual(
+            [call.args[0] for call in schedule_render.call_args_list], documents.values_list("pk", flat=True)
+        )
+
+    def test_render_document(self):
+        document = self.create_document(self.report)
+
+        self.assertTrue(policies.render_document(document.pk))
+        self.assertFalse(policies.render_document(document.pk))
+        document.refresh_from_db()
+        self.assertIsNotNone(document.rendered_to_pdf_at)
+
+    @mock.patch.object(defaults, "RENDER_QUEUE_SIZE", 0)
+    def test_render_document_with_a_full_queue(self):
+        document = self.create_document(self.report)
+
+        self.assertFalse(policies.render_document(document.pk))
+
+    def test_views_of_predictive_documents_are_counted(self):
+        self.report.render_policy = policies.PREDICTIVE
+        self.report.save()
+        document = self.create_document(self.report)
+
+        self.client.get(document.get_absolute_url())
+        self.client.get(f"/documents/{document.id}.pdf")
+        self.client.get(self.create_document(self.certificate).get_absolute_url())
+
+        self.assertEqual(
+            policies.get_access_counts([self.report, self.certificate]), {self.report.pk: 2, self.certificate.pk: 0}
+        )
+
+    def test_prerender_documents_command(self):
+        DocumentIssuerChoice.objects.update(render_policy=policies.PREDICTIVE)
+        certificates = [self.create_document(self.certificate) for _ in range(2)]
+        reports = [self.create_document(self.report) for _ in range(2)]
+        policies.record_access(DocumentIssuerChoice.objects.get(label="Report"))
+        stdout = io.StringIO()
+
+        call_command("prerender_documents", "--dry-run", "--limit", "3", stdout=stdout)
+
+        self.assertEqual(
+            [line.split("\t")[0] for line in stdout.getvalue().splitlines()],
+            [str(reports[1].id), str(reports[0].id), str(certificates[1].id)],
+        )
+
+        stdout = io.StringIO()
+        with mock.patch.object(policies.os, "getloadavg", return_value=(0.0, 0.0, 0.0)):
+            call_command("prerender_documents", "--limit", "3", stdout=stdout)
+
+        self.assertIn("Pre-rendered 3 document(s), 0 failure(s)", stdout.getvalue())
+        self.assertEqual(ReplicatDocument.objects.filter(rendered_to_pdf_at__isnull=True).get(), certificates[0])
+
+    def test_prerender_documents_stops_when_busy(self):
+        self.report.render_policy = policies.PREDICTIVE
+        self.report.save()
+        self.create_document(self.report)
+        stdout = io.StringIO()
+
+        with mock.patch.object(policies.os, "getloadavg", return_value=(1e6, 0.0, 0.0)):
+            call_command("prerender_documents", "--max-load", "1", stdout=stdout)
+
+        self.assertEqual(
+            stdout.getvalue().splitlines(),
+            ["Stopping, the server is busy", "Pre-rendered 0 document(s), 0 failure(s)"],
+        )
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_reload
+------------
+
+Tests for `replicat-documents` reload module.
+"""
+
+import io
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from django.apps import apps
+from django.core.management import call_command
+from django.test import TestCase
+
+from replicat_documents import defaults, reload
+from replicat_documents.apps import get_document_issuers
+from replicat_documents.models import DocumentIssuerChoice
+
+ISSUER_MODULE = '''
+from test_app.issuers.documents.report_issuer import DocumentIssuer as ReportIssuer
+
+
+class DocumentIssuer(ReportIssuer):
+    label = "{label}"
+'''
+
+
+class TestReloadIssuers(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.app_path = Path(directory.name, "hot_app")
+        self.app_path.joinpath("issuers", "documents").mkdir(parents=True)
+        for package in (self.app_path, self.app_path / "issuers", self.app_path / "issuers" / "documents"):
+            package.joinpath("__init__.py").touch()
+        self.module_path = self.app_path / "issuers" / "documents" / "hot_issuer.py"
+
+        sys.path.insert(0, directory.name)
+        app_configs = [*apps.get_app_configs(), SimpleNamespace(name="hot_app", path=str(self.app_path))]
+        patcher = mock.patch.object(apps, "get_app_configs", return_value=app_configs)
+        patcher.start()
+
+        def cleanup():
+            patcher.stop()
+            sys.path.remove(directory.name)
+            for name in [name for name in sys.modules if name.startswith("hot_app")]:
+                del sys.modules[name]
+            reload._module_mtimes.clear()
+            get_document_issuers.cache_clear()
+
+        self.addCleanup(cleanup)
+
+    def write_issuer(self, label):
+        self.module_path.write_text(ISSUER_MODULE.format(label=label))
+        # Make sure the modification time changes, whatever the filesystem resolution
+        stat = self.module_path.stat()
+        os.utime(self.module_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def test_issuers_are_added_changed_and_removed(self):
+        self.write_issuer("Hot")
+        self.assertEqual(reload.reload_issuers()["added"], ["hot_app.issuers.documents.hot_issuer"])
+        issuer = DocumentIssuerChoice.objects.get(app_name="hot_app")
+        self.assertEqual((issuer.label, issuer.enabled), ("Hot", True))
+        self.assertIn("Hot", DocumentIssuerChoice.objects.get_cached_labels().values())
+
+        self.write_issuer("Hotter")
+        self.assertEqual(reload.reload_issuers()["reloaded"], ["hot_app.issuers.documents.hot_issuer"])
+        issuer.refresh_from_db()
+        self.assertEqual(issuer.label, "Hotter")
+        self.assertEqual(issuer.get_document_issuer().label, "Hotter")
+
+        self.module_path.unlink()
+        self.assertEqual(reload.reload_issuers()["removed"], ["hot_app.issuers.documents.hot_issuer"])
+        issuer.refresh_from_db()
+        self.assertFalse(issuer.enabled)
+        self.assertTrue(DocumentIssuerChoice.objects.get(label="Report").enabled)
+
+    @mock.patch.object(defaults, "WATCH_ISSUERS_INTERVAL", 0.01)
+    def test_watch_issuers_polls_modules(self):
+        stop_event = threading.Event()
+        reloaded = threading.Event()
+
+        def reload_issuers():
+            reloaded.set()
+            stop_event.set()
+
+        with mock.patch.object(reload, "reload_issuers", reload_issuers):
+            thread = threading.Thread(target=reload.watch_issuers, args=(stop_event,))
+            thread.start()
+            try:
+                # The watcher may take its first snapshot after a single write
+                for label in ("Hot", "Hotter", "Hottest"):
+                    self.write_issuer(label)
+                    if reloaded.wait(timeout=1):
+                        break
+            finally:
+                stop_event.set()
+                thread.join()
+
+        self.assertTrue(reloaded.is_set())
+
+    def test_reload_issuers_command(self):
+        self.write_issuer("Hot")
+        stdout = io.StringIO()
+
+        call_command("reload_issuers", stdout=stdout)
+
+        self.assertIn("Added hot_app.issuers.documents.hot_issuer", stdout.getvalue())
@@ -0,0 +1,334 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_renderers
+------------
+
+Tests for `replicat-documents` renderers module.
+"""
+
+import base64
+import io
+import tempfile
+from pathlib import Path
+from unittest import mock, skipUnless
+
+from django.core.management import call_command
+from django.template import Engine
+from django.test import TestCase
+from PIL import Image
+
+from replicat_documents import defaults, renderers
+from replicat_documents.exceptions import RendererUnavailable, UnsupportedRenditionFormat
+from replicat_documents.fetchers import static_file_cache
+from replicat_documents.models import DocumentIssuerChoice, ReplicatDocument
+from replicat_documents.renderers import (
+    HTML,
+    PDF,
+    PNG,
+    BaseRenderer,
+    BrowserPoolRenderer,
+    BrowserSession,
+    WeasyPrintRenderer,
+    get_renderer,
+    is_rasterizer_available,
+)
+from replicat_documents.storage import get_documents_storage
+from test_app.issuers.documents.certificate_issuer import DocumentIssuer as CertificateIssuer
+from tests.renderers import PDF_CONTENT
+from tests.test_views import CONTEXT_QUERY
+
+
+class FakeDriver:
+    def __init__(self):
+        self.service = None
+        self.quitted = False
+
+    def get(self, url):
+        pass
+
+    def execute_cdp_cmd(self, command, parameters):
+        if command == "Page.captureScreenshot":
+            output = io.BytesIO()
+            Image.new("RGB", (1280, 720)).save(output, format="PNG")
+            return {"data": base64.b64encode(output.getvalue()).decode()}
+        return {"data": base64.b64encode(PDF_CONTENT).decode()}
+
+    def quit(self):
+        self.quitted = True
+
+
+class FakeBrowserPoolRenderer(BrowserPoolRenderer):
+    def start_session(self):
+        return BrowserSession(FakeDriver())
+
+
+class TestBrowserPoolRenderer(TestCase):
+    def test_sessions_are_reused(self):
+        renderer = FakeBrowserPoolRenderer(size=1)
+
+        self.assertEqual(renderer.render_pdf("<p>1</p>", ""), PDF_CONTENT)
+        session = renderer.acquire()
+        renderer.release(session)
+        renderer.render_pdf("<p>2</p>", "")
+
+        self.assertEqual(session.pages, 2)
+        self.assertFalse(session.driver.quitted)
+
+    def test_sessions_are_recycled_after_max_pages(self):
+        renderer = FakeBrowserPoolRenderer(size=1, max_pages=2)
+        renderer.warm_up()
+        session = renderer.acquire()
+        renderer.release(session)
+
+        renderer.render_pdf("<p>1</p>", "")
+        renderer.render_pdf("<p>2</p>", "")
+
+        self.assertTrue(session.driver.quitted)
+        self.assertIsNot(renderer.acquire(), session)
+
+    def test_sessions_are_recycled_above_max_memory(self):
+        renderer = FakeBrowserPoolRenderer(size=1, max_memory=100)
+        session = renderer.acquire()
+        renderer.release(session)
+
+        with mock.patch.object(BrowserSession, "get_memory_usage", return_value=100):
+            renderer.render_pdf("<p>1</p>", "")
+        self.assertFalse(session.driver.quitted)
+
+        with mock.patch.object(BrowserSession, "get_memory_usage", return_value=101):
+            renderer.render_pdf("<p>2</p>", "")
+        self.assertTrue(session.driver.quitted)
+        self.assertIsNot(renderer.acquire(), session)
+
+    def test_renditions_share_a_single_page_load(self):
+        renderer = FakeBrowserPoolRenderer(size=1)
+
+        renditions = renderer.render("<p>1</p>", "p { color: red; }", formats=(PDF, PNG, HTML))
+
+        self.assertEqual(renditions[PDF], PDF_CONTENT)
+        self.assertEqual(Image.open(io.BytesIO(renditions[PNG])).size, (320, 180))
+        self.assertIn(b"p { color: red; }", renditions[HTML])
+        self.assertEqual(renderer.acquire().pages, 1)
+
+    def test_unsupported_format(self):
+        with self.assertRaises(UnsupportedRenditionFormat):
+            BaseRenderer().render("<p>1</p>", "", formats=(PNG,))
+
+    def test_full_pool_times_out(self):
+        renderer = FakeBrowserPoolRenderer(size=1, timeout=0.1)
+        renderer.acquire()
+
+        with self.assertRaises(RendererUnavailable):
+            renderer.acquire()
+
+
+@skipUnless(WeasyPrintRenderer.is_available(), "WeasyPrint or its system libraries are not installed")
+class TestWeasyPrintRenderer(TestCase):
+    def test_render_pdf(self):
+        renditions = WeasyPrintRenderer().render("<p>Hello</p>", "p { color: red; }", formats=(PDF, HTML))
+
+        self.assertTrue(renditions[PDF].startswith(b"%PDF"))
+        self.assertIn(b"<p>Hello</p>", renditions[HTML])
+
+    def test_css_assets_are_cached(self):
+        static_file_cache.clear()
+        self.addCleanup(static_file_cache.clear)
+        with tempfile.TemporaryDirectory() as directory:
+            image = Path(directory, "background.png")
+            Image.new("RGB", (4, 4), "red").save(image)
+            css = f"body {{ background: url({image.as_uri()}); }}"
+
+            renderer = WeasyPrintRenderer()
+            renderer.render("<p>Hello</p>", css, formats=(PDF,))
+            renderer.render("<p>Hello</p>", css, formats=(PDF,))
+
+        self.assertEqual(static_file_cache.misses, 1)
+        self.assertEqual(static_file_cache.hits, 1)
+
+    @skipUnless(is_rasterizer_available(), "pdftoppm is not installed")
+    def test_render_thumbnail(self):
+        renditions = WeasyPrintRenderer().render("<p>Hello</p>", "@page { size: A4; }", formats=(PDF, PNG))
+
+        self.assertEqual(max(Image.open(io.BytesIO(renditions[PNG])).size), 320)
+
+    @mock.patch.object(defaults, "RENDERER", "replicat_documents.renderers.WeasyPrintRenderer")
+    def test_render_document(self):
+        documents_root = tempfile.TemporaryDirectory()
+        self.addCleanup(documents_root.cleanup)
+        document = ReplicatDocument.objects.create(
+            issuer=DocumentIssuerChoice.objects.get(label="Certificate"), context_query=CONTEXT_QUERY
+        )
+
+        with mock.patch.object(defaults, "DOCUMENTS_ROOT", Path(documents_root.name)):
+            self.assertTrue(document.render_to_pdf())
+            self.assertTrue(document.get_document_path().read_bytes().startswith(b"%PDF"))
+
+
+@mock.patch.object(defaults, "RENDERER", "tests.renderers.DummyRenderer")
+class TestRenderToPdf(TestCase):
+    def setUp(self):
+        self.documents_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.documents_root.cleanup)
+        patcher = mock.patch.object(defaults, "DOCUMENTS_ROOT", Path(self.documents_root.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.document = ReplicatDocument.objects.create(
+            issuer=DocumentIssuerChoice.objects.get(label="Certificate"), context_query=CONTEXT_QUERY
+        )
+
+    def test_renderer_is_created_once_per_process(self):
+        self.assertIs(get_renderer(), get_renderer())
+
+    def test_render_to_pdf(self):
+        self.assertTrue(self.document.render_to_pdf())
+
+        self.document.refresh_from_db()
+        self.assertIsNotNone(self.document.rendered_to_pdf_at)
+        self.assertEqual(self.document.context["student"]["name"], "Richie Cunningham")
+        self.assertEqual(self.document.get_document_path().read_bytes(), PDF_CONTENT)
+        self.assertIn("Richie Cunningham", get_renderer().rendered[-1][0])
+
+    def test_document_view_pdf(self):
+        response = self.client.get(f"/documents/{self.document.id}.pdf")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertEqual(b"".join(response.streaming_content), PDF_CONTENT)
+
+    def test_document_view_pdf_ranges(self):
+        url = f"/documents/{self.document.id}.pdf"
+        size = len(PDF_CONTENT)
+        self.assertEqual(self.client.get(url)["Accept-Ranges"], "bytes")
+
+        response = self.client.get(url, HTTP_RANGE="bytes=4-7")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 4-7/{size}")
+        self.assertEqual(response["Content-Length"], "4")
+        self.assertEqual(b"".join(response.streaming_content), PDF_CONTENT[4:8])
+
+        response = self.client.get(url, HTTP_RANGE="bytes=-6")
+        self.assertEqual(b"".join(response.streaming_content), PDF_CONTENT[-6:])
+
+        response = self.client.get(url, HTTP_RANGE=f"bytes={size}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{size}")
+
+        for headers in ({"HTTP_RANGE": "bytes=0-1,4-5"}, {"HTTP_RANGE": "bytes=0-1", "HTTP_IF_RANGE": '"etag"'}):
+            response = self.client.get(url, **headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(b"".join(response.streaming_content), PDF_CONTENT)
+
+    def test_linearized_pdf(self):
+        with mock.patch.object(defaults, "LINEARIZE_PDF", True), mock.patch.object(
+            renderers, "is_linearizer_available", return_value=True
+        ), mock.patch.object(renderers, "linearize_pdf", return_value=b"%PDF-linearized") as linearize_pdf:
+            self.assertEqual(get_renderer().render_pdf("<p>Hello</p>", ""), b"%PDF-linearized")
+
+        linearize_pdf.assert_called_once_with(PDF_CONTENT)
+
+    def test_pdf_is_not_linearized_without_qpdf(self):
+        renderers.warn_linearizer_unavailable.cache_clear()
+        with mock.patch.object(defaults, "LINEARIZE_PDF", True), mock.patch.object(
+            renderers, "is_linearizer_available", return_value=False
+        ), self.assertLogs("replicat_documents", "WARNING"):
+            self.assertEqual(get_renderer().render_pdf("<p>Hello</p>", ""), PDF_CONTENT)
+
+    @mock.patch.object(defaults, "PAGE_PREVIEW_SIZE", (20, 20))
+    def test_page_previews(self):
+        page = io.BytesIO()
+        Image.new("RGB", (100, 50), "white").save(page, format="PNG")
+
+        with mock.patch("replicat_documents.views.is_rasterizer_available", return_value=True), mock.patch(
+            "replicat_documents.models.rasterize_pdf", return_value=[page.getvalue()] * 2
+        ) as rasterize_pdf:
+            response = self.client.get(f"/documents/{self.document.id}/pages/2.png")
+            self.assertEqual(self.client.get(f"/documents/{self.document.id}/pages/1.png").status_code, 200)
+            self.assertEqual(self.client.get(f"/documents/{self.document.id}/pages/3.png").status_code, 404)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(Image.open(io.BytesIO(b"".join(response.streaming_content))).size, (20, 10))
+        rasterize_pdf.assert_called_once_with(PDF_CONTENT, resolution=defaults.PAGE_PREVIEW_RESOLUTION)
+
+        # Rendering the PDF again deletes the outdated previews
+        self.document.refresh_from_db()
+        preview_path = Path(get_documents_storage().path(self.document.get_page_preview_name(1)))
+        self.assertTrue(preview_path.exists())
+        self.document.render_to_pdf()
+        self.assertIsNone(self.document.page_preview_count)
+        self.assertFalse(preview_path.exists())
+
+    def test_page_previews_without_rasterizer(self):
+        with mock.patch("replicat_documents.views.is_rasterizer_available", return_value=False):
+            response = self.client.get(f"/documents/{self.document.id}/pages/1.png")
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_render_renditions(self):
+        rendered = len(get_renderer().rendered)
+
+        self.assertTrue(self.document.render(formats=(PDF, PNG, HTML)))
+
+        self.assertEqual(len(get_renderer().rendered), rendered + 1)
+        self.assertEqual(
+            sorted(self.document.renditions.values_list("format", flat=True)), sorted([PDF, PNG, HTML])
+        )
+        for rendition in self.document.renditions.all():
+            self.assertTrue(rendition.get_path().exists())
+
+    def test_expire_files(self):
+        self.document.render(formats=(PDF, PNG))
+
+        self.document.expire_files()
+
+        self.assertFalse(self.document.renditions.exists())
+        self.assertIsNone(self.document.rendered_to_pdf_at)
+        self.assertFalse(self.document.get_rendition_path(PNG).exists())
+
+    def test_force_render_document_command(self):
+        call_command("force_render_document", str(self.document.id), "--format", "pdf", "--format", "html")
+
+        self.assertEqual(sorted(self.document.renditions.values_list("format", flat=True)), [HTML, PDF])
+
+    def test_template_fingerprint_tracks_extended_and_included_templates(self):
+        templates = {
+            "document.html": '{% extends "base.html" %}{% block body %}{% include "footer.html" %}{% endblock %}',
+            "base.html": "{% block body %}{% endblock %}",
+            "footer.html": "Footer",
+            "document.css": "",
+        }
+
+        class Issuer(CertificateIssuer):
+            html_template_path = "document.html"
+            css_template_path = "document.css"
+            template_engine = Engine(loaders=[("django.template.loaders.locmem.Loader", templates)])
+
+        fingerprint = Issuer().get_template_fingerprint()
+        templates["footer.html"] = "Changed footer"
+
+        self.assertNotEqual(Issuer().get_template_fingerprint(), fingerprint)
+
+    def test_stale_documents(self):
+        other_document = ReplicatDocument.objects.create(
+            issuer=DocumentIssuerChoice.objects.get(label="Report"), context_query=CONTEXT_QUERY
+        )
+        ReplicatDocument.objects.create(
+            issuer=DocumentIssuerChoice.objects.get(label="Certificate"), context_query=CONTEXT_QUERY
+        )
+        self.document.render(formats=(PDF, HTML))
+        other_document.render()
+
+        self.assertFalse(ReplicatDocument.objects.stale().exists())
+
+        with mock.patch.object(CertificateIssuer, "get_template_fingerprint", return_value="changed"):
+            self.assertEqual(list(ReplicatDocument.objects.stale()), [self.document])
+
+            call_command("rerender_stale_documents", stdout=io.StringIO())
+
+            self.assertFalse(ReplicatDocument.objects.stale().exists())
+            self.document.refresh_from_db()
+            self.assertEqual(self.document.template_fingerprint, "changed")
+            self.assertEqual(self.document.renditions.count(), 2)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_routers
+------------
+
+Tests for `replicat-documents` routers module.
+"""
+
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+
+from replicat_documents import defaults
+from replicat_documents.middleware import ReplicaStickinessMiddleware
+from replicat_documents.models import ReplicatDocument
+from replicat_documents.routers import ReplicaRouter, is_pinned_to_primary, pin_to_primary, unpin
+
+
+@mock.patch.object(defaults, "READ_REPLICAS", ("replica",))
+class TestReplicaRouter(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        unpin()
+        self.addCleanup(unpin)
+
+    def test_reads_go_to_replicas(self):
+        self.assertEqual(self.router.db_for_read(ReplicatDocument), "replica")
+        self.assertIsNone(self.router.db_for_read(User))
+
+    def test_reads_stick_to_primary_after_a_write(self):
+        self.assertEqual(self.router.db_for_write(ReplicatDocument), "default")
+
+        self.assertEqual(self.router.db_for_read(ReplicatDocument), "default")
+
+    def test_stickiness_expires(self):
+        pin_to_primary(until=time.time() - 1)
+
+        self.assertEqual(self.router.db_for_read(ReplicatDocument), "replica")
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate("replica", "replicat_documents"))
+        self.assertIsNone(self.router.allow_migrate("default", "replicat_documents"))
+
+
+@mock.patch.object(defaults, "READ_REPLICAS", ("replica",))
+class TestReplicaStickinessMiddleware(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_write_sets_cookie(self):
+        def write(request):
+            ReplicaRouter().db_for_write(ReplicatDocument)
+            return HttpResponse()
+
+        response = ReplicaStickinessMiddleware(write)(self.factory.post("/"))
+
+        self.assertIn(ReplicaStickinessMiddleware.cookie_name, response.cookies)
+        self.assertFalse(is_pinned_to_primary())
+
+    def test_cookie_sticks_reads_to_primary(self):
+        pinned = []
+
+        def read(request):
+            pinned.append(is_pinned_to_primary())
+            return HttpResponse()
+
+        middleware = ReplicaStickinessMiddleware(read)
+        request = self.factory.get("/")
+        request.COOKIES[ReplicaStickinessMiddleware.cookie_name] = str(time.time() + 5)
+        response = middleware(request)
+        middleware(self.factory.get("/"))
+
+        self.assertEqual(pinned, [True, False])
+        self.assertNotIn(ReplicaStickinessMiddleware.cookie_name, response.cookies)
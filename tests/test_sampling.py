@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_sampling
+------------
+
+Tests for `replicat-documents` sampling module.
+"""
+
+import pstats
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
+from django.test import TestCase
+
+from replicat_documents import defaults
+from replicat_documents.models import DocumentIssuerChoice, ReplicatDocument
+from replicat_documents.sampling import StackSampler, profile_render
+from tests.renderers import DummyRenderer
+from tests.test_views import CONTEXT_QUERY
+
+
+class SlowRenderer(DummyRenderer):
+    """Renderer taking long enough for its layout to be sampled"""
+
+    def layout(self, html, css, formats, metadata=None):
+        time.sleep(0.05)
+        return super().layout(html, css, formats, metadata=metadata)
+
+
+@mock.patch.object(defaults, "RENDERER", "tests.test_sampling.SlowRenderer")
+@mock.patch.object(defaults, "RENDER_PROFILING_INTERVAL", 0.001)
+class TestSampling(TestCase):
+    def setUp(self):
+        for name in ("DOCUMENTS_ROOT", "RENDER_PROFILING_DIR"):
+            directory = tempfile.TemporaryDirectory()
+            self.addCleanup(directory.cleanup)
+            patcher = mock.patch.object(defaults, name, Path(directory.name))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.document = ReplicatDocument.objects.create(
+            issuer=DocumentIssuerChoice.objects.get(label="Certificate"), context_query=CONTEXT_QUERY
+        )
+
+    def test_stack_sampler(self):
+        sampler = StackSampler(threading.get_ident(), 0.001)
+        sampler.start()
+        time.sleep(0.05)
+        sampler.stop()
+
+        self.assertTrue(sampler.stacks)
+        self.assertTrue(all("test_stack_sampler (" in stack for stack in sampler.stacks))
+
+    def test_render_jobs_are_not_profiled_by_default(self):
+        with mock.patch("replicat_documents.sampling.random.random") as random:
+            self.assertTrue(self.document.render_to_pdf())
+
+        random.assert_not_called()
+        self.assertEqual(list(defaults.RENDER_PROFILING_DIR.iterdir()), [])
+
+    @mock.patch.object(defaults, "RENDER_PROFILING_RATES", {"Certificate": 1})
+    def test_sampled_render_job(self):
+        self.assertTrue(self.document.render_to_pdf())
+
+        (path,) = defaults.RENDER_PROFILING_DIR.iterdir()
+        self.assertTrue(path.name.startswith(f"certificate_{self.document.id}_"))
+        self.assertEqual(path.suffix, ".folded")
+        lines = path.read_text().splitlines()
+        self.assertTrue(any("layout (" in line for line in lines))
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            self.assertGreater(int(count), 0)
+
+    @mock.patch.object(defaults, "RENDER_PROFILING_RATE", 1)
+    @mock.patch.object(defaults, "RENDER_PROFILER", "cprofile")
+    def test_deterministic_profiler(self):
+        self.assertTrue(self.document.render_to_pdf())
+
+        (path,) = defaults.RENDER_PROFILING_DIR.iterdir()
+        self.assertEqual(path.suffix, ".prof")
+        functions = {function for _, _, function in pstats.Stats(str(path)).stats}
+        self.assertIn("fetch_context", functions)
+        self.assertIn("layout", functions)
+
+    @mock.patch.object(defaults, "RENDER_PROFILING_RATE", 1)
+    @mock.patch.object(defaults, "RENDER_PROFILING_RATES", {"Certificate": 0.5})
+    def test_issuer_rate(self):
+        with mock.patch("replicat_documents.sampling.random.random", return_value=0.6):
+            with profile_render("Certificate", self.document.id):
+                pass
+        self.assertEqual(list(defaults.RENDER_PROFILING_DIR.iterdir()), [])
+
+        with mock.patch("replicat_documents.sampling.random.random", return_value=0.4):
+            with profile_render("Certificate", self.document.id):
+                pass
+        self.assertEqual(len(list(defaults.RENDER_PROFILING_DIR.iterdir())), 1)
+
+    @mock.patch.object(defaults, "RENDER_PROFILING_RATES", {"Certificate": 1})
+    def test_failed_render_jobs_are_profiled(self):
+        with self.assertRaises(ValueError):
+            with profile_render("Certificate", self.document.id):
+                raise ValueError
+
+        self.assertEqual(len(list(defaults.RENDER_PROFILING_DIR.iterdir())), 1)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_search
+------------
+
+Tests for `replicat-documents` search module.
+"""
+
+import io
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from replicat_documents import defaults
+from replicat_documents.models import DocumentIssuerChoice, DocumentSearchText, ReplicatDocument
+from replicat_documents.search import extract_text, get_fts5_query
+from tests.test_views import CONTEXT_QUERY
+
+
+@mock.patch.object(defaults, "RENDERER", "tests.renderers.DummyRenderer")
+class TestSearch(TestCase):
+    def setUp(self):
+        documents_root = tempfile.TemporaryDirectory()
+        self.addCleanup(documents_root.cleanup)
+        patcher = mock.patch.object(defaults, "DOCUMENTS_ROOT", Path(documents_root.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        issuer = DocumentIssuerChoice.objects.get(label="Certificate")
+        self.richie = ReplicatDocument.objects.create(issuer=issuer, context_query=CONTEXT_QUERY)
+        self.fonzie = ReplicatDocument.objects.create(
+            issuer=issuer, context_query={**CONTEXT_QUERY, "student": {"name": "Arthur Fonzarelli"}}
+        )
+
+    def test_extract_text(self):
+        html = "<html><head><title>T</title><style>p { color: red }</style></head><body><p>Super&nbsp;Course</p>\n"
+        html += "<p>Richie   Cunningham</p><script>var a = 1;</script></body></html>"
+
+        self.assertEqual(extract_text(html), "Super Course Richie Cunningham")
+
+    def test_fts5_query_is_quoted(self):
+        self.assertEqual(get_fts5_query('Richie "OR NEAR( Cunningham'), '"Richie" """OR" "NEAR(" "Cunningham"')
+
+    def test_rendered_text_is_indexed(self):
+        self.assertTrue(self.richie.render_to_pdf())
+
+        self.assertIn("Richie Cunningham", DocumentSearchText.objects.get(document=self.richie).text)
+
+    def test_search(self):
+        self.richie.render_to_pdf()
+        self.fonzie.render_to_pdf()
+
+        self.assertEqual(list(ReplicatDocument.objects.search("cunningham richie")), [self.richie])
+        self.assertEqual(list(ReplicatDocument.objects.search("Fonzarelli")), [self.fonzie])
+        self.assertEqual(set(ReplicatDocument.objects.search("Super Course")), {self.richie, self.fonzie})
+        self.assertEqual(list(ReplicatDocument.objects.search("Richie Fonzarelli")), [])
+        self.assertEqual(list(ReplicatDocument.objects.search('" ')), [])
+        self.assertIsInstance(ReplicatDocument.objects.search("Richie").get().search_rank, float)
+
+    def test_reindexed_documents_are_found(self):
+        self.richie.render_to_pdf()
+        self.richie.context_query = {**CONTEXT_QUERY, "student": {"name": "Potsie Weber"}}
+        self.richie.context = None
+        self.richie.save()
+        self.richie.render_to_pdf()
+
+        self.assertEqual(list(ReplicatDocument.objects.search("Richie")), [])
+        self.assertEqual(list(ReplicatDocument.objects.search("Potsie")), [self.richie])
+
+    def test_index_documents_command(self):
+        with mock.patch.object(defaults, "SEARCH_INDEX", False):
+            self.richie.render_to_pdf()
+        stdout = io.StringIO()
+
+        call_command("index_documents", "--dry-run", stdout=stdout)
+        call_command("index_documents", stdout=stdout)
+
+        self.assertEqual(
+            stdout.getvalue().splitlines(), ["1 document(s) to index", "Indexed 1 document(s), 0 failure(s)"]
+        )
+        self.assertEqual(list(ReplicatDocument.objects.search("Richie")), [self.richie])
+
+    def test_admin_search(self):
+        self.richie.render_to_pdf()
+        self.client.force_login(User.objects.create_superuser("admin"))
+
+        response = self.client.get("/admin/replicat_documents/replicatdocument/", {"q": "Richie"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["cl"].result_list), [self.richie])
+
+    def test_admin_search_is_ranked(self):
+        self.richie.render_to_pdf()
+        self.fonzie.render_to_pdf()
+        self.client.force_login(User.objects.create_superuser("admin"))
+        url = "/admin/replicat_documents/replicatdocument/"
+
+        response = self.client.get(url, {"q": "Super Course"})
+
+        self.assertEqual(response.context["cl"].queryset.query.order_by[0], "-search_rank")
+        self.assertEqual(len(response.context["cl"].result_list), 2)
+
+        response = self.client.get(url, {"q": "Super Course", "o": "2"})
+
+        # Sorted columns take precedence over the rank
+        self.assertEqual(response.context["cl"].queryset.query.order_by[0], "created_at")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_storage
+------------
+
+Tests for `replicat-documents` storage module.
+"""
+
+import io
+import math
+import re
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from replicat_documents import defaults, storage
+from replicat_documents.models import DocumentIssuerChoice, ReplicatDocument
+from replicat_documents.renderers import PDF, PNG
+from replicat_documents.storage import get_documents_storage, get_rendition_name
+from tests.renderers import PDF_CONTENT, PNG_CONTENT
+from tests.test_views import CONTEXT_QUERY
+
+
+class TestRenditionName(TestCase):
+    def test_hashed_directories(self):
+        name = get_rendition_name("0c5d7a5e-9e3a-4c5b-9f0e-3b6f0a0d1c2e", PDF)
+
+        self.assertRegex(name, r"^[0-9a-f]{2}/[0-9a-f]{2}/0c5d7a5e-9e3a-4c5b-9f0e-3b6f0a0d1c2e\.pdf$")
+        self.assertEqual(name, get_rendition_name("0c5d7a5e-9e3a-4c5b-9f0e-3b6f0a0d1c2e", PDF))
+
+    def test_flat_layout(self):
+        self.assertEqual(get_rendition_name("abc", PNG, fanout=0), "abc.png")
+
+
+@mock.patch.object(defaults, "RENDERER", "tests.renderers.DummyRenderer")
+@mock.patch.object(defaults, "DOCUMENTS_STORAGE", "tests.storages.MemoryStorage")
+@mock.patch.object(defaults, "DOCUMENTS_STORAGE_OPTIONS", {"chunk_size": 16})
+class TestObjectStorage(TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(storage._storages, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.document = ReplicatDocument.objects.create(
+            issuer=DocumentIssuerChoice.objects.get(label="Certificate"), context_query=CONTEXT_QUERY
+        )
+
+    def test_render_writes_through_storage(self):
+        self.assertTrue(self.document.render(formats=(PDF, PNG)))
+
+        documents_storage = get_documents_storage()
+        name = self.document.get_rendition_name(PDF)
+        self.assertEqual(documents_storage.files[name], PDF_CONTENT)
+        self.assertEqual(documents_storage.files[self.document.get_rendition_name(PNG)], PNG_CONTENT)
+        self.assertEqual(documents_storage.uploaded_chunks[name], math.ceil(len(PDF_CONTENT) / 16))
+
+        self.document.expire_files()
+        self.assertEqual(documents_storage.files, {})
+
+    def test_document_view_pdf(self):
+        response = self.client.get(f"/documents/{self.document.id}.pdf")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), PDF_CONTENT)
+
+    def test_document_url(self):
+        self.assertEqual(
+            self.document.get_document_issuer().get_document_url(),
+            f"https://storage.example.com/{self.document.get_rendition_name(PDF)}",
+        )
+
+
+class TestReshardDocumentsCommand(TestCase):
+    def setUp(self):
+        documents_root = tempfile.TemporaryDirectory()
+        self.addCleanup(documents_root.cleanup)
+        patcher = mock.patch.object(defaults, "DOCUMENTS_ROOT", Path(documents_root.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.document = ReplicatDocument.objects.create(
+            issuer=DocumentIssuerChoice.objects.get(label="Certificate"), context_query=CONTEXT_QUERY
+        )
+        self.document.renditions.create(format=PDF, rendered_at=timezone.now())
+        self.flat_path = Path(documents_root.name, f"{self.document.id}.pdf")
+        self.flat_path.write_bytes(PDF_CONTENT)
+
+    def test_dry_run(self):
+        stdout = io.StringIO()
+
+        call_command("reshard_documents", "--dry-run", stdout=stdout)
+
+        self.assertEqual(stdout.getvalue().strip(), "1 file(s) to move")
+        self.assertTrue(self.flat_path.exists())
+
+    def test_only_recorded_renditions_are_looked_up(self):
+        ReplicatDocument.objects.create(
+            issuer=DocumentIssuerChoice.objects.get(label="Report"),
+            context_query=CONTEXT_QUERY,
+            rendered_to_pdf_at=timezone.now(),
+        )
+        ReplicatDocument.objects.create(
+            issuer=DocumentIssuerChoice.objects.get(label="Report"), context_query=CONTEXT_QUERY
+        )
+
+        with mock.patch.object(FileSystemStorage, "exists", return_value=False) as exists:
+            call_command("reshard_documents", "--dry-run", stdout=io.StringIO())
+
+        self.assertEqual(exists.call_count, 2)
+
+    def test_files_are_moved(self):
+        call_command("reshard_documents", stdout=io.StringIO())
+
+        self.assertIsInstance(get_documents_storage(), FileSystemStorage)
+        self.assertFalse(self.flat_path.exists())
+        self.assertEqual(self.document.get_document_path().read_bytes(), PDF_CONTENT)
+        self.assertTrue(re.search(r"/[0-9a-f]{2}/[0-9a-f]{2}/[^/]+\.pdf$", str(self.document.get_document_path())))
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_validation
+------------
+
+Tests for `replicat-documents` validation module.
+"""
+
+import io
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from replicat_documents.models import DocumentIssuerChoice
+from replicat_documents.validation import validate_context_queries
+from tests.test_views import CONTEXT_QUERY
+
+
+class TestValidation(TestCase):
+    def setUp(self):
+        self.issuer = DocumentIssuerChoice.objects.get(label="Certificate")
+        self.payloads = [CONTEXT_QUERY, {"student": {}}, json.dumps(CONTEXT_QUERY), "not json"] * 3
+
+    def assertResults(self, results):
+        self.assertEqual([result.row for result in results], list(range(1, 13)))
+        self.assertEqual([not result.errors for result in results], [True, False, True, False] * 3)
+        self.assertEqual(results[1].errors[0]["loc"], ("student", "name"))
+
+    def test_validate_in_process(self):
+        self.assertResults(list(validate_context_queries(self.issuer, iter(self.payloads), chunk_size=5, workers=0)))
+
+    def test_validate_in_worker_processes(self):
+        self.assertResults(list(validate_context_queries(self.issuer, iter(self.payloads), chunk_size=5, workers=2)))
+
+    def test_validate_context_queries_command(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name, "payloads.jsonl")
+        path.write_text(f"{json.dumps(CONTEXT_QUERY)}\n{{}}\n")
+        stdout = io.StringIO()
+
+        with self.assertRaisesMessage(CommandError, "1 invalid payload(s)"):
+            call_command(
+                "validate_context_queries",
+                "Certificate",
+                str(path),
+                "--workers",
+                "0",
+                "--errors-only",
+                stdout=stdout,
+                stderr=io.StringIO(),
+            )
+
+        results = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual([(result["row"], result["valid"]) for result in results], [(2, False)])
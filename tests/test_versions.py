@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_versions
+------------
+
+Tests for `replicat-documents` versions module.
+"""
+
+import copy
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db.models import QuerySet
+from django.test import TestCase
+
+from replicat_documents import defaults, models
+from replicat_documents.models import DocumentContextVersion, DocumentIssuerChoice, ReplicatDocument
+from replicat_documents.versions import apply_json_patch, make_json_patch
+from tests.test_views import CONTEXT_QUERY
+
+
+class TestJsonPatch(TestCase):
+    def test_patch_round_trip(self):
+        source = {"a": 1, "b": {"c": [1, 2, 3], "d": "x"}, "e/f": True, "g": [{"h": 1}]}
+        target = {"a": 1.0, "b": {"c": [1, 4], "i": None}, "e/f": False, "g": [{"h": 1}, {"h": 2}, 3]}
+
+        patch = make_json_patch(source, target)
+
+        self.assertEqual(apply_json_patch(source, patch), target)
+        self.assertIn({"op": "replace", "path": "/e~1f", "value": False}, patch)
+        self.assertIn({"op": "remove", "path": "/b/c/2"}, patch)
+        self.assertNotIn("/g/0/h", [operation["path"] for operation in patch])
+        self.assertEqual(make_json_patch(target, copy.deepcopy(target)), [])
+
+    def test_invalid_patch(self):
+        with self.assertRaises(ValueError):
+            apply_json_patch({}, [{"op": "replace", "path": "/missing", "value": 1}])
+        with self.assertRaises(ValueError):
+            apply_json_patch({}, [{"op": "move", "from": "/a", "path": "/b"}])
+
+
+@mock.patch.object(defaults, "CONTEXT_HISTORY", True)
+@mock.patch.object(defaults, "CONTEXT_VERSION_SNAPSHOT_INTERVAL", 3)
+class TestContextHistory(TestCase):
+    def setUp(self):
+        self.document = ReplicatDocument.objects.create(
+            issuer=DocumentIssuerChoice.objects.get(label="Certificate"), context_query=CONTEXT_QUERY
+        )
+
+    def rename_student(self, name):
+        self.document.context_query = {**self.document.context_query, "student": {"name": name}}
+        self.document.save()
+
+    def test_versions_are_delta_compressed(self):
+        for index in range(5):
+            self.rename_student(f"Student {index}")
+
+        versions = list(self.document.context_versions.order_by("number"))
+
+        self.assertEqual([version.number for version in versions], [1, 2, 3, 4, 5])
+        snapshots = [version.snapshot is not None for version in versions]
+        self.assertEqual(snapshots, [False, False, True, False, False])
+        # Deltas turn the next version back into this one
+        self.assertEqual(
+            versions[1].delta, [{"op": "replace", "path": "/context_query/student/name", "value": "Student 0"}]
+        )
+        self.assertEqual(self.document.get_context_version(1)["context_query"], CONTEXT_QUERY)
+        self.assertEqual(versions[3].get_state()["context_query"]["student"]["name"], "Student 2")
+        with self.assertNumQueries(1):
+            latest = self.document.get_context_version(5)
+        self.assertEqual(latest["context_query"]["student"]["name"], "Student 3")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.document.get_context_version(), self.document.get_context_state())
+
+    def test_current_state_is_not_copied(self):
+        documents_root = tempfile.TemporaryDirectory()
+        self.addCleanup(documents_root.cleanup)
+        with mock.patch.object(defaults, "RENDERER", "tests.renderers.DummyRenderer"):
+            with mock.patch.object(defaults, "DOCUMENTS_ROOT", Path(documents_root.name)):
+                self.assertTrue(self.document.render_to_pdf())
+
+        # The first context of the document is not a change
+        self.assertEqual(self.document.context_versions.count(), 0)
+
+        self.rename_student("Fonzie")
+        (version,) = self.document.context_versions.all()
+
+        self.assertIsNone(version.snapshot)
+        self.assertEqual(
+            version.delta,
+            [{"op": "replace", "path": "/context_query/student/name", "value": CONTEXT_QUERY["student"]["name"]}],
+        )
+
+    def test_versioned_saves_lock_the_document(self):
+        select_for_update = QuerySet.select_for_update
+        with mock.patch.object(
+            QuerySet, "select_for_update", autospec=True, side_effect=select_for_update
+        ) as select_for_update:
+            self.rename_student("Fonzie")
+
+        select_for_update.assert_called_once()
+        self.assertEqual(self.document.context_versions.count(), 1)
+
+    def test_unchanged_contexts_are_not_versioned(self):
+        document = ReplicatDocument.objects.get()
+        document.metadata = {"title": "Unchanged context"}
+        document.save()
+        document.context_query = copy.deepcopy(CONTEXT_QUERY)
+        document.save(update_fields=["context_query"])
+
+        self.assertEqual(self.document.context_versions.count(), 0)
+
+    def test_loading_documents_does_not_serialize_them(self):
+        with mock.patch.object(models.json, "dumps", wraps=models.json.dumps) as dumps:
+            list(ReplicatDocument.objects.all())
+
+        dumps.assert_not_called()
+
+    def test_missing_version(self):
+        self.rename_student("Fonzie")
+
+        with self.assertRaises(DocumentContextVersion.DoesNotExist):
+            self.document.get_context_version(2)
+
+    def test_history_can_be_disabled(self):
+        with mock.patch.object(defaults, "CONTEXT_HISTORY", False):
+            self.rename_student("Fonzie")
+
+        self.assertEqual(self.document.context_versions.count(), 0)
+
+    def test_admin_change_view(self):
+        self.rename_student("Fonzie")
+        self.client.force_login(User.objects.create_superuser("admin"))
+
+        response = self.client.get(f"/admin/replicat_documents/replicatdocument/{self.document.id}/change/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "/context_query/student/name")
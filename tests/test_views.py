@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_views
+------------
+
+Tests for `replicat-documents` views and request budgets.
+"""
+
+import tempfile
+import threading
+import uuid
+from pathlib import Path
+from unittest import mock
+
+import django
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.test import RequestFactory, TestCase, TransactionTestCase, modify_settings
+from django.utils.http import http_date
+
+from replicat_documents import defaults, views
+from replicat_documents.exceptions import RequestBudgetExceeded
+from replicat_documents.issuer import AbstractDocumentIssuer
+from replicat_documents.models import DocumentIssuerChoice, ReplicatDocument
+from replicat_documents.testing import assert_view_within_budget, assert_within_budget
+from tests.renderers import PDF_CONTENT
+
+CONTEXT_QUERY = {
+    "student": {"name": "Richie Cunningham"},
+    "course": {
+        "name": "Super Course",
+        "organization": {
+            "name": "Super Org",
+            "representative": "Joanie Cunningham",
+            "signature": "signature.png",
+            "logo": "logo.png",
+        },
+    },
+}
+
+
+class TestDocumentViews(TestCase):
+    def setUp(self):
+        self.document = ReplicatDocument.objects.create(
+            issuer=DocumentIssuerChoice.objects.get(label="Certificate"), context_query=CONTEXT_QUERY
+        )
+
+    def test_document_view_html(self):
+        response = assert_view_within_budget(self.client, self.document.get_absolute_url(), queries=1)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Richie Cunningham")
+        self.assertContains(response, str(self.document.id))
+
+    def test_document_view_html_conditional_get(self):
+        response = self.client.get(self.document.get_absolute_url())
+
+        etag = response["ETag"]
+        response = self.client.get(self.document.get_absolute_url(), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+        # Templates may have changed since the document was updated
+        self.assertNotIn("Last-Modified", response)
+        response = self.client.get(self.document.get_absolute_url(), HTTP_IF_MODIFIED_SINCE=http_date())
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_document_view_html_is_cached(self):
+        render_templates = AbstractDocumentIssuer.render_templates
+        with mock.patch.object(
+            AbstractDocumentIssuer, "render_templates", autospec=True, side_effect=render_templates
+        ) as render_templates:
+            first_response = self.client.get(self.document.get_absolute_url())
+            second_response = self.client.get(self.document.get_absolute_url())
+
+            self.assertEqual(render_templates.call_count, 1)
+            self.assertEqual(first_response.content, second_response.content)
+
+            with mock.patch.object(AbstractDocumentIssuer, "get_template_fingerprint", return_value="changed"):
+                third_response = self.client.get(self.document.get_absolute_url())
+
+            self.assertEqual(render_templates.call_count, 2)
+            self.assertNotEqual(first_response["ETag"], third_response["ETag"])
+
+    def test_document_view_html_disabled_issuer(self):
+        DocumentIssuerChoice.objects.filter(label="Certificate").update(enabled=False)
+
+        response = self.client.get(self.document.get_absolute_url())
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_assert_within_budget(self):
+        with self.assertRaises(AssertionError):
+            with assert_within_budget(queries=1):
+                list(DocumentIssuerChoice.objects.all())
+                list(ReplicatDocument.objects.all())
+
+
+@modify_settings(MIDDLEWARE={"append": "replicat_documents.middleware.RequestBudgetMiddleware"})
+@mock.patch.object(defaults, "PROFILING_ENABLED", True)
+class TestRequestBudgetMiddleware(TestCase):
+    def setUp(self):
+        self.document = ReplicatDocument.objects.create(
+            issuer=DocumentIssuerChoice.objects.get(label="Certificate"), context_query=CONTEXT_QUERY
+        )
+
+    def test_server_timing_header(self):
+        response = self.client.get(self.document.get_absolute_url())
+
+        self.assertIn('db;desc="1 queries"', response["Server-Timing"])
+
+    def test_other_namespaces_are_not_profiled(self):
+        with mock.patch("replicat_documents.middleware.RequestProfile") as profile:
+            response = self.client.get("/admin/login/")
+
+        profile.assert_not_called()
+        self.assertNotIn("Server-Timing", response)
+
+    @mock.patch.object(defaults, "REQUEST_BUDGET", {"queries": 0})
+    def test_budget_exceeded_is_logged(self):
+        with self.assertLogs("replicat_documents", level="WARNING") as logs:
+            self.client.get(self.document.get_absolute_url())
+
+        self.assertIn("queries 1 > 0", logs.output[0])
+
+    @mock.patch.object(defaults, "REQUEST_BUDGET", {"queries": 0})
+    @mock.patch.object(defaults, "REQUEST_BUDGET_ACTION", "raise")
+    def test_budget_exceeded_raises(self):
+        with self.assertRaises(RequestBudgetExceeded):
+            self.client.get(self.document.get_absolute_url())
+
+
+# On-demand renders of the async views run in worker threads with their own connections, which
+# only see committed documents
+@mock.patch.object(defaults, "RENDERER", "tests.renderers.DummyRenderer")
+class TestAsyncDocumentViews(TransactionTestCase):
+    def setUp(self):
+        self.documents_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.documents_root.cleanup)
+        patcher = mock.patch.object(defaults, "DOCUMENTS_ROOT", Path(self.documents_root.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.document = ReplicatDocument.objects.create(
+            issuer=DocumentIssuerChoice.objects.get(label="Certificate"), context_query=CONTEXT_QUERY
+        )
+        self.factory = RequestFactory()
+
+    async def test_document_view_html_async(self):
+        response = await views.document_view_html_async(self.factory.get("/"), self.document.id)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"Richie Cunningham", response.content)
+
+    async def test_document_view_pdf_async(self):
+        response = await views.document_view_pdf_async(self.factory.get("/"), self.document.id)
+
+        self.assertTrue(response.streaming)
+        if django.VERSION >= (4, 2):
+            self.assertTrue(response.is_async)
+            content = b"".join([chunk async for chunk in response.streaming_content])
+        else:
+            content = b"".join(response.streaming_content)
+        self.assertEqual(content, PDF_CONTENT)
+
+    async def test_document_view_pdf_async_renders_outside_the_sync_thread(self):
+        threads = []
+        render_document_to_pdf = views.render_document_to_pdf
+
+        def render(document):
+            threads.append(threading.get_ident())
+            return render_document_to_pdf(document)
+
+        with mock.patch.object(views, "render_document_to_pdf", side_effect=render):
+            response = await views.document_view_pdf_async(self.factory.get("/"), self.document.id)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], await sync_to_async(threading.get_ident)())
+
+    async def test_document_view_pdf_async_range(self):
+        response = await views.document_view_pdf_async(self.factory.get("/", HTTP_RANGE="bytes=0-3"), self.document.id)
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), PDF_CONTENT[:4])
+
+    async def test_document_view_pdf_async_not_found(self):
+        with self.assertRaises(Http404):
+            await views.document_view_pdf_async(self.factory.get("/"), uuid.uuid4())
+
+    async def test_aiter_file(self):
+        path = Path(self.documents_root.name, "file")
+        path.write_bytes(b"0123456789")
+        file = open(path, "rb")
+
+        self.assertEqual([chunk async for chunk in views.aiter_file(file, chunk_size=4)], [b"0123", b"4567", b"89"])
+        self.assertTrue(file.closed)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_warmup
+------------
+
+Tests for `replicat-documents` warmup module.
+"""
+
+import io
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from replicat_documents import defaults, warmup
+from replicat_documents.models import CACHED_DOCUMENT_ISSUER_KEY
+
+
+@mock.patch.object(defaults, "RENDERER", "tests.renderers.DummyRenderer")
+@mock.patch.object(defaults, "WARM_UP", True)
+class TestWarmUp(TestCase):
+    def setUp(self):
+        warmup._warm.clear()
+        self.addCleanup(warmup._warm.clear)
+        cache.delete(CACHED_DOCUMENT_ISSUER_KEY)
+
+    def test_warm_up(self):
+        durations = warmup.warm_up()
+
+        self.assertEqual(list(durations), ["discover_issuers", "issuers", "renderer"])
+        self.assertTrue(warmup.is_warm())
+        self.assertIsNotNone(cache.get(CACHED_DOCUMENT_ISSUER_KEY))
+
+    def test_warm_up_is_skipped_before_migrations(self):
+        with mock.patch.object(warmup, "is_migrated", return_value=False), mock.patch.object(
+            warmup, "warm_up"
+        ) as warm_up, self.assertLogs("replicat_documents", "INFO") as logs:
+            warmup.warm_up_until_done()
+
+        warm_up.assert_not_called()
+        self.assertIn("tables do not exist yet", logs.output[0])
+        self.assertTrue(warmup.is_migrated())
+
+    def test_readiness_view(self):
+        response = self.client.get("/ready")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], str(warmup.RETRY_INTERVAL))
+
+        warmup.warm_up()
+
+        self.assertEqual(self.client.get("/ready").status_code, 200)
+
+    def test_readiness_view_without_warm_up(self):
+        with mock.patch.object(defaults, "WARM_UP", False):
+            self.assertEqual(self.client.get("/ready").status_code, 200)
+
+    def test_warm_up_documents_command(self):
+        stdout = io.StringIO()
+
+        call_command("warm_up_documents", stdout=stdout)
+
+        self.assertIn("Warmed up issuers in", stdout.getvalue())
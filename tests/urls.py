@@ -1,10 +1,10 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, unicode_literals
 
-from django.conf.urls import include, url
+from django.urls import include, re_path
 from django.contrib import admin
 
 urlpatterns = [
-    url(r"^admin/", admin.site.urls),
-    url(r"^", include("replicat_documents.urls", namespace="replicat_documents")),
+    re_path(r"^admin/", admin.site.urls),
+    re_path(r"^", include("replicat_documents.urls", namespace="replicat_documents")),
 ]